@@ -22,19 +22,23 @@ the meaning of groups, workflows, etc.
 import datetime
 import logging
 
-import copy
-
 from munch import munchify
 from pony import orm
 from pony.orm import select, delete
 
 from augur import settings
 from augur import db
+from augur.cache import MemoryCache, SqliteCache, MongoCache, TieredCache, freeze, thaw
+from augur.context import invalidate_context
 from augur.db import EventLog
-from augur.integrations.objects import JiraBoard, BoardMetrics, JiraIssue
+from augur.integrations.objects import JiraBoard, BoardMetrics, JiraIssue, JiraIssueCollection, load_boards
 from augur.serializers import StaffSchema
+from augur.warehouse import IssueWarehouse
 
-CACHE = dict()
+CACHE = None
+PERSISTENT_CACHE = None
+SYNC_CACHE = None
+WAREHOUSE = None
 
 __jira = None
 __github = None
@@ -109,6 +113,64 @@ def get_workflows():
     return orm.select(w for w in db.Workflow)
 
 
+def add_statuses_to_workflow(workflow_or_id, statuses):
+    """
+    Adds one or more statuses to a workflow
+    :param workflow_or_id: The Workflow object or its ID
+    :param statuses: A ToolIssueStatus object or a list of them
+    :return: Returns the workflow
+    """
+    return _update_workflow_members(workflow_or_id, 'statuses', add=statuses)
+
+
+def remove_statuses_from_workflow(workflow_or_id, statuses):
+    """
+    Removes one or more statuses from a workflow
+    :param workflow_or_id: The Workflow object or its ID
+    :param statuses: A ToolIssueStatus object or a list of them
+    :return: Returns the workflow
+    """
+    return _update_workflow_members(workflow_or_id, 'statuses', remove=statuses)
+
+
+def add_resolutions_to_workflow(workflow_or_id, resolutions):
+    """
+    Adds one or more resolutions to a workflow
+    :param workflow_or_id: The Workflow object or its ID
+    :param resolutions: A ToolIssueResolution object or a list of them
+    :return: Returns the workflow
+    """
+    return _update_workflow_members(workflow_or_id, 'resolutions', add=resolutions)
+
+
+def remove_resolutions_from_workflow(workflow_or_id, resolutions):
+    """
+    Removes one or more resolutions from a workflow
+    :param workflow_or_id: The Workflow object or its ID
+    :param resolutions: A ToolIssueResolution object or a list of them
+    :return: Returns the workflow
+    """
+    return _update_workflow_members(workflow_or_id, 'resolutions', remove=resolutions)
+
+
+def _update_workflow_members(workflow_or_id, attribute, add=None, remove=None):
+    """
+    Adds to or removes from one of a workflow's sets, commits the change and then drops the workflow's cached index
+    (pony doesn't call any hooks for this)
+    """
+    workflow = workflow_or_id if isinstance(workflow_or_id, db.Workflow) else db.Workflow[workflow_or_id]
+    members = getattr(workflow, attribute)
+    if add is not None:
+        members.add(add if isinstance(add, (list, tuple)) else [add])
+    if remove is not None:
+        members.remove(remove if isinstance(remove, (list, tuple)) else [remove])
+    orm.commit()
+
+    # only dropped once the change is committed so that an index can't be rebuilt from the old data after this
+    db.invalidate_workflow_index(workflow.id)
+    return workflow
+
+
 def add_group(group_props):
     """
     Creates a new group
@@ -133,6 +195,7 @@ def update_group(group_id, group_props):
     group = db.Group[group_id]
     group.set(**group_props)
     orm.commit()
+    invalidate_context(group_id)
     return group
 
 
@@ -204,29 +267,161 @@ def get_products():
     return select(p for p in db.Product)
 
 
-def memory_cache_data(data, key):
+def get_cache():
+    """
+    Returns the global cache.  It is created on first use based on the cache settings.  When a persistent
+    backend (sqlite or mongo) is configured, an in-memory cache is placed in front of it.
+    :return: Returns a CacheBackend instance
+    """
+    global CACHE
+    if CACHE is None:
+        cache_settings = settings.main.datastores.cache
+        memory = MemoryCache(max_entries=cache_settings.memory.max_entries,
+                             max_bytes=cache_settings.memory.max_bytes,
+                             default_ttl=cache_settings.memory.default_ttl)
+
+        if cache_settings.backend == "sqlite":
+            CACHE = TieredCache(memory, SqliteCache(path=cache_settings.sqlite.path,
+                                                    default_ttl=cache_settings.memory.default_ttl))
+        elif cache_settings.backend == "mongo":
+            CACHE = TieredCache(memory, MongoCache(host=cache_settings.mongo.host,
+                                                   port=cache_settings.mongo.port,
+                                                   database=cache_settings.mongo.database,
+                                                   collection=cache_settings.mongo.collection,
+                                                   default_ttl=cache_settings.memory.default_ttl))
+        elif cache_settings.backend == "memory":
+            CACHE = memory
+        else:
+            raise ValueError("Invalid cache backend configured: %s" % cache_settings.backend)
+
+    return CACHE
+
+
+def set_cache(cache):
+    """
+    Replaces the global cache with the given backend.
+    :param cache: A CacheBackend instance (or None to recreate it from the settings on next use)
+    :return:
+    """
+    global CACHE
+    CACHE = cache
+
+
+def get_persistent_cache():
+    """
+    Returns the cache used for data that is expensive to retrieve and rarely (if ever) changes (closed sprint reports
+    and Jira's field metadata).  It's separate from the global cache (see get_cache) no matter which CACHE_BACKEND
+    is configured: everything is stored in a sqlite file (at PERSISTENT_CACHE_SQLITE_PATH) so it survives restarts
+    and isn't pushed out by other cached data.  An in-memory cache is placed in front of the file.
+    :return: Returns a CacheBackend instance
+    """
+    global PERSISTENT_CACHE
+    if PERSISTENT_CACHE is None:
+        cache_settings = settings.main.datastores.cache
+        memory = MemoryCache(max_entries=cache_settings.memory.max_entries,
+                             max_bytes=cache_settings.memory.max_bytes,
+                             default_ttl=cache_settings.memory.default_ttl)
+        PERSISTENT_CACHE = TieredCache(memory, SqliteCache(path=settings.main.datastores.persistent_cache.path,
+                                                           default_ttl=cache_settings.memory.default_ttl))
+
+    return PERSISTENT_CACHE
+
+
+def get_sync_cache():
+    """
+    Returns the cache that holds the issues of incrementally loaded issue collections (see the incremental option of
+    JiraIssueCollection).  It's a sqlite file (at SYNC_SQLITE_PATH) with no limit on the number of entries since a
+    sync only stays incremental while every one of its issues is still stored.  It's created on first use.
+    :return: Returns a SqliteCache instance
+    """
+    global SYNC_CACHE
+    if SYNC_CACHE is None:
+        SYNC_CACHE = SqliteCache(path=settings.main.datastores.sync.path)
+
+    return SYNC_CACHE
+
+
+def get_warehouse():
+    """
+    Returns the local issue warehouse (stored at WAREHOUSE_SQLITE_PATH).  It's created on first use.
+    :return: Returns an IssueWarehouse instance
+    """
+    global WAREHOUSE
+    if WAREHOUSE is None:
+        WAREHOUSE = IssueWarehouse(settings.main.datastores.warehouse.path)
+
+    return WAREHOUSE
+
+
+def sync_warehouse(jql, sprint_id=None):
+    """
+    Loads the issues that match a query from Jira and stores them in the local warehouse (see get_warehouse).  This
+    is how issues get into the warehouse so it should be run (on a schedule, for example) for the issues that
+    reports will query.  Issues that are already in the warehouse are replaced.
+    :param jql: The JQL to run.  The issues are loaded in full (including the changelog).
+    :param sprint_id: If given, the issues are also stored as the issues of this sprint (replacing the issues
+                        that were stored for it before).
+    :return: Returns the number of issues stored or None if the issues could not be loaded
+    """
+    issues = JiraIssueCollection(get_jira(), input_jql=jql)
+    if not issues.load():
+        return None
+
+    warehouse = get_warehouse()
+    stored = warehouse.store_issues(issues)
+    if sprint_id is not None:
+        warehouse.store_sprint_issues(sprint_id, [i.key for i in issues])
+
+    return stored
+
+
+def memory_cache_data(data, key, ttl=None):
     """
-    Cache data in memory
+    Cache data in memory.  The data is stored as a read-only snapshot (dicts become read-only dicts and lists
+    become tuples) so that it can be shared with every caller without being copied.
     :param data: The data to cache
     :param key: The key to store it under
-    :return: Returns the data given in <data>
+    :param ttl: The number of seconds to keep the data.  If None, the configured default is used.  If 0, the
+                data never expires.
+    :return: Returns the read-only version of the data given in <data>
     """
-    global CACHE
-    CACHE[key] = copy.deepcopy(data)
-    return CACHE[key]
+    return get_cache().set(key, freeze(data), ttl=ttl)
 
 
-def get_memory_cached_data(key):
+def get_memory_cached_data(key, copy=False):
     """
     Retrieves data stored in memory under <key>
     :param key: The key to look for in the in-memory cache
-    :return: Returns the data or None if not found
+    :param copy: If True, a mutable copy of the data is returned.  Otherwise the shared read-only
+                data is returned.
+    :return: Returns the data or None if not found (or expired)
     """
-    global CACHE
-    if key in CACHE:
-        return CACHE[key]
+    data = get_cache().get(key)
+    if copy and data is not None:
+        return thaw(data)
+    return data
+
+
+def invalidate_memory_cache(prefix=None):
+    """
+    Removes data stored in memory.
+    :param prefix: If given, only keys that start with this prefix are removed (e.g. "repos_for_").  Otherwise
+                    everything is removed.
+    :return: Returns the number of entries removed
+    """
+    if prefix:
+        return get_cache().invalidate_prefix(prefix)
     else:
-        return None
+        return get_cache().clear()
+
+
+def get_memory_cache_stats():
+    """
+    Returns statistics about the cache
+    :return: Returns a dict containing hits, misses, expirations, invalidations and entries (along with evictions
+            and bytes for the in-memory cache).  Tiered caches return the stats for the front and back separately.
+    """
+    return get_cache().stats
 
 
 def get_board_metrics(board_id, context):
@@ -247,6 +442,43 @@ def get_board_metrics(board_id, context):
         return None
 
 
+def get_boards_metrics(context, board_ids=None, max_sprints=None):
+    """
+    Retrieves the sprint and backlog metrics for several boards in one call.  The Jira requests for all the boards
+    are planned up front, requested once each and run concurrently (see load_boards).
+    :param context: The context to help define how to interpret the data retrieved
+    :param board_ids: A list of board IDs.  If not given, the boards of the teams in the context's group are used.
+    :param max_sprints: The maximum number of sprints to analyze per board (Default=all of them)
+    :return: Returns a dict keyed on board ID containing the same metrics as get_board_metrics (or None for boards
+                that could not be loaded)
+    """
+    if board_ids is None:
+        board_ids = [t.agile_board.jira_id for t in orm.select(t for t in db.Team if t.id in context.team_ids)
+                     if t.agile_board and t.agile_board.jira_id]
+
+    boards = load_boards(get_jira(), board_ids, max_sprints=max_sprints)
+
+    board_metrics = {}
+    for board_id, board in boards.iteritems():
+        if board is None:
+            board_metrics[board_id] = None
+            continue
+
+        metrics = BoardMetrics(context, board)
+        try:
+            board_metrics[board_id] = munchify({
+                'sprints': metrics.historic_sprint_analysis(),
+                'backlog': metrics.backlog_analysis() if board.get_backlog() is not None else None,
+                'failures': board.get_sprints().failures
+            })
+        except Exception, e:
+            # one board shouldn't keep the others from being reported
+            api_logger.error("Unable to get the metrics for board %s: %s" % (board_id, e))
+            board_metrics[board_id] = None
+
+    return board_metrics
+
+
 def get_issue_field_from_custom_name(name):
     """
     Returns the true field name of a jira field based on its friendly name
@@ -277,6 +509,7 @@ def add_staff(staff_properties):
     """
     staff = db.Staff(**staff_properties)
     orm.commit()
+    invalidate_context()
     return staff
 
 
@@ -292,6 +525,7 @@ def update_staff(staff_id, staff_properties):
     if s:
         s.set(**staff_properties)
         orm.commit()
+        invalidate_context()
         return s
 
     return None
@@ -301,6 +535,7 @@ def delete_staff(staff_id):
     s = db.Staff[staff_id]
     if s:
         s.delete()
+        invalidate_context()
         return True
     return False
 
@@ -312,14 +547,10 @@ def get_all_staff(context):
     if not context:
         return orm.select(s for s in db.Staff).order_by(lambda x: x.last_name)[:]
     else:
-        context_staff = []
-        valid_team_ids = [t.id for t in context.group.teams]
-        staff = orm.select(s for s in db.Staff if s.teams)[:]
-        for s in staff:
-            for t in s.teams:
-                if t.id in valid_team_ids:
-                    context_staff.append(s)
-        return context_staff
+        staff_ids = list(context.staff_ids)
+        if not staff_ids:
+            return []
+        return orm.select(s for s in db.Staff if s.id in staff_ids).order_by(lambda x: x.last_name)[:]
 
 
 def get_staff_member_by_field(first_name=None, last_name=None, email=None, username=None):
@@ -418,6 +649,7 @@ def add_staff_to_team(team_or_id, staff):
         else:
             raise TypeError("Unknown type given for one of the staff members")
 
+    invalidate_context()
     return team
 
 
@@ -433,6 +665,7 @@ def update_team(team_id, team_properties):
     if t:
         t.set(**team_properties)
         orm.commit()
+        invalidate_context()
         return t
 
     return None
@@ -442,6 +675,7 @@ def delete_team(team_id):
     t = db.Team[team_id]
     if t:
         t.delete()
+        invalidate_context()
         return True
     return False
 
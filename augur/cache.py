@@ -0,0 +1,682 @@
+"""
+AUGUR CACHE
+
+Provides the caching primitives used by the Augur API to hold on to data retrieved from the
+integrations (Jira, Github, etc.).  Long running processes (dashboards, workers) keep the cache
+around for their whole lifetime so entries are bounded both in number and (optionally) in size and
+expire after a configurable amount of time.
+
+Values are stored as frozen (read-only) snapshots so that they can be handed out to any number of
+callers without copying.  Callers that need to modify cached data can ask for a mutable copy.
+
+The storage itself is pluggable.  The following backends are available:
+    * MemoryCache - Process local LRU cache (the default)
+    * SqliteCache - A local file that survives process restarts
+    * MongoCache - A mongo collection that can be shared by several processes
+    * TieredCache - Puts a MemoryCache in front of one of the persistent backends
+
+Most callers should not use this module directly but should go through the cache functions
+in augur.api (memory_cache_data, get_memory_cached_data, invalidate_memory_cache).
+"""
+
+import cPickle as pickle
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+cache_logger = logging.getLogger("augurcache")
+
+
+class FrozenDict(dict):
+    """
+    A dictionary that cannot be modified after it is created.  It is still a dict so it can be used anywhere
+    a dict is expected for reading (including json serialization and munchify).
+    """
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Cached data is read-only.  Use copy=True when retrieving it if you need to modify it.")
+
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    clear = _immutable
+    pop = _immutable
+    popitem = _immutable
+    setdefault = _immutable
+    update = _immutable
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    """
+    Creates a read-only snapshot of the given value.  Dicts become FrozenDicts, lists and tuples become tuples
+    and sets become frozensets.  Everything else is assumed to be immutable already and is shared.
+    :param value: The value to freeze
+    :return: Returns the frozen value
+    """
+    if isinstance(value, FrozenDict):
+        return value
+    elif isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.iteritems())
+    elif isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    elif isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    else:
+        return value
+
+
+def thaw(value):
+    """
+    Creates a mutable copy of a (possibly) frozen value.  This is the opposite of freeze except that
+    tuples always become lists.
+    :param value: The value to copy
+    :return: Returns a copy of the value that can be modified
+    """
+    if isinstance(value, dict):
+        return dict((k, thaw(v)) for k, v in value.iteritems())
+    elif isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    elif isinstance(value, (set, frozenset)):
+        return set(value)
+    else:
+        return value
+
+
+def estimate_size(value):
+    """
+    Gives a rough estimate of the number of bytes used by the given value including everything
+    that it contains.  This is not meant to be exact - it's used to keep the cache within a byte budget.
+    :param value: The value to measure
+    :return: Returns the estimated size in bytes
+    """
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.iterkeys())
+            stack.extend(current.itervalues())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+
+    return size
+
+
+# the types that to_json tags (so they can be restored by from_json) keyed on their tag
+_JSON_TAGS = {
+    '__frozendict__': lambda pairs: FrozenDict(pairs),
+    '__dict__': lambda pairs: dict(pairs),
+    '__tuple__': tuple,
+    '__frozenset__': frozenset,
+    '__set__': set,
+}
+
+
+def to_json(value):
+    """
+    Serializes a value to json in a form that from_json can restore exactly.  Dicts, tuples and sets (frozen or not)
+    are tagged with their type.  Only those along with lists, strings, numbers, booleans and None can be serialized.
+    :param value: The value to serialize
+    :return: Returns a json string
+    """
+    def encode(v):
+        if isinstance(v, dict):
+            pairs = [[encode(k), encode(i)] for k, i in v.iteritems()]
+            return {'__frozendict__' if isinstance(v, FrozenDict) else '__dict__': pairs}
+        elif isinstance(v, tuple):
+            return {'__tuple__': [encode(i) for i in v]}
+        elif isinstance(v, list):
+            return [encode(i) for i in v]
+        elif isinstance(v, (set, frozenset)):
+            return {'__frozenset__' if isinstance(v, frozenset) else '__set__': [encode(i) for i in v]}
+        elif v is None or isinstance(v, (basestring, bool, int, long, float)):
+            return v
+        else:
+            raise TypeError("Values of type %s can't be serialized to json" % type(v).__name__)
+
+    return json.dumps(encode(value), separators=(',', ':'))
+
+
+def from_json(text):
+    """
+    Restores a value serialized by to_json.  Nothing but plain data is ever created so this is safe to use on data
+    from an untrusted source.
+    :param text: The json string
+    :return: Returns the value
+    """
+    def decode(document):
+        if len(document) == 1:
+            tag, values = document.items()[0]
+            if tag in _JSON_TAGS:
+                return _JSON_TAGS[tag](values)
+        return document
+
+    return json.loads(text, object_hook=decode)
+
+
+class CacheEntry(object):
+    """
+    A single value stored in the cache along with its expiration time and estimated size.
+    """
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value, expires_at, size=0):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+    def is_expired(self, now):
+        return self.expires_at is not None and now >= self.expires_at
+
+
+class CacheBackend(object):
+    """
+    The interface that all cache backends implement.  Backends only need to implement the entry level
+    methods - get and set are built on top of them.
+
+    Options:
+        - default_ttl (Optional) - The number of seconds an entry lives when no ttl is given in set.  None or 0
+                        means that entries never expire by default.
+    """
+
+    def __init__(self, default_ttl=None):
+        self.default_ttl = default_ttl or None
+
+    def __contains__(self, key):
+        return self.get_entry(key) is not None
+
+    def get(self, key, default=None):
+        """
+        Retrieves the value stored under the given key.
+        :param key: The key to look for
+        :param default: The value to return if the key was not found (or has expired)
+        :return: Returns the value or the default if not found
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else default
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value in the cache
+        :param key: The key to store it under
+        :param value: The value to store
+        :param ttl: The number of seconds the value should live.  If None then the cache's default ttl is used.
+                        If 0 then the value never expires.
+        :return: Returns the value given
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+
+        self.set_entry(key, CacheEntry(value, time.time() + ttl if ttl else None))
+        return value
+
+    def get_many(self, keys):
+        """
+        Retrieves several values at once.  Backends that can read them together (in a single query, for example)
+        override this.
+        :param keys: The keys to look for
+        :return: Returns a dict of the values found keyed on their key.  Keys that were not found are left out.
+        """
+        values = {}
+        for key in keys:
+            entry = self.get_entry(key)
+            if entry is not None:
+                values[key] = entry.value
+        return values
+
+    def set_many(self, items, ttl=None):
+        """
+        Stores several values at once.  Backends that can write them together (in a single transaction, for
+        example) override this.
+        :param items: A list of (key, value) tuples
+        :param ttl: See set
+        """
+        for key, value in items:
+            self.set(key, value, ttl=ttl)
+
+    def get_entry(self, key):
+        """
+        Retrieves the CacheEntry stored under the given key.  Expired entries are never returned.
+        :param key: The key to look for
+        :return: Returns a CacheEntry or None if not found
+        """
+        raise NotImplementedError()
+
+    def set_entry(self, key, entry):
+        """
+        Stores the given CacheEntry under the given key
+        :param key: The key to store it under
+        :param entry: The CacheEntry to store
+        """
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """
+        Removes a single key from the cache
+        :param key: The key to remove
+        :return: Returns True if the key was found, False otherwise
+        """
+        raise NotImplementedError()
+
+    def invalidate_prefix(self, prefix):
+        """
+        Removes all entries whose key starts with the given prefix (for example "repos_for_")
+        :param prefix: The key prefix to look for
+        :return: Returns the number of entries removed
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """
+        Removes everything from the cache.
+        :return: Returns the number of entries removed
+        """
+        raise NotImplementedError()
+
+    @property
+    def stats(self):
+        """
+        Returns the hit/miss counters along with any other information the backend tracks.
+        :return: A dict
+        """
+        raise NotImplementedError()
+
+
+class MemoryCache(CacheBackend):
+    """
+    A thread-safe, in-memory LRU cache with per-key expiration.
+
+    Options:
+        - max_entries (Optional) - The maximum number of keys to hold.  When exceeded, the least recently used
+                        entries are evicted.  None or 0 means there is no limit.
+        - max_bytes (Optional) - The (estimated) maximum number of bytes to hold.  When exceeded, the least
+                        recently used entries are evicted.  None or 0 means there is no limit.
+        - default_ttl (Optional) - The number of seconds an entry lives when no ttl is given in set.  None or 0
+                        means that entries never expire by default.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, default_ttl=None):
+        super(MemoryCache, self).__init__(default_ttl=default_ttl)
+        self.max_entries = max_entries or None
+        self.max_bytes = max_bytes or None
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not entry.is_expired(time.time())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_entry(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            if entry.is_expired(time.time()):
+                self._bytes -= entry.size
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            # re-insert to mark this as the most recently used entry.
+            self._entries[key] = entry
+            self._stats['hits'] += 1
+            return entry
+
+    def set_entry(self, key, entry):
+        if self.max_bytes:
+            entry.size = estimate_size(entry.value)
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._enforce_limits()
+
+    def delete(self, key):
+        with self._lock:
+            if self._remove(key):
+                self._stats['invalidations'] += 1
+                return True
+            return False
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            keys = [k for k in self._entries.iterkeys() if k.startswith(prefix)]
+            for k in keys:
+                self._remove(k)
+
+            self._stats['invalidations'] += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self._stats['invalidations'] += count
+            return count
+
+    @property
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            return stats
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            return True
+        return False
+
+    def _over_budget(self):
+        return (self.max_entries and len(self._entries) > self.max_entries) or \
+               (self.max_bytes and self._bytes > self.max_bytes)
+
+    def _enforce_limits(self):
+        if not self._over_budget():
+            return
+
+        # start by dropping anything that has already expired.
+        now = time.time()
+        expired = [k for k, e in self._entries.iteritems() if e.is_expired(now)]
+        for k in expired:
+            self._remove(k)
+        self._stats['expirations'] += len(expired)
+
+        # then evict the least recently used entries until we are within budget.  The most recently
+        #   added entry is never evicted even if it is larger than the byte budget on its own.
+        while len(self._entries) > 1 and self._over_budget():
+            key = next(self._entries.iterkeys())
+            self._remove(key)
+            self._stats['evictions'] += 1
+
+
+class SqliteCache(CacheBackend):
+    """
+    A cache stored in a local sqlite file.  Values are pickled so anything that can be pickled can be stored.
+    Entries survive process restarts which means that a restarted worker doesn't need to go back to Jira
+    or Github for data that it retrieved recently.
+
+    Options:
+        - path - The path to the sqlite file.  It is created if it does not exist.
+        - default_ttl (Optional) - See CacheBackend
+    """
+
+    # the most keys get_many puts in a single query
+    MAX_QUERY_KEYS = 900
+
+    def __init__(self, path, default_ttl=None):
+        super(SqliteCache, self).__init__(default_ttl=default_ttl)
+        self.path = path
+        self._lock = threading.RLock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.text_factory = str
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS augur_cache ("
+                                     "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)")
+            self._connection.execute("DELETE FROM augur_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                     (time.time(),))
+
+    def get_entry(self, key):
+        with self._lock:
+            row = self._connection.execute("SELECT value, expires_at FROM augur_cache WHERE key = ?",
+                                           (key,)).fetchone()
+            if not row:
+                self._stats['misses'] += 1
+                return None
+
+            value, expires_at = row
+            entry = CacheEntry(None, expires_at)
+            if entry.is_expired(time.time()):
+                with self._connection:
+                    self._connection.execute("DELETE FROM augur_cache WHERE key = ?", (key,))
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            self._stats['hits'] += 1
+
+        entry.value = pickle.loads(str(value))
+        return entry
+
+    def set_entry(self, key, entry):
+        value = sqlite3.Binary(pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL))
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO augur_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                                     (key, value, entry.expires_at))
+
+    def get_many(self, keys):
+        keys = list(keys)
+        rows = []
+        with self._lock:
+            # older versions of sqlite allow at most 999 parameters in a query
+            for i in range(0, len(keys), self.MAX_QUERY_KEYS):
+                batch = keys[i:i + self.MAX_QUERY_KEYS]
+                rows.extend(self._connection.execute(
+                    "SELECT key, value, expires_at FROM augur_cache WHERE key IN (%s)" % ",".join("?" * len(batch)),
+                    batch).fetchall())
+
+            now = time.time()
+            expired = [(key,) for key, _, expires_at in rows if CacheEntry(None, expires_at).is_expired(now)]
+            if expired:
+                with self._connection:
+                    self._connection.executemany("DELETE FROM augur_cache WHERE key = ?", expired)
+
+            self._stats['expirations'] += len(expired)
+            self._stats['hits'] += len(rows) - len(expired)
+            self._stats['misses'] += len(keys) - len(rows) + len(expired)
+
+        expired = set(key for key, in expired)
+        return {key: pickle.loads(str(value)) for key, value, _ in rows if key not in expired}
+
+    def set_many(self, items, ttl=None):
+        if ttl is None:
+            ttl = self.default_ttl
+
+        expires_at = time.time() + ttl if ttl else None
+        rows = [(key, sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)), expires_at) for key, value in items]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO augur_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                                         rows)
+
+    def delete(self, key):
+        with self._lock, self._connection:
+            count = self._connection.execute("DELETE FROM augur_cache WHERE key = ?", (key,)).rowcount
+            self._stats['invalidations'] += count
+            return count > 0
+
+    def invalidate_prefix(self, prefix):
+        with self._lock, self._connection:
+            count = self._connection.execute("DELETE FROM augur_cache WHERE substr(key, 1, ?) = ?",
+                                             (len(prefix), prefix)).rowcount
+            self._stats['invalidations'] += count
+            return count
+
+    def clear(self):
+        with self._lock, self._connection:
+            count = self._connection.execute("DELETE FROM augur_cache").rowcount
+            self._stats['invalidations'] += count
+            return count
+
+    @property
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = self._connection.execute("SELECT COUNT(*) FROM augur_cache").fetchone()[0]
+            return stats
+
+
+class MongoCache(CacheBackend):
+    """
+    A cache stored in a mongo collection.  Since the collection can be shared by many processes (and written by
+    anyone with access to the database), values are stored as json (see to_json) rather than pickled.  This means
+    only plain data (dicts, lists, tuples, sets, strings, numbers and None, frozen or not) can be cached.  Entries
+    that can't be read are treated as misses.  This requires pymongo unless a collection object is given directly
+    (which is useful for testing with a local stand-in).
+
+    Options:
+        - host (Optional) - The mongo host
+        - port (Optional) - The mongo port
+        - database (Optional, Default=augur) - The database to store the cache in
+        - collection (Optional, Default=cache) - The name of the collection or a collection object that
+                        implements find_one, replace_one, delete_one and delete_many.
+        - default_ttl (Optional) - See CacheBackend
+    """
+
+    def __init__(self, host=None, port=None, database="augur", collection="cache", default_ttl=None):
+        super(MongoCache, self).__init__(default_ttl=default_ttl)
+        self._lock = threading.RLock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+        if isinstance(collection, (str, unicode)):
+            import pymongo
+            self._collection = pymongo.MongoClient(host=host, port=port)[database][collection]
+        else:
+            self._collection = collection
+
+    def get_entry(self, key):
+        with self._lock:
+            document = self._collection.find_one({'_id': key})
+            if not document:
+                self._stats['misses'] += 1
+                return None
+
+            entry = CacheEntry(None, document.get('expires_at'))
+            if entry.is_expired(time.time()):
+                self._collection.delete_one({'_id': key})
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            try:
+                entry.value = from_json(document['value'])
+            except (TypeError, ValueError, KeyError), e:
+                cache_logger.warning("Ignoring the unreadable cache entry %s: %s" % (key, e))
+                self._stats['misses'] += 1
+                return None
+
+            self._stats['hits'] += 1
+            return entry
+
+    def set_entry(self, key, entry):
+        value = to_json(entry.value)
+        with self._lock:
+            self._collection.replace_one({'_id': key}, {
+                '_id': key,
+                'value': value,
+                'expires_at': entry.expires_at
+            }, upsert=True)
+
+    def delete(self, key):
+        with self._lock:
+            count = self._collection.delete_one({'_id': key}).deleted_count
+            self._stats['invalidations'] += count
+            return count > 0
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            count = self._collection.delete_many({'_id': {'$regex': '^%s' % re.escape(prefix)}}).deleted_count
+            self._stats['invalidations'] += count
+            return count
+
+    def clear(self):
+        with self._lock:
+            count = self._collection.delete_many({}).deleted_count
+            self._stats['invalidations'] += count
+            return count
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+class TieredCache(CacheBackend):
+    """
+    Puts a fast cache (usually a MemoryCache) in front of a slower, persistent one.  Reads are served from the
+    front when possible and writes go to both.  Entries loaded from the back are copied to the front with the
+    same expiration time.
+
+    Options:
+        - front - The CacheBackend to check first
+        - back - The CacheBackend that holds everything
+    """
+
+    def __init__(self, front, back):
+        super(TieredCache, self).__init__(default_ttl=back.default_ttl)
+        self.front = front
+        self.back = back
+
+    def get_entry(self, key):
+        entry = self.front.get_entry(key)
+        if entry is None:
+            entry = self.back.get_entry(key)
+            if entry is not None:
+                self.front.set_entry(key, CacheEntry(entry.value, entry.expires_at))
+        return entry
+
+    def set_entry(self, key, entry):
+        self.back.set_entry(key, entry)
+        self.front.set_entry(key, CacheEntry(entry.value, entry.expires_at))
+
+    def delete(self, key):
+        found_in_front = self.front.delete(key)
+        return self.back.delete(key) or found_in_front
+
+    def invalidate_prefix(self, prefix):
+        self.front.invalidate_prefix(prefix)
+        return self.back.invalidate_prefix(prefix)
+
+    def clear(self):
+        self.front.clear()
+        return self.back.clear()
+
+    @property
+    def stats(self):
+        return {
+            'front': self.front.stats,
+            'back': self.back.stats
+        }
@@ -14,6 +14,7 @@ __author__ = 'karim'
 
 from math import sqrt, floor
 from dateutil.parser import parse
+from dateutil.tz import tzoffset, tzutc
 
 JIRA_KEY_REGEX = r"([A-Za-z]+\-\d{1,6})"
 
@@ -30,6 +31,13 @@ POSSIBLE_DATE_TIME_FORMATS = [
     "M/D/YY HH:mm",
 ]
 
+# matches the ISO-8601 timestamps returned by Jira (2017-01-04T10:00:00.000-0500) and Github (2017-01-04T10:00:00Z)
+ISO_8601_REGEX = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6})\d*)?)?"
+                            r"(Z|[+-]\d{2}(?::?\d{2})?)?)?$")
+
+# the most parsed date strings we hold on to before starting over
+MAX_PARSED_DATE_STRINGS = 10000
+
 SITE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
 
@@ -128,6 +136,60 @@ def extract_jira_tickets(text):
     return match.groups() if match and match.groups() else []
 
 
+_parsed_date_strings = {}
+_tz_offsets = {}
+
+
+def parse_datetime(date_str):
+    """
+    Parses a date string into a datetime.  ISO-8601 strings (the format used in Jira and Github payloads) are
+    parsed directly and everything else is handed to dateutil.  Results are remembered so parsing the same string
+    again (common with changelogs and sprint dates) is just a lookup.
+    :param date_str: The string to parse
+    :return: Returns a datetime (timezone aware if the string includes a timezone)
+    :raises ValueError: If the string can't be parsed
+    """
+    dt = _parsed_date_strings.get(date_str)
+    if dt is not None:
+        return dt
+
+    match = ISO_8601_REGEX.match(date_str)
+    dt = None
+    if match:
+        year, month, day, hour, minute, second, fraction, tz = match.groups()
+        try:
+            dt = datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0),
+                                   int(second or 0), int(fraction.ljust(6, "0")) if fraction else 0,
+                                   _get_tzinfo(tz) if tz else None)
+        except ValueError:
+            # out of range values.  Let dateutil decide what to do with it.
+            dt = None
+
+    if dt is None:
+        dt = parse(date_str)
+
+    if len(_parsed_date_strings) >= MAX_PARSED_DATE_STRINGS:
+        _parsed_date_strings.clear()
+    _parsed_date_strings[date_str] = dt
+    return dt
+
+
+def _get_tzinfo(tz):
+    """
+    Gets the tzinfo for the timezone part of an ISO-8601 string (Z, +05:30, -0500, +05)
+    """
+    tzinfo = _tz_offsets.get(tz)
+    if tzinfo is None:
+        if tz == "Z":
+            tzinfo = tzutc()
+        else:
+            digits = tz[1:].replace(":", "")
+            offset = int(digits[:2]) * 3600 + int(digits[2:] or 0) * 60
+            tzinfo = tzoffset(None, -offset if tz[0] == "-" else offset)
+        _tz_offsets[tz] = tzinfo
+    return tzinfo
+
+
 def get_week_range(date):
     """
     This will return the start and end of the week in which the given date resides.
@@ -216,9 +278,128 @@ def clean_username(username):
     return username.replace(".", "_")
 
 
+class StatusHistory(object):
+    """
+    The status changes made in a single changelog history entry.
+
+    Options:
+        - id - The id of the changelog history entry
+        - created - The date string the history entry was created
+        - changes - A tuple of (from status name, to status name) tuples
+    """
+    __slots__ = ('id', 'created', 'changes')
+
+    def __init__(self, id, created, changes):
+        self.id = id
+        self.created = created
+        self.changes = changes
+
+
+def get_status_changes(issue):
+    """
+    Pulls the status changes out of an issue's changelog.  Histories that don't change the status are left out.
+    :param issue: The ticket in dictionary form (including the changelog)
+    :return: Returns a tuple of StatusHistory objects ordered by history id
+    """
+    if 'changelog' not in issue or not issue['changelog']:
+        return ()
+
+    status_histories = []
+    for history in sorted(issue['changelog']['histories'], key=lambda x: x['id']):
+        changes = tuple((item['fromString'], item['toString']) for item in history['items']
+                        if item['field'] == 'status')
+        if changes:
+            status_histories.append(StatusHistory(history['id'], history['created'], changes))
+
+    return tuple(status_histories)
+
+
+class StatusTransitionIndex(object):
+    """
+    The start, end and total time an issue spent in each status, built in a single pass over the status changes in
+    the issue's changelog (each history's timestamp is parsed once).  Use get_timing to get the information for a
+    single status.
+    """
+
+    def __init__(self, status_histories):
+        """
+        :param status_histories: The StatusHistory objects for the issue ordered by history id (see
+                    get_status_changes)
+        """
+        # lower case status name => [start_time, track_time, total_time]
+        self._statuses = {}
+
+        for history in status_histories:
+            created = None
+
+            # a history entry can only start or end each status once.
+            handled = set()
+            for from_string, to_string in history.changes:
+                to_status = (to_string or "").lower()
+                from_status = (from_string or "").lower()
+
+                if to_status not in handled:
+                    # start status
+                    handled.add(to_status)
+                    created = created or parse_datetime(history.created)
+                    timing = self._statuses.setdefault(to_status, [None, None, datetime.timedelta()])
+                    timing[1] = created
+                    if not timing[0]:
+                        timing[0] = created
+
+                if from_status not in handled and from_status in self._statuses and \
+                        self._statuses[from_status][1]:
+                    # end status
+                    handled.add(from_status)
+                    created = created or parse_datetime(history.created)
+                    timing = self._statuses[from_status]
+                    timing[2] += created - timing[1]
+                    timing[1] = None
+
+    @classmethod
+    def from_issue(cls, issue):
+        """
+        Builds the index from an issue in dictionary form
+        :param issue: The ticket in dictionary form (including the changelog)
+        :return: Returns a StatusTransitionIndex
+        """
+        return cls(get_status_changes(issue))
+
+    @property
+    def statuses(self):
+        """
+        The (lower case) names of all the statuses the issue has been in
+        """
+        return self._statuses.keys()
+
+    def get_timing(self, status_name):
+        """
+        Gets a single status' timing information.  See get_issue_status_timing_info
+        :param status_name: The name of the status
+        :return: Returns a munch containing start_time, end_time and total_time
+        """
+        start_time, track_time, total_time = self._statuses.get(status_name.lower(),
+                                                                (None, None, datetime.timedelta()))
+
+        if track_time and not total_time:
+            # In this case the issue is currently in the requested status which means we need to set the "end" time to
+            #   NOW because there's no record of the *next* status to subtract from.
+            end_time = utc_to_local(datetime.datetime.now())
+            total_time = end_time - track_time
+        else:
+            end_time = track_time
+
+        return munchify({
+            "start_time": start_time,
+            "end_time": end_time,
+            "total_time": total_time
+        })
+
+
 def get_issue_status_timing_info(issue, status):
     """
     Gets a single tickets timing information including when in started, ended and the total time in the status.
+    When getting the timing for more than one status, build a StatusTransitionIndex once and use that instead.
     :param issue: The ticket in dictionary form
     :param status: The ToolIssueStatus to look for.
     :return: Returns a dict containing:
@@ -226,56 +407,7 @@ def get_issue_status_timing_info(issue, status):
                 end_time: datetime when the issue last left the status
                 total_time: timedelta with the total time in status
     """
-    status_name = status.tool_issue_status_name
-    track_time = None
-    total_time = datetime.timedelta()
-
-    if 'changelog' not in issue or not issue['changelog']:
-        return {
-            "start_time":None,
-            "end_time":None,
-            "total_time":datetime.timedelta(seconds=0)
-        }
-
-    history_list = issue['changelog']['histories']
-
-    # added sorting past > present because the API is inconsistently ordering the results.
-    history_list.sort(key=lambda x: x['id'], reverse=False)
-
-    start_time = None
-    for history in history_list:
-        items = history['items']
-
-        for item in items:
-            if item['field'] == 'status' and item['toString'].lower() == status_name.lower():
-                # start status
-                track_time = parse(history['created'])
-                if not start_time:
-                    start_time = track_time
-
-                break
-            elif track_time and item['field'] == 'status' and item['fromString'].lower() == status_name.lower():
-                # end status
-                if track_time:
-                    # only recalculate if track_time has a value.  It can happen that track_time has no
-                    # value if the API only returns X number of historical items and the
-                    total_time += (parse(history['created']) - track_time)
-                track_time = None
-                break
-
-    if track_time and not total_time:
-        # In this case the issue is currently in the requested status which means we need to set the "end" time to
-        #   NOW because there's no record of the *next* status to subtract from.
-        end_time = utc_to_local(datetime.datetime.now())
-        total_time = end_time - track_time
-    else:
-        end_time = track_time
-
-    return munchify({
-        "start_time":start_time,
-        "end_time":end_time,
-        "total_time":total_time
-    })
+    return StatusTransitionIndex.from_issue(issue).get_timing(status.tool_issue_status_name)
 
 
 def get_date_from_week_number(week_number):
@@ -0,0 +1,170 @@
+"""
+Utilities for running blocking integration calls (Jira, Github) concurrently.  Everything here is
+based on threads since the underlying clients are synchronous.  Note that pony database sessions
+are bound to a thread so functions run through here should not touch the database.
+"""
+
+import sys
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+from augur import settings
+
+# the pool used by run_async.  It's created on first use and lives as long as the process.
+_async_pool = None
+_async_pool_lock = threading.Lock()
+
+
+class RateLimiter(object):
+    """
+    Spaces out calls so that no more than max_per_second are started each second across all threads
+    sharing the limiter.
+
+    Options:
+        - max_per_second - The maximum number of calls per second.  None or 0 means there is no limit.
+    """
+
+    def __init__(self, max_per_second=None):
+        self.interval = 1.0 / max_per_second if max_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until the caller is allowed to make the next call.
+        :return: Returns the number of seconds spent waiting
+        """
+        if not self.interval:
+            return 0.0
+
+        with self._lock:
+            now = time.time()
+            wait = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class CompletedResult(object):
+    """
+    A result that is available right away.  It has the same interface as the AsyncResult returned by run_async so
+    callers can treat both the same way.
+
+    Options:
+        - value - The result
+    """
+
+    def __init__(self, value):
+        self._value = value
+
+    def ready(self):
+        return True
+
+    def successful(self):
+        return True
+
+    def wait(self, timeout=None):
+        pass
+
+    def get(self, timeout=None):
+        return self._value
+
+
+def chunk_list(items, chunk_size):
+    """
+    Splits a list into consecutive chunks of at most chunk_size items
+    :param items: The list to split
+    :param chunk_size: The maximum number of items in each chunk
+    :return: Returns a list of lists
+    """
+    chunk_size = max(1, int(chunk_size))
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def map_concurrently(func, items, max_workers=None, return_exceptions=False):
+    """
+    Calls func once for each item and returns the results in the same order as the items.  The calls are spread over
+    the calling thread and up to max_workers - 1 threads borrowed from the pool used by run_async so no threads are
+    created per call.  Each thread takes the next item until there are none left which means the calling thread
+    does all of the work when the pool is busy (nested calls can't deadlock waiting for a free thread).
+    :param func: The function to call.  It takes a single item as its only parameter.
+    :param items: The list of items to process
+    :param max_workers: The maximum number of calls in flight at once.  If None or 1 (or there's only one item)
+                        then the items are processed serially in the calling thread.
+    :param return_exceptions: If True, an exception raised by func is returned in the result list in place of
+                        the item's result instead of being raised.  Otherwise, no more items are started once a
+                        call fails and the first exception is raised after the calls in flight finish.
+    :return: Returns a list of results
+    """
+    items = list(items)
+
+    if return_exceptions:
+        def call(item):
+            try:
+                return func(item)
+            except Exception, e:
+                return e
+    else:
+        call = func
+
+    if not max_workers or max_workers <= 1 or len(items) <= 1:
+        return [call(item) for item in items]
+
+    results = [None] * len(items)
+    errors = []
+    state = {'next': 0, 'in_flight': 0}
+    condition = threading.Condition()
+
+    def work():
+        while True:
+            with condition:
+                if errors or state['next'] >= len(items):
+                    return
+                index = state['next']
+                state['next'] += 1
+                state['in_flight'] += 1
+
+            try:
+                results[index] = call(items[index])
+            except Exception:
+                with condition:
+                    errors.append(sys.exc_info())
+            finally:
+                with condition:
+                    state['in_flight'] -= 1
+                    condition.notify_all()
+
+    for _ in range(min(max_workers, len(items)) - 1):
+        run_async(work)
+    work()
+
+    # helpers that start after this point find nothing left to do so only the calls in flight are waited on
+    with condition:
+        while state['in_flight']:
+            condition.wait()
+
+    if errors:
+        raise errors[0][0], errors[0][1], errors[0][2]
+
+    return results
+
+
+def run_async(func, *args, **kwargs):
+    """
+    Calls func in the background using a pool of JIRA_ASYNC_WORKERS threads shared by the whole process.  This lets a
+    single caller keep many blocking calls in flight and collect the results when it needs them.
+    :param func: The function to call
+    :param args: The positional parameters to pass to func
+    :param kwargs: The keyword parameters to pass to func
+    :return: Returns a multiprocessing AsyncResult.  Its get() waits for the call to finish and returns the result
+                (or raises the exception raised by func).
+    """
+    global _async_pool
+    with _async_pool_lock:
+        if _async_pool is None:
+            _async_pool = ThreadPool(processes=max(1, settings.main.integrations.jira.async_workers))
+
+    return _async_pool.apply_async(func, args, kwargs)
@@ -1,3 +1,67 @@
+import threading
+
+from pony import orm
+
+from augur.cache import FrozenDict
+
+# shared AugurContext objects keyed on group id
+_contexts = {}
+_contexts_lock = threading.Lock()
+
+# contexts are built under a lock per group so that building one group's context doesn't hold up the others
+_build_locks = {}
+
+# bumped whenever contexts are invalidated so that a context that was loading at the time isn't stored
+_generation = 0
+_group_generations = {}
+
+
+def get_context(group_id):
+    """
+    Gets the shared context for a group.  The first time a group's context is requested it's created and warmed up
+    (see AugurContext.warm).  After that, the same context is returned until it's invalidated.
+    :param group_id: The ID of the group
+    :return: Returns an AugurContext
+    """
+    with _contexts_lock:
+        context = _contexts.get(group_id)
+        if context is not None:
+            return context
+        build_lock = _build_locks.setdefault(group_id, threading.Lock())
+
+    with build_lock:
+        # another thread may have built it while this one was waiting
+        with _contexts_lock:
+            context = _contexts.get(group_id)
+            if context is not None:
+                return context
+            generation = (_generation, _group_generations.get(group_id, 0))
+
+        context = AugurContext(group_id).warm()
+
+        with _contexts_lock:
+            # an invalidation while the context was loading wins - the context is returned but not shared
+            if generation == (_generation, _group_generations.get(group_id, 0)):
+                _contexts[group_id] = context
+
+    return context
+
+
+def invalidate_context(group_id=None):
+    """
+    Drops a shared context so that it's rebuilt the next time it's requested.  This should be called whenever a group
+    or the teams and staff within it change.
+    :param group_id: The ID of the group or None to drop all of them
+    """
+    global _generation
+
+    with _contexts_lock:
+        if group_id is None:
+            _contexts.clear()
+            _generation += 1
+        else:
+            _contexts.pop(group_id, None)
+            _group_generations[group_id] = _group_generations.get(group_id, 0) + 1
 
 
 class AugurContext(object):
@@ -6,17 +70,81 @@ class AugurContext(object):
     used when requesting data.  The Context object is defined by a "Group".  Groups
     are associated with a workflow, teams and other information.  Many functions within
     augur will require a context object in order to know how to filter and interpret data.
+
+    Contexts only hold on to the ids of the group and workflow (along with the team and staff membership) so that they
+    can be shared between database sessions.  Use get_context to get a shared context for a group.
     """
 
     def __init__(self, group_id):
         from augur.api import get_group
         self._group = get_group(group_id)
-        self._workflow = self.group.workflow
+        self._workflow = self._group.workflow
+        self._group_id = self._group.id
+        self._workflow_id = self._workflow.id if self._workflow else None
+        self._team_members = None
+
+    def warm(self):
+        """
+        Loads the workflow index along with the teams in the group and their members (in a single query) so that
+        they're ready when needed.
+        :return: Returns the context
+        """
+        from augur import db
+
+        if self.workflow:
+            _ = self.workflow.index
+
+        group_id = self._group_id
+        rows = orm.left_join((t.id, s.id) for t in db.Team for g in t.groups for s in t.members
+                             if g.id == group_id)[:]
+
+        team_members = {}
+        for team_id, staff_id in rows:
+            members = team_members.setdefault(team_id, set())
+            if staff_id is not None:
+                members.add(staff_id)
+
+        self._team_members = FrozenDict((t, frozenset(m)) for t, m in team_members.iteritems())
+        return self
 
     @property
     def workflow(self):
-        return self._workflow
+        from augur import db
+        return self._get_current(db.Workflow, self._workflow_id, self._workflow)
 
     @property
     def group(self):
-        return self._group
\ No newline at end of file
+        from augur import db
+        return self._get_current(db.Group, self._group_id, self._group)
+
+    @property
+    def team_members(self):
+        """
+        Returns the ids of the staff in each of the group's teams
+        :return: A dict of frozensets of staff ids keyed on team id
+        """
+        if self._team_members is None:
+            self.warm()
+        return self._team_members
+
+    @property
+    def team_ids(self):
+        return frozenset(self.team_members.keys())
+
+    @property
+    def staff_ids(self):
+        return frozenset().union(*self.team_members.values())
+
+    @staticmethod
+    def _get_current(entity_class, entity_id, loaded):
+        """
+        Gets the entity as loaded in the current database session.  When there is no session, the entity loaded when
+        the context was created is returned.
+        """
+        if entity_id is None:
+            return None
+
+        try:
+            return entity_class[entity_id]
+        except orm.TransactionError:
+            return loaded
@@ -1,6 +1,9 @@
 from pony import orm
 from pony.orm import sql_debug, Json
 import datetime
+import threading
+
+from augur.cache import FrozenDict
 
 NOTIFY_TYPES = ["none", "email", "slack"]
 TOOL_ISSUE_STATUS_TYPES = ["open", "in progress", "done"]
@@ -16,6 +19,91 @@ STAFF_TYPES = ["FTE", "Consultant"]
 db = orm.Database()
 __is_bound = False
 
+# WorkflowIndex objects keyed on workflow id
+_workflow_indexes = {}
+# reentrant since building an index can flush pending changes which calls the hooks that invalidate indexes
+_workflow_indexes_lock = threading.RLock()
+
+
+class WorkflowIndex(object):
+    """
+    An immutable snapshot of a workflow's statuses and resolutions that answers the workflow questions (is this
+    status/resolution resolved, abandoned, in progress) with dictionary and set lookups.  Since it only holds
+    strings it's not tied to a database session and can be shared.  All names and types are lower case.
+    """
+    __slots__ = ('status_types', 'resolution_types', 'status_ids', 'resolution_ids', 'open', 'in_progress', 'done',
+                 'positive', 'negative')
+
+    def __init__(self, statuses, resolutions):
+        """
+        :param statuses: A list of (status name, status type, status id) tuples
+        :param resolutions: A list of (resolution name, resolution type, resolution id) tuples
+        """
+        status_types = FrozenDict((name.lower(), status_type.lower()) for name, status_type, _ in statuses)
+        resolution_types = FrozenDict((name.lower(), res_type.lower()) for name, res_type, _ in resolutions)
+
+        def names_of_type(types, of_type):
+            return frozenset(name for name, t in types.iteritems() if t == of_type)
+
+        set_attribute = super(WorkflowIndex, self).__setattr__
+        set_attribute('status_types', status_types)
+        set_attribute('resolution_types', resolution_types)
+        set_attribute('status_ids', FrozenDict((name.lower(), i) for name, _, i in statuses))
+        set_attribute('resolution_ids', FrozenDict((name.lower(), i) for name, _, i in resolutions))
+        set_attribute('open', names_of_type(status_types, "open"))
+        set_attribute('in_progress', names_of_type(status_types, "in progress"))
+        set_attribute('done', names_of_type(status_types, "done"))
+        set_attribute('positive', names_of_type(resolution_types, "positive"))
+        set_attribute('negative', names_of_type(resolution_types, "negative"))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("WorkflowIndex objects are immutable")
+
+    @classmethod
+    def from_workflow(cls, workflow):
+        return cls([(s.tool_issue_status_name, s.tool_issue_status_type, s.id) for s in workflow.statuses],
+                   [(r.tool_issue_resolution_name, r.tool_issue_resolution_type, r.id) for r in workflow.resolutions])
+
+    def status_type(self, status):
+        return self.status_types.get((status or "").lower())
+
+    def resolution_type(self, resolution):
+        return self.resolution_types.get((resolution or "").lower())
+
+    def is_resolved(self, status, resolution):
+        """
+        A done status with a positive resolution (or a resolution that's not part of the workflow) is resolved.
+        """
+        if self.status_type(status) != "done":
+            return False
+
+        resolution_type = self.resolution_type(resolution)
+        return resolution_type is None or resolution_type == "positive"
+
+    def is_abandoned(self, status, resolution):
+        """
+        A done status with a negative resolution is abandoned.
+        """
+        return self.status_type(status) == "done" and self.resolution_type(resolution) == "negative"
+
+    def is_in_progress(self, status):
+        return (status or "").lower() in self.in_progress
+
+
+def invalidate_workflow_index(workflow_id=None):
+    """
+    Drops the cached WorkflowIndex for a workflow so that it's rebuilt the next time it's used.  This happens
+    automatically when workflows, statuses or resolutions are updated but pony doesn't call any hooks when statuses
+    or resolutions are only added to or removed from a workflow.  The api functions that do that (for example,
+    api.add_statuses_to_workflow) call this.  Anything else that changes them has to call it too.
+    :param workflow_id: The ID of the workflow or None to drop all of them
+    """
+    with _workflow_indexes_lock:
+        if workflow_id is None:
+            _workflow_indexes.clear()
+        else:
+            _workflow_indexes.pop(workflow_id, None)
+
 
 class ToolIssueResolution(db.Entity):
     """
@@ -26,6 +114,12 @@ class ToolIssueResolution(db.Entity):
     tool_issue_resolution_type = orm.Required(unicode, py_check=lambda v: v in TOOL_ISSUE_RESOLUTION_TYPES)
     workflows = orm.Set('Workflow', reverse="resolutions")
 
+    def after_update(self):
+        invalidate_workflow_index()
+
+    def after_delete(self):
+        invalidate_workflow_index()
+
 
 class ToolIssueStatus(db.Entity):
     """
@@ -36,6 +130,12 @@ class ToolIssueStatus(db.Entity):
     tool_issue_status_type = orm.Required(unicode, py_check=lambda v: v in TOOL_ISSUE_STATUS_TYPES)
     workflows = orm.Set('Workflow', reverse="statuses")
 
+    def after_update(self):
+        invalidate_workflow_index()
+
+    def after_delete(self):
+        invalidate_workflow_index()
+
 
 class ToolIssueType(db.Entity):
     """
@@ -273,6 +373,27 @@ class Workflow(db.Entity):
     defect_projects = orm.Set(WorkflowDefectProjectFilter, reverse="workflows")
     groups = orm.Set('Group', reverse="workflow")
 
+    @property
+    def index(self):
+        """
+        Returns the WorkflowIndex for this workflow.  It's built the first time it's needed and shared after that
+        until the workflow changes (see invalidate_workflow_index).
+        :return: A WorkflowIndex
+        """
+        with _workflow_indexes_lock:
+            index = _workflow_indexes.get(self.id)
+            if index is None:
+                # built under the lock so that an index can't be stored after an invalidation that happened while
+                #   it was being built
+                index = _workflow_indexes[self.id] = WorkflowIndex.from_workflow(self)
+        return index
+
+    def after_update(self):
+        invalidate_workflow_index(self.id)
+
+    def after_delete(self):
+        invalidate_workflow_index(self.id)
+
     def get_defect_projects(self):
         """
         Gets all the projects that are considered defect projects for this workflow
@@ -307,18 +428,12 @@ class Workflow(db.Entity):
         return False
 
     def status_ob_from_string(self, status_name):
-        try:
-            return filter(lambda x: x.tool_issue_status_name.lower() == status_name.lower(),
-                          self.statuses).pop()
-        except IndexError:
-            return None
+        status_id = self.index.status_ids.get((status_name or "").lower())
+        return ToolIssueStatus.get(id=status_id) if status_id is not None else None
 
     def resolution_ob_from_string(self, res_name):
-        try:
-            return filter(lambda x: x.tool_issue_resolution_name.lower() == res_name.lower(),
-                          self.resolutions).pop()
-        except IndexError:
-            return None
+        resolution_id = self.index.resolution_ids.get((res_name or "").lower())
+        return ToolIssueResolution.get(id=resolution_id) if resolution_id is not None else None
 
     def is_resolved(self, status, resolution):
         """
@@ -329,20 +444,7 @@ class Workflow(db.Entity):
         :type resolution: ToolIssueResolution
         :return: Returns False if status or resolution could not be found in this workflow
         """
-        status_ob = self.status_ob_from_string(status)
-        res_ob = self.resolution_ob_from_string(resolution)
-        if not status_ob:
-            return False
-
-        if status_ob.tool_issue_status_type.lower() == "done":
-            if res_ob:
-                if res_ob.tool_issue_resolution_type.lower() == "positive":
-                    return True
-            else:
-                # if the resolution isn't set then we will assume
-                return True
-
-        return False
+        return self.index.is_resolved(status, resolution)
 
     def is_abandoned(self, status, resolution):
         """
@@ -354,17 +456,7 @@ class Workflow(db.Entity):
         :type resolution: ToolIssueResolution
         :return:
         """
-        status_ob = self.status_ob_from_string(status)
-        res_ob = self.resolution_ob_from_string(resolution)
-        if not status_ob:
-            return False
-
-        if status_ob.tool_issue_status_type.lower() == "done":
-            if res_ob:
-                if res_ob.tool_issue_resolution_type.lower() == "negative":
-                    return True
-
-        return False
+        return self.index.is_abandoned(status, resolution)
 
     def positive_resolutions(self):
         return filter(lambda x: x.tool_issue_resolution_type.lower() == "positive", self.resolutions)
@@ -408,10 +500,7 @@ class Workflow(db.Entity):
         :return: Returns boolean
         :rtype: bool
         """
-        for s in self.statuses:
-            if s.tool_issue_status_name.lower() == status.lower():
-                return s.tool_issue_status_type == "in progress"
-        return False
+        return self.index.is_in_progress(status)
 
     def get_project_keys(self):
         return self.get_projects(key_only=True)
@@ -420,7 +509,7 @@ class Workflow(db.Entity):
         """
         Gets all projects with the given category
         :param category:
-        :return:
+        :return: Returns a read-only tuple of the raw project dicts
         """
         from augur import api
         cache_key = "projects_%s" % category
@@ -433,13 +522,9 @@ class Workflow(db.Entity):
             projects = api.get_jira().get_projects()
 
             filtered_projects = filter(lambda x: 'projectCategory' in x and x['projectCategory']['name'].lower() in category,projects)
-            projects = [p for p in filtered_projects]
-
-            api.memory_cache_data({'data': projects}, cache_key)
-        else:
-              projects = projects['data']
+            projects = api.memory_cache_data({'data': [p for p in filtered_projects]}, cache_key)
 
-        return projects
+        return projects['data']
 
     def get_projects_with_key(self, keys):
         if isinstance(keys, (str, unicode)):
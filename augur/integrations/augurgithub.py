@@ -4,7 +4,6 @@ import json
 import logging
 import re
 
-import dateutil
 import github
 import pytz
 import yaml
@@ -13,6 +12,7 @@ from github.GithubObject import GithubObject
 
 from augur import settings
 from augur.api import get_jira
+from augur.common import parse_datetime
 import augur.api
 
 DEFAULT_LOOKBACK_DAYS = 90
@@ -56,12 +56,11 @@ class AugurGithubDevStats(object):
             created_at = pr['created_at']
 
             if not isinstance(pr['closed_at'], datetime.datetime):
-                closed_at = dateutil.parser.parse(pr['closed_at'])
+                closed_at = parse_datetime(pr['closed_at'])
             closed_at = closed_at.replace(tzinfo=None)
 
             if not isinstance(pr['created_at'], datetime.datetime):
-                created_at = dateutil.parser.parse(
-                    pr['created_at']).replace(tzinfo=pytz.UTC)
+                created_at = parse_datetime(pr['created_at']).replace(tzinfo=pytz.UTC)
             created_at = created_at.replace(tzinfo=None)
 
             if pr['state'] in ['merged', 'closed']:
@@ -177,7 +176,7 @@ class AugurGithub(object):
                     augur.api.memory_cache_data(
                         {'data': repos}, "repos_for_%s" % o)
                 else:
-                    repos = cached_repos[0]['data']
+                    repos = cached_repos['data']
 
                 local_repo_obs += repos
 
@@ -449,10 +448,10 @@ class AugurGithub(object):
         Gets the further review information from the given repo
         :param repo: The repo object or name
         :param org: The org object or name.  Note that the org must be given if the repo is just a string
-        :return: Returns a dictionary containing information about the maintainers and owners
+        :return: Returns a read-only dictionary containing information about the maintainers and owners
         """
         fr = augur.api.get_memory_cached_data('FR_OPR_' + repo.full_name)
-        if fr:
+        if fr is not None:
             return fr
 
         def parse_user(user_str):
@@ -511,9 +510,7 @@ class AugurGithub(object):
             self.logger.error("Error occurred during further review analysis: %s (%s)" % (
                 e.message, str(e.__class__)))
 
-        augur.api.memory_cache_data(result, 'FR_OPR_' + repo.full_name)
-
-        return result
+        return augur.api.memory_cache_data(result, 'FR_OPR_' + repo.full_name)
 
     def get_repo_package_json(self, repo, org=None):
         """
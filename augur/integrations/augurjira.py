@@ -1,12 +1,18 @@
 import logging
+import threading
+import time
 
-from jira import JIRA, Issue
+from jira import JIRA, JIRAError, Issue
 from jira.resources import Resource, GreenHopperResource
 from jira.utils import json_loads
 from munch import munchify
 
 from augur import api
 from augur import settings
+from augur.cache import freeze, thaw
+from augur.concurrency import RateLimiter, run_async
+from augur.integrations.objects.base import IssueIdentityMap
+from augur.integrations.objects.issue import invalidate_field_accessors
 
 
 class AugurJira(object):
@@ -14,7 +20,11 @@ class AugurJira(object):
     A thin wrapper around the Jira module providing some refinement for things like fields, convenience methods
     for ticket actions and awareness for Augur-specific data types.
     """
-    jira = None
+    # the friendly names of the fields that are requested when loading issues
+    DEFAULT_FIELD_NAMES = ("summary", "description", "status", "priority", "parent", "resolution", "epic link",
+                           "dev team", "labels", "issuelinks", "development", "reporter", "assignee", "issuetype",
+                           "project", "creator", "attachment", "worklog", "story points", "changelog",
+                           "resolutiondate", "updated")
 
     def __init__(self, server=None, username=None, password=None):
 
@@ -22,49 +32,54 @@ class AugurJira(object):
         self.server = server or settings.main.integrations.jira.instance
         self.username = username or settings.main.integrations.jira.username
         self.password = password or settings.main.integrations.jira.password
-        self.fields = None
+        self.rate_limiter = RateLimiter(settings.main.integrations.jira.max_requests_per_second)
 
-        self.jira = JIRA(basic_auth=(
-            self.username,
-            self.password),
-            server=self.server,
-            options={"agile_rest_path": "agile"})
+        # all the issue objects created using this instance share the same identity map.  Call
+        # identity_map.clear() to start a new session.
+        self.identity_map = IssueIdentityMap(max_age=settings.main.integrations.jira.identity_map_ttl,
+                                             max_entries=settings.main.integrations.jira.identity_map_max_entries)
+
+        # the client and the field metadata are only loaded when first needed so that creating an instance
+        #   doesn't have to wait on Jira.
+        self._jira = None
+        self._fields = None
+        self._default_fields = None
+        self._lock = threading.RLock()
 
         self._field_map = {}
+        self._board_index = {}
+        self._board_index_expires = 0
+
+    @property
+    def jira(self):
+        """
+        Returns the Jira client.  It's created the first time it's used.
+        :return: Returns a JIRA instance
+        """
+        if self._jira is None:
+            with self._lock:
+                if self._jira is None:
+                    self._jira = JIRA(basic_auth=(
+                        self.username,
+                        self.password),
+                        server=self.server,
+                        options={"agile_rest_path": "agile"})
+        return self._jira
+
+    @jira.setter
+    def jira(self, value):
+        self._jira = value
 
-        self._default_fields = munchify({
-            "summary": None,
-            "description": None,
-            "status": None,
-            "priority": None,
-            "parent": None,
-            "resolution": None,
-            "epic link": None,
-            "dev team": None,
-            "labels": None,
-            "issuelinks": None,
-            "development": None,
-            "reporter": None,
-            "assignee": None,
-            "issuetype": None,
-            "project": None,
-            "creator": None,
-            "attachment": None,
-            "worklog": None,
-            "story points": None,
-            "changelog": None
-        })
-
-        self.fields = api.get_memory_cached_data('custom_fields')
-        if not self.fields:
-            fields = api.memory_cache_data(self.jira.fields(), 'custom_fields')
-            self.fields = {f['name'].lower(): munchify(f) for f in fields}
-
-        default_fields = {}
-        for df, val in self._default_fields.iteritems():
-            default_fields[df] = self.get_field_by_name(df)
-
-        self._default_fields = munchify(default_fields)
+    @property
+    def fields(self):
+        """
+        Returns the metadata for all the fields in Jira keyed on their lowercase name.  It's loaded the first time it's
+        used (see load_fields).
+        :return: dict
+        """
+        if self._fields is None:
+            self.load_fields()
+        return self._fields
 
     @property
     def default_fields(self):
@@ -72,8 +87,38 @@ class AugurJira(object):
         Returns a dict containing the friendly name of fields as keys and jira's proper field names as values.
         :return: dict
         """
+        if self._default_fields is None:
+            self.load_fields()
         return self._default_fields
 
+    def load_fields(self, refresh=False):
+        """
+        Loads the field metadata and resolves the default fields.  The metadata is kept in the persistent cache for
+        JIRA_FIELDS_TTL seconds so that most processes never have to request it from Jira.
+        :param refresh: If True, the metadata is requested from Jira even if it's cached.  Issues that were already
+                        created keep using the default fields that were resolved when they were created.
+        """
+        cache = api.get_persistent_cache()
+        cache_key = "jira_fields_%s" % self.server
+
+        with self._lock:
+            if not refresh and self._fields is not None:
+                # another thread loaded them while this one was waiting for the lock
+                return
+
+            fields = None if refresh else cache.get(cache_key)
+            if fields is None:
+                fields = self.jira.fields()
+                cache.set(cache_key, freeze(fields), ttl=settings.main.integrations.jira.fields_ttl)
+            else:
+                fields = thaw(fields)
+
+            self._fields = {f['name'].lower(): munchify(f) for f in fields}
+            self._default_fields = munchify({name: self.get_field_by_name(name) for name in self.DEFAULT_FIELD_NAMES})
+
+            if refresh:
+                invalidate_field_accessors(self)
+
     def get_field_by_name(self, name):
         """
         Returns the true field name of a jira field based on its friendly name
@@ -168,33 +213,243 @@ class AugurJira(object):
     def get_projects(self):
         return self.jira._get_json('project', {"expand": "category"})
 
+    def get_boards(self):
+        """
+        Gets all the boards in Jira and (re)builds the board index with them.
+        :return: Returns a list of raw board dicts
+        """
+        boards = [b.raw for b in self.jira.boards(maxResults=0)]
+        with self._lock:
+            self._board_index = {b['id']: b for b in boards}
+            self._board_index_expires = time.time() + settings.main.integrations.jira.board_index_ttl
+        return boards
+
     def get_board(self, board_id):
-        import augur
-        found_board = None
-        boards_raw = augur.api.get_memory_cached_data('boards')
-        if not boards_raw:
-            boards = self.jira.boards(maxResults=0)
-            found_board = None
-            boards_raw = []
-            for b in boards:
-                boards_raw.append(b.raw)
-                if b.id == board_id:
-                    found_board = b.raw
-
-            augur.api.memory_cache_data(boards_raw, 'boards')
-
-        if not found_board:
-            for b in boards_raw:
-                if b['id'] == board_id:
-                    return b
-            return None
-        else:
-            return found_board
+        """
+        Gets a board by its ID.  Boards are kept in an index keyed on ID which is dropped every JIRA_BOARD_INDEX_TTL
+        seconds.  Boards that aren't in the index are requested individually (rather than listing every board) and
+        then added to it.  This is safe to call from any thread.
+        :param board_id: The ID of the board
+        :return: Returns the raw board dict or None if there is no such board
+        """
+        board_id = int(board_id)
+        with self._lock:
+            if time.time() >= self._board_index_expires:
+                self._board_index = {}
+                self._board_index_expires = time.time() + settings.main.integrations.jira.board_index_ttl
+
+            board = self._board_index.get(board_id)
+
+        if board is None:
+            # the request is made outside the lock so that other threads can still use the index meanwhile
+            self.rate_limiter.acquire()
+            try:
+                board = self.custom_get_json(path='board/%s' % board_id, base=GreenHopperResource.AGILE_BASE_URL)
+            except JIRAError as e:
+                if e.status_code == 404:
+                    return None
+                raise
+
+            with self._lock:
+                self._board_index[board_id] = board
+
+        return board
+
+    def get_sprints_page(self, board_id, start_at=0, max_results=50, states=None):
+        """
+        Gets a single page of a board's sprints from the Agile API.  Sprints are returned oldest first.
+        :param board_id: The ID of the board
+        :param start_at: The index of the first sprint to return
+        :param max_results: The size of the page
+        :param states: A list of sprint states (closed, active, future) to include.  If None, all are returned.
+        :return: Returns the page dict (values, isLast, startAt, maxResults)
+        """
+        params = {'startAt': start_at, 'maxResults': max_results}
+        if states:
+            # the Agile API wants a single comma delimited state parameter
+            params['state'] = states if isinstance(states, basestring) else ",".join(states)
+
+        self.rate_limiter.acquire()
+        return self.custom_get_json(path='board/%s/sprint' % board_id, params=params,
+                                    base=GreenHopperResource.AGILE_BASE_URL)
+
+    def iter_sprints(self, board_id, states=None, page_size=50):
+        """
+        Iterates over the sprints in a board from the most recent to the oldest.  The Agile API only returns sprints
+        oldest first so the last page is found first and then pages are requested (backwards) only as they are
+        needed.  This means that a caller that stops after the most recent handful of sprints will only make one or
+        two requests no matter how much history the board has.  The index of the last page is remembered in the
+        memory cache so that the next search for it usually takes a single request.
+        :param board_id: The ID of the board
+        :param states: A list of sprint states (closed, active, future) to include.  If None, all are returned.
+        :param page_size: The number of sprints to request at once
+        :return: Yields raw sprint dicts
+        """
+        if isinstance(states, basestring):
+            states = states.split(",")
+
+        pages = {}
+
+        def get_page(index):
+            if index not in pages:
+                pages[index] = self.get_sprints_page(board_id, start_at=index * page_size,
+                                                     max_results=page_size, states=states)
+            return pages[index]
+
+        hint_key = "sprint_last_page_%s_%s_%s" % (board_id, ",".join(states or []), page_size)
+        last_page = self._find_last_page(get_page, api.get_memory_cached_data(hint_key) or 0)
+        if last_page is None:
+            return
+
+        api.memory_cache_data(last_page, hint_key)
+
+        for index in xrange(last_page, -1, -1):
+            for sprint in reversed(get_page(index).get('values') or []):
+                yield sprint
+
+    @staticmethod
+    def _find_last_page(get_page, start):
+        """
+        Finds the index of the last non-empty page starting with a guess.  Moves forward doubling the step until it
+        passes the end and then bisects.
+        :param get_page: A function that returns the page at an index
+        :param start: The index to try first
+        :return: Returns the index of the last page or None if there are no pages at all
+        """
+        lowest_full = None
+        highest_empty = None
+
+        index = start
+        step = 1
+        while highest_empty is None:
+            page = get_page(index)
+            if not page.get('values'):
+                highest_empty = index
+            elif page.get('isLast', True):
+                return index
+            else:
+                lowest_full = index
+                index += step
+                step *= 2
+
+        if lowest_full is None:
+            # the guess was past the end so start from the beginning
+            if highest_empty == 0:
+                return None
+            lowest_full = -1
+
+        while highest_empty - lowest_full > 1:
+            index = (lowest_full + highest_empty) // 2
+            page = get_page(index)
+            if not page.get('values'):
+                highest_empty = index
+            elif page.get('isLast', True):
+                return index
+            else:
+                lowest_full = index
+
+        return lowest_full if lowest_full >= 0 else None
+
+    def get_backlog_issues(self, board_id, fields=None, expand=None, page_size=100):
+        """
+        Gets all the issues in a board's backlog from the Agile API.
+        :param board_id: The ID of the board
+        :param fields: A list of jira field names to include.  If None, all navigable fields are returned.
+        :param expand: What to expand in each issue (for example, "changelog") or None
+        :param page_size: The number of issues to request at once
+        :return: Returns a dict with the raw issues under 'issues'
+        """
+        params = {'maxResults': page_size}
+        if fields:
+            params['fields'] = ",".join(fields)
+        if expand:
+            params['expand'] = expand
+
+        issues = []
+        while True:
+            params['startAt'] = len(issues)
+            self.rate_limiter.acquire()
+            page = self.custom_get_json(path='board/%s/backlog' % board_id, params=params,
+                                        base=GreenHopperResource.AGILE_BASE_URL)
+            issues.extend(page['issues'])
+            if not page['issues'] or len(issues) >= page['total']:
+                break
+
+        return {'issues': issues}
 
     def get_sprint_report(self, board_id, sprint_id):
-        return self.custom_get_json(path='rapid/charts/sprintreport?rapidViewId=%s&sprintId=%s' % (board_id, sprint_id),
-                                    base=GreenHopperResource.AGILE_BASE_URL,
-                                    replacement_options={'agile_rest_path': GreenHopperResource.GREENHOPPER_REST_PATH})
+        """
+        Gets the sprint report for a sprint.  Reports are stored in the persistent cache keyed on the board and sprint.
+        Closed sprints don't change so their reports are kept for good while the reports for other sprints expire
+        after JIRA_ACTIVE_SPRINT_REPORT_TTL seconds.
+        :param board_id: The ID of the board the sprint belongs to
+        :param sprint_id: The ID of the sprint
+        :return: Returns the sprint report as a read-only snapshot (see augur.cache.freeze) that is shared with the
+                    cache.  Use augur.cache.thaw to get a copy that can be changed.
+        """
+        cache = api.get_persistent_cache()
+        cache_key = "sprint_report_%s_%s" % (board_id, sprint_id)
+
+        sprint_report = cache.get(cache_key)
+        if sprint_report is not None:
+            return sprint_report
+
+        sprint_report = self.custom_get_json(
+            path='rapid/charts/sprintreport?rapidViewId=%s&sprintId=%s' % (board_id, sprint_id),
+            base=GreenHopperResource.AGILE_BASE_URL,
+            replacement_options={'agile_rest_path': GreenHopperResource.GREENHOPPER_REST_PATH})
+
+        if sprint_report:
+            state = (sprint_report.get('sprint') or {}).get('state') or ""
+            ttl = 0 if state.lower() == "closed" else settings.main.integrations.jira.active_sprint_report_ttl
+            sprint_report = freeze(sprint_report)
+            cache.set(cache_key, sprint_report, ttl=ttl)
+
+        return sprint_report
+
+    # The *_async variants start a request in the background on the threads shared with JiraObject.load_async (see
+    #   augur.concurrency.run_async) and return an AsyncResult whose get() waits for the request and returns what
+    #   the blocking call would have returned.  This lets a single caller keep many requests in flight.
+
+    def search_issues_async(self, jql, **kwargs):
+        """
+        Runs a search in the background.  It counts against the rate limit when it starts.
+        :param jql: The JQL to run
+        :param kwargs: Passed on to the jira client's search_issues
+        :return: Returns an AsyncResult
+        """
+        def search():
+            self.rate_limiter.acquire()
+            return self.jira.search_issues(jql, **kwargs)
+
+        return run_async(search)
+
+    def get_issue_async(self, key, **kwargs):
+        """
+        Gets an issue in the background.  It counts against the rate limit when it starts.
+        :param key: The issue key
+        :param kwargs: Passed on to the jira client's issue
+        :return: Returns an AsyncResult
+        """
+        def get_issue():
+            self.rate_limiter.acquire()
+            return self.jira.issue(key, **kwargs)
+
+        return run_async(get_issue)
+
+    def get_board_async(self, board_id):
+        """
+        Gets a board in the background (see get_board)
+        :return: Returns an AsyncResult
+        """
+        return run_async(self.get_board, board_id)
+
+    def get_sprint_report_async(self, board_id, sprint_id):
+        """
+        Gets a sprint report in the background (see get_sprint_report)
+        :return: Returns an AsyncResult
+        """
+        return run_async(self.get_sprint_report, board_id, sprint_id)
 
     def custom_get_url(self, path, base, replacement_options=None):
         options = self.jira._options.copy()
@@ -1,8 +1,13 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
 
-from dateutil.parser import parse
 from munch import munchify
 
+from augur.common import parse_datetime
+from augur.concurrency import CompletedResult, run_async
+
 
 class InvalidId(Exception):
     pass
@@ -12,6 +17,143 @@ class InvalidData(Exception):
     pass
 
 
+class IssueIdentityMap(object):
+    """
+    Holds a single JiraIssue object per issue key so that every code path asking for the same issue within a
+    session gets back the same, already loaded, object instead of loading it from Jira again.  When an issue is
+    loaded again (by a search for example) the object in the map is refreshed with the new data so holders of the
+    object see the change (data that was updated in Jira before the data in the map is ignored).  Hits and misses
+    are counted so that the effectiveness of the map can be monitored.
+
+    Options:
+        - max_age (Optional) - The number of seconds an issue stays in the map before it is considered stale and
+                        has to be loaded again.  None or 0 means issues stay until the map is cleared.
+        - max_entries (Optional) - The maximum number of issues to hold.  When there are more, the least recently
+                        used issues are dropped.  None or 0 means there is no limit.
+    """
+
+    def __init__(self, max_age=None, max_entries=None):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._issues = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self._issues)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._find(key) is not None
+
+    def get(self, key, issue_class=None):
+        """
+        Gets the issue with the given key
+        :param key: The issue key
+        :param issue_class: If given and the issue in the map is not an instance of this class then it is
+                        converted to one (using the data already loaded) and the converted object replaces it.
+        :return: Returns the JiraIssue object or None if it's not in the map.
+        """
+        with self._lock:
+            issue = self._find(key)
+            if issue is None:
+                self._stats['misses'] += 1
+                return None
+
+            if issue_class is not None and not isinstance(issue, issue_class):
+                converted = issue_class(issue.source, **issue._options)
+                converted._copy_data_from(issue)
+                self._issues[key.upper()] = (converted, self._issues[key.upper()][1])
+                issue = converted
+
+            self._stats['hits'] += 1
+            return issue
+
+    def add(self, issue, replace=False, refresh=True):
+        """
+        Adds a loaded issue to the map.
+        :param issue: The JiraIssue object.  Issues without a key are ignored.
+        :param replace: If True the given issue replaces one that is already in the map.  Otherwise the issue
+                        already in the map is kept (as long as it's an instance of the given issue's class) and its
+                        data is refreshed with the given issue's data.
+        :param refresh: If False, an issue already in the map keeps its data.  Even when True, the data is only
+                        refreshed if the given issue was not updated in Jira before the issue in the map was (so
+                        data from a cache or the warehouse can't roll back data loaded from Jira).
+        :return: Returns the issue object held by the map for the issue's key
+        """
+        key = issue.key.upper() if issue.key else None
+        if not key:
+            return issue
+
+        with self._lock:
+            existing = self._find(key)
+            if existing is not None and existing is not issue and not replace:
+                keep_existing = not refresh or self._is_older(issue, existing)
+                if isinstance(existing, type(issue)):
+                    if not keep_existing:
+                        existing._copy_data_from(issue)
+                    issue = existing
+                elif keep_existing:
+                    issue._copy_data_from(existing)
+
+            self._issues.pop(key, None)
+            self._issues[key] = (issue, time.time())
+
+            while self.max_entries and len(self._issues) > self.max_entries:
+                self._issues.popitem(last=False)
+                self._stats['evictions'] += 1
+
+            return issue
+
+    def remove(self, key):
+        with self._lock:
+            return self._issues.pop(key.upper(), None) is not None
+
+    def clear(self):
+        """
+        Forgets all issues (and resets the counters) which starts a new session.
+        """
+        with self._lock:
+            self._issues = OrderedDict()
+            self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats['entries'] = len(self._issues)
+            stats['hit_rate'] = float(stats['hits']) / lookups if lookups else 0.0
+            return stats
+
+    @staticmethod
+    def _is_older(issue, other):
+        """
+        Returns True if issue was last updated in Jira before other was.  Issues without a valid updated field
+        are never considered older.
+        """
+        try:
+            return parse_datetime(issue.get_field('updated')) < parse_datetime(other.get_field('updated'))
+        except (TypeError, ValueError):
+            return False
+
+    def _find(self, key):
+        """
+        Gets the issue for a key (marking it as the most recently used) or None if it's not there or is stale
+        """
+        key = key.upper() if key else None
+        entry = self._issues.pop(key, None) if key else None
+        if entry is None:
+            return None
+
+        issue, added_at = entry
+        if self.max_age and time.time() - added_at > self.max_age:
+            return None
+
+        self._issues[key] = entry
+        return issue
+
+
 class JiraObject(object):
     """
     The base for all Jira objects.
@@ -36,15 +178,52 @@ class JiraObject(object):
         self._options.update(kwargs)
         return self._load()
 
+    def load_async(self, **kwargs):
+        """
+        Starts loading the object in the background and returns right away.  The part of the load that needs the
+        database (see _prepare_load) runs on the calling thread first since pony sessions are bound to a thread.
+        :param kwargs: Options to set before loading (see load)
+        :return: Returns an AsyncResult whose get() waits for the load and returns what load would have returned.  If
+                    the load stops before anything is requested from Jira, the result is already available.
+        """
+        self._options.update(kwargs)
+        prepared = self._prepare_load()
+        if prepared is not True:
+            return CompletedResult(prepared)
+
+        return run_async(self._finish_load)
+
+    @property
+    def identity_map(self):
+        """
+        The IssueIdentityMap shared by everything using the same source or None if the source doesn't have one.
+        """
+        return getattr(self.source, 'identity_map', None)
+
     def _load(self):
         raise NotImplemented()
 
+    def _prepare_load(self):
+        """
+        Does the part of the load that has to happen on the calling thread (like reading from the database).  Objects
+        that override this call it at the start of _load too.
+        :return: Returns True to go on with the load (see _finish_load) or what load should return otherwise
+        """
+        return True
+
+    def _finish_load(self):
+        """
+        Does the rest of the load (the Jira requests).  This is what load_async runs in the background.
+        :return: Returns what load returns
+        """
+        return self._load()
+
     def prepopulate(self,data):
         raise NotImplemented()
 
     def _convert_date_string_to_date_time(self, date_str):
         try:
-            dt = parse(date_str)
+            dt = parse_datetime(date_str)
             return dt
         except ValueError,e:
             self.logger.warning("JiraObject: Unable to parse string %s"%date_str)
@@ -1,32 +1,13 @@
+from collections import OrderedDict
+
 from munch import munchify
 
-from augur import db, common
+from augur import db, common, settings
+from augur.concurrency import map_concurrently
 from pony import orm
 
 from augur.integrations.objects.base import JiraObject, InvalidData
-from augur.integrations.objects.issue import JiraIssueCollection
-
-
-class SprintStates(object):
-    """
-    This is a hack to work around a bug in the Jira library where it converts a string of states to a list and then
-    translates that to multiple query paramaters with the same name (state=closed&state=active).  But the new Agile
-    API only accepts one state parameter with a comma delimited list of states.  By passing in a class that casts
-    to a string we can avoid the check for a string type.
-    """
-    _states = ""
-
-    def __init__(self,states):
-
-        if isinstance(states, (str,unicode)):
-            self._states = states
-        elif isinstance(states,(list,tuple)):
-            self.states = ",".join(states)
-        else:
-            raise ValueError("Invalid sprint state format")
-
-    def __str__(self):
-        return self._states
+from augur.integrations.objects.issue import JiraIssueCollection, JiraEpic, get_profile_fields
 
 
 class JiraSprint(JiraObject):
@@ -125,20 +106,16 @@ class JiraSprint(JiraObject):
             if not self._sprint_report:
                 self._load_sprint_report()
 
-            all_issues = self.all_issues
-            epic_cache = {}
+            epic_keys = set([issue.get_epic(only_key=True) for issue in self.all_issues])
+            epic_keys.discard(None)
 
-            for issue in all_issues:
-                epic_key = issue.get_epic(only_key=True)
-                if epic_key not in epic_cache:
-                    epic = issue.get_epic(only_key=False)
-                    if epic:
-                        epic_cache[epic.key] = epic
-
-            self._epics = JiraIssueCollection(source=self.source)
-            if not self._epics.prepopulate(epic_cache.values()):
+            # load all the epics at once (any that are already in the identity map are reused)
+            epics = JiraIssueCollection(source=self.source, issue_keys=list(epic_keys), issue_class=JiraEpic)
+            if not epics.load():
                 return None
 
+            self._epics = epics
+
         return self._epics
 
     @property
@@ -280,11 +257,22 @@ class JiraSprint(JiraObject):
         return True
 
     def _load_sprint_report(self):
+        return self._set_sprint_report(self._fetch_sprint_report())
+
+    def _fetch_sprint_report(self):
+        """
+        Requests the sprint report from Jira without storing it.  This is safe to call from any thread.
+        :return: Returns the sprint report dict
+        """
         sprint_id = self.option("sprint_id")
         board_id = self.option("board_id")
 
         self.log_access('sprint-full', board_id, sprint_id)
-        sprint_report = munchify(self.source.get_sprint_report(board_id, sprint_id))
+        self.source.rate_limiter.acquire()
+        return self.source.get_sprint_report(board_id, sprint_id)
+
+    def _set_sprint_report(self, sprint_report):
+        sprint_report = munchify(sprint_report)
 
         if sprint_report:
 
@@ -367,11 +355,14 @@ class JiraSprintCollection(JiraObject):
         - team_name - If given, this will restrict the sprints to those which have the given team name in the title.
         - states (optional, default="['closed','active']) - Which sprints to include based on state.  By default we
                             exclude future sprints.
+        - max_parallelism (Optional, Default=JIRA_MAX_PARALLELISM) - The maximum number of sprint reports to request
+                            at once when include_reports is set.
     """
 
     def __init__(self, source, **kwargs):
         super(JiraSprintCollection, self).__init__(source, **kwargs)
         self._sprints = None
+        self._failures = {}
         if not self.option('states'):
             self._options.states = ['closed', 'active']
 
@@ -381,6 +372,27 @@ class JiraSprintCollection(JiraObject):
     def __str__(self):
         return "Sprint Collection:\n\t%s" % format("\n\t".join([str(s) for s in self._sprints]))
 
+    @property
+    def failures(self):
+        """
+        Returns the errors that happened while loading the sprint reports.  Sprints whose report could not be
+        loaded are still part of the collection but without the report.
+        :return: A dict of error messages keyed on sprint ID
+        """
+        return self._failures
+
+    def set_report_failures(self, failures):
+        """
+        Sets the failures (see the failures property) from the result of load_sprint_reports.  Failures for sprints
+        that aren't part of this collection are ignored.
+        :param failures: A dict of error messages keyed on (board ID, sprint ID) tuples
+        """
+        self._failures = {}
+        for sprint in self._sprints or []:
+            key = (sprint.option('board_id'), sprint.option('sprint_id'))
+            if key in failures:
+                self._failures[sprint.option('sprint_id')] = failures[key]
+
     @property
     def board_id(self):
         board = self.option('board')
@@ -405,29 +417,21 @@ class JiraSprintCollection(JiraObject):
                 else:
                     board_id = board
 
-                # we do it this way because this returns a paginated object that automatically
-                #   makes additional calls when there are more than fit on a single page.
+                # sprints come back newest first and pages are only requested as they're needed so
+                #   stopping at max_sprints avoids loading the board's whole history.
                 self.log_access('sprints', board_id)
-
-                states = SprintStates(self.option('states'))
-                sprints = self.source.jira.sprints(board_id, maxResults=0, state=states)
+                sprints = self.source.iter_sprints(board_id, states=self.option('states'))
 
             elif self.option('sprints'):
-                sprints = self.option('sprints')
+                sprints = reversed(self.option('sprints'))
             else:
                 # should never get here because initial check should validate
                 #   required input.
                 self.logger.error("You must provide a non empty set of sprints or a board to load a sprint collection")
                 return False
 
-            sprints.reverse()
             self._sprints = []
             for s in sprints:
-                if self.option('max_sprints') and len(self._sprints) > int(self.option('max_sprints')):
-                    # there's no need to look at any more sprints if we've
-                    #   hit the maximum requested.
-                    break
-
                 if isinstance(s, object) and hasattr(s,'raw'):
                     jira_sprint_json = s.raw
                 elif isinstance(s, dict):
@@ -436,9 +440,9 @@ class JiraSprintCollection(JiraObject):
                     self.logger.error("Unrecognized sprint object found. Skipping...")
                     continue
 
+                # reports are loaded for all the sprints at once below
                 sprint_ob = JiraSprint(source=self.source, sprint_id=jira_sprint_json['id'],
-                                       board_id=self.board_id,
-                                       include_reports=self.option('include_reports'))
+                                       board_id=self.board_id)
 
                 continue_adding = True
 
@@ -454,10 +458,112 @@ class JiraSprintCollection(JiraObject):
                     sprint_ob.prepopulate(jira_sprint_json)
                     self._sprints.append(sprint_ob)
 
-            # order them from most recent to oldest by default.
+                    if self.option('max_sprints') and len(self._sprints) >= int(self.option('max_sprints')):
+                        # stop as soon as we have the maximum requested so that no more sprints (or
+                        #   pages of sprints) are requested.
+                        break
+
+            if self.option('include_reports'):
+                self._load_sprint_reports()
 
         return self._sprints
 
+    def _load_sprint_reports(self):
+        """
+        Requests the reports for all the sprints in the collection concurrently and then attaches each to its sprint.
+        A sprint whose report fails to load is kept (without its report) and the error is added to failures.
+        """
+        self._failures = {}
+        if not self.board_id:
+            self.logger.error("You cannot load reports within a JiraSprint object without a board ID given")
+            return
+
+        self.set_report_failures(load_sprint_reports(
+            self._sprints,
+            max_parallelism=self.option('max_parallelism', settings.main.integrations.jira.max_parallelism)))
+
+
+def load_sprint_reports(sprints, max_parallelism=None):
+    """
+    Requests the reports for the given sprints concurrently and attaches each to its sprint.  Each report is only
+    requested once even when several of the sprints are the same sprint on the same board.  A sprint whose report
+    fails to load is left without its report.
+    :param sprints: A list of JiraSprint objects (with board IDs)
+    :param max_parallelism: The maximum number of reports to request at once (Default=JIRA_MAX_PARALLELISM)
+    :return: Returns a dict of error messages keyed on (board ID, sprint ID) tuples for the sprints whose reports
+                could not be loaded
+    """
+    sprints_by_report = {}
+    for sprint in sprints:
+        sprints_by_report.setdefault((sprint.option('board_id'), sprint.option('sprint_id')), []).append(sprint)
+
+    report_keys = sprints_by_report.keys()
+    reports = map_concurrently(lambda key: sprints_by_report[key][0]._fetch_sprint_report(),
+                               report_keys,
+                               max_workers=max_parallelism or settings.main.integrations.jira.max_parallelism,
+                               return_exceptions=True)
+
+    failures = {}
+    for (board_id, sprint_id), report in zip(report_keys, reports):
+        for sprint in sprints_by_report[(board_id, sprint_id)]:
+            if isinstance(report, Exception):
+                failures[(board_id, sprint_id)] = str(report)
+                sprint.logger.error("Unable to load the report for sprint %s on board %s: %s" %
+                                    (sprint_id, board_id, report))
+            elif not sprint._set_sprint_report(report):
+                failures[(board_id, sprint_id)] = "No sprint report was returned"
+
+    return failures
+
+
+def load_boards(source, board_ids, max_sprints=None, max_parallelism=None):
+    """
+    Loads several boards along with their sprints (including the sprint reports) and backlogs.  Everything that
+    needs the database is done up front on the calling thread.  Then the sprint lists and backlogs for all the boards
+    are requested concurrently, followed by the reports for all the sprints (see load_sprint_reports).  Shared data
+    (field metadata and the board index) is loaded once before any of that starts.
+    :param source: The AugurJira object to use
+    :param board_ids: A list of board IDs (duplicates are ignored)
+    :param max_sprints: The maximum number of sprints to load per board (Default=all of them)
+    :param max_parallelism: The maximum number of requests to have in flight at once (Default=JIRA_MAX_PARALLELISM)
+    :return: Returns a dict of JiraBoard objects (or None for boards that could not be loaded) keyed on board ID
+    """
+    max_parallelism = max_parallelism or settings.main.integrations.jira.max_parallelism
+    board_ids = list(OrderedDict.fromkeys(int(b) for b in board_ids))
+
+    _ = source.default_fields
+    if len(board_ids) > 1:
+        # one listing is cheaper than requesting each board
+        source.get_boards()
+
+    boards = OrderedDict()
+    tasks = []
+    for board_id in board_ids:
+        board = JiraBoard(source, board_id=board_id, include_sprint_reports=True, max_sprints=max_sprints)
+        if not board.load():
+            boards[board_id] = None
+            continue
+
+        # the reports are requested for all the boards at once below
+        sprints = board._create_sprint_collection(include_reports=False, max_parallelism=max_parallelism)
+        board.set_sprints(sprints)
+        boards[board_id] = board
+        tasks.append((board_id, sprints.load))
+        tasks.append((board_id, board.get_backlog))
+
+    results = map_concurrently(lambda task: task[1](), tasks, max_workers=max_parallelism, return_exceptions=True)
+    for (board_id, task), result in zip(tasks, results):
+        if isinstance(result, Exception) and boards[board_id] is not None:
+            boards[board_id].logger.error("Unable to load board %s: %s" % (board_id, result))
+            boards[board_id] = None
+
+    loaded = [b for b in boards.values() if b is not None]
+    failures = load_sprint_reports([s for b in loaded for s in b.get_sprints()], max_parallelism=max_parallelism)
+    for board in loaded:
+        board.get_sprints().set_report_failures(failures)
+
+    return boards
+
 
 class JiraBoard(JiraObject):
     """
@@ -501,11 +607,15 @@ class JiraBoard(JiraObject):
             return None
 
         if not self._backlog_issues:
-            self.log_access('sprint-backlog', self._db_board.jira_id)
-            result = self.source.jira.get_backlog_issues(self._db_board.jira_id, json_result=True)
+            # the jira board's ID is used (rather than the database board's) so this can be called from any thread.
+            self.log_access('sprint-backlog', self.id)
+            # the backlog is only used for points so there's no need for the rest of the fields or the changelog
+            fields, expand = get_profile_fields(self.source, 'points')
+            result = self.source.get_backlog_issues(self.id, fields=fields, expand=expand)
             if result:
                 try:
-                    self._backlog_issues = JiraIssueCollection(self.source, input_jira_issue_list=result['issues'])
+                    self._backlog_issues = JiraIssueCollection(self.source, input_jira_issue_list=result['issues'],
+                                                               field_profile='points')
                     self._backlog_issues.load()
                 except InvalidData, e:
                     self.logger.warn("Unable to retrieve backlog.  %s" % e.message)
@@ -536,21 +646,38 @@ class JiraBoard(JiraObject):
         :return: Returns a JiraSprintCollection
         """
         if not self._sprints:
-
-            if self.option('restrict_sprints_with_team_name'):
-                team_name = self._team.name if self._team else ""
-            else:
-                team_name = None
-
-            self._sprints = JiraSprintCollection(self.source, board=self,
-                                                 include_reports=self.option('include_sprint_reports'),
-                                                 max_sprints=self.option('max_sprints'),
-                                                 team_name=team_name,
-                                                 include_future=False)
+            self._sprints = self._create_sprint_collection()
             self._sprints.load()
 
         return self._sprints
 
+    def set_sprints(self, sprints):
+        """
+        Sets the board's sprints to a collection that is (or will be) loaded elsewhere.  For example, load_boards
+        loads the sprints for several boards at once.  get_sprints returns it rather than loading the sprints.
+        :param sprints: A JiraSprintCollection for this board
+        """
+        self._sprints = sprints
+
+    def _create_sprint_collection(self, **kwargs):
+        """
+        Creates the (unloaded) collection of this board's sprints based on the board's options
+        :param kwargs: Options that override the collection's options
+        :return: Returns a JiraSprintCollection
+        """
+        if self.option('restrict_sprints_with_team_name'):
+            team_name = self._team.name if self._team else ""
+        else:
+            team_name = None
+
+        options = dict(board=self,
+                       include_reports=self.option('include_sprint_reports'),
+                       max_sprints=self.option('max_sprints'),
+                       team_name=team_name,
+                       include_future=False)
+        options.update(kwargs)
+        return JiraSprintCollection(self.source, **options)
+
     def get_most_recent_active_sprint(self):
         sprints = self.get_sprints()
         for s in sprints:
@@ -577,14 +704,18 @@ class JiraBoard(JiraObject):
         return None
 
     def _load(self):
+        prepared = self._prepare_load()
+        return self._finish_load() if prepared is True else prepared
+
+    def _prepare_load(self):
         if not self.option('board_id') and not self.option('team_id'):
             self.logger.error("Board ID or Team ID must be given")
             return None
 
-        if self._load_db_data():
-            return self._load_jira_data()
+        return self._load_db_data()
 
-        return False
+    def _finish_load(self):
+        return self._load_jira_data()
 
     def _load_db_data(self):
         team_id = self.option('team_id')
@@ -1,4 +1,9 @@
+import hashlib
+import math
+import re
+import time
 from copy import copy
+from weakref import WeakKeyDictionary
 
 import arrow
 import datetime
@@ -6,22 +11,198 @@ from arrow import Arrow
 from jira import Issue
 from munch import munchify
 
-from augur.context import AugurContext
-from augur.common import POSSIBLE_DATE_TIME_FORMATS
+from augur import settings
+from augur.cache import FrozenDict, freeze
+from augur.concurrency import chunk_list, map_concurrently
+from augur.context import get_context
+from augur.common import POSSIBLE_DATE_TIME_FORMATS, StatusTransitionIndex, get_status_changes
 from augur.integrations.objects.base import JiraObject, InvalidId
 
 
+class FieldAccessor(object):
+    """
+    A precompiled path to a value within an issue.  The path is split once when the accessor is created
+    rather than each time a value is retrieved.  See JiraIssue.get_field for how paths are resolved.
+    """
+    __slots__ = ('path', 'parts')
+
+    def __init__(self, path):
+        self.path = path
+        self.parts = tuple(path.split("."))
+
+    def get(self, issue):
+        """
+        Gets the value from the given issue
+        :param issue: The issue as a dict (in the form returned by the REST API)
+        :return: Returns the value or None if it's not found.
+        """
+        if not issue or not issue.get('fields'):
+            return None
+
+        if self.path in issue:
+            return issue[self.path]
+
+        current = issue['fields']
+        for p in self.parts:
+            if p in current:
+                if not isinstance(current[p], dict):
+                    return current[p]
+                current = current[p]
+
+        return None
+
+
+# compiled accessors keyed on the path
+_field_accessors = {}
+
+# compiled accessors for paths that start with a friendly field name, stored per source since each source has
+# its own mapping of friendly names to jira field names.
+_translated_field_accessors = WeakKeyDictionary()
+
+
+def invalidate_field_accessors(source=None):
+    """
+    Drops the cached accessors for friendly field names.  This should be called whenever a source's mapping of
+    friendly names to jira field names changes.
+    :param source: The source whose accessors should be dropped or None to drop them for all sources
+    """
+    if source is None:
+        _translated_field_accessors.clear()
+    else:
+        _translated_field_accessors.pop(source, None)
+
+
+# the fields (by friendly name, see AugurJira.default_fields) requested for each field profile along with whether
+#   the changelog is expanded.  A field list of None requests all the default fields.
+FIELD_PROFILES = {
+    'minimal': (('summary', 'status', 'issuetype', 'resolution', 'parent', 'project'), False),
+    'points': (('summary', 'status', 'issuetype', 'resolution', 'parent', 'project', 'assignee', 'story points',
+                'dev team', 'epic link'), False),
+    'timing': (('summary', 'status', 'issuetype', 'resolution', 'parent', 'project', 'assignee', 'story points',
+                'dev team', 'epic link'), True),
+    'full': (None, True),
+}
+
+# the top level keys of the issue data kept by compact issues.  The changelog (and anything else that was expanded)
+#   is dropped once the CompactIssueRecord has been built from it.
+COMPACT_ISSUE_KEYS = ('id', 'key', 'self', 'fields')
+
+# matches the ORDER BY clause at the end of a JQL query
+ORDER_BY_REGEX = re.compile(r"(^|\s+)order\s+by\s+.*$", re.IGNORECASE | re.DOTALL)
+
+
+def add_jql_clause(jql, clause):
+    """
+    ANDs a clause onto a JQL query keeping the query's ORDER BY (if any) at the end
+    :param jql: The JQL query
+    :param clause: The clause to add (for example, 'updated >= "-5m"')
+    :return: Returns the new query
+    """
+    match = ORDER_BY_REGEX.search(jql)
+    order_by = match.group(0) if match else ""
+    query = jql[:match.start()] if match else jql
+    if not query.strip():
+        return ("%s %s" % (clause, order_by.strip())).strip()
+
+    return "(%s) AND %s%s" % (query, clause, order_by)
+
+
+def get_profile_fields(source, profile):
+    """
+    Gets what to request from Jira for a field profile
+    :param source: The AugurJira source (used to translate friendly field names)
+    :param profile: The name of the profile (see FIELD_PROFILES)
+    :return: Returns a tuple containing the list of jira field names and the expand parameter (or None)
+    """
+    if profile not in FIELD_PROFILES:
+        raise ValueError("Invalid field profile: %s" % profile)
+
+    names, expand_changelog = FIELD_PROFILES[profile]
+    if names is None:
+        fields = source.default_fields.values()
+    else:
+        fields = [source.default_fields.get(n) or n for n in names]
+
+    return fields, "changelog" if expand_changelog else None
+
+
+def get_field_accessor(field):
+    """
+    Gets the compiled accessor for a field path
+    :param field: The dot separated path (for example, status.name)
+    :return: Returns a FieldAccessor
+    """
+    accessor = _field_accessors.get(field)
+    if accessor is None:
+        accessor = _field_accessors[field] = FieldAccessor(field)
+    return accessor
+
+
+class ExtractedIssueFields(object):
+    """
+    The commonly used fields of an issue copied out of the issue data once so that reading them doesn't
+    require walking the issue dict each time.
+    """
+    __slots__ = ('key', 'summary', 'status', 'priority', 'issuetype', 'description', 'reporter', 'assignee',
+                 'points', 'resolution', 'team_name', 'is_subtask', 'parent_key', 'epic_key')
+
+    def __init__(self, issue):
+        """
+        :param issue: The JiraIssue to read the fields from
+        """
+        self.key = issue.get_field('key') or ""
+        self.summary = issue.get_field('summary') or ""
+        self.status = issue.get_field('status.name') or ""
+        self.priority = issue.get_field('priority.name') or ""
+        self.issuetype = issue.get_field('issuetype.name') or ""
+        self.description = issue.get_field('description') or ""
+        self.reporter = issue.get_field('reporter.name') or ""
+        self.assignee = issue.get_field('assignee.name') or ""
+        self.points = issue.get_field("story points", translate=True) or 0.0
+        self.resolution = issue.get_field('resolution.name') or ""
+        self.team_name = issue.get_field('dev team.value', translate=True) or ""
+        self.is_subtask = issue.get_field('issuetype.subtask') is not None
+        self.parent_key = issue.get_field('parent.key')
+        self.epic_key = issue.get_field('fields.%s' % issue.default_fields['epic link'])
+
+
+class CompactIssueRecord(ExtractedIssueFields):
+    """
+    The fields Augur uses from an issue along with the status changes from its changelog.  This is what a compact
+    JiraIssue holds in place of the munchified issue.
+    """
+    __slots__ = ('changelog',)
+
+    def __init__(self, issue):
+        """
+        :param issue: The JiraIssue to read the fields from
+        """
+        super(CompactIssueRecord, self).__init__(issue)
+        self.changelog = get_status_changes(issue.raw)
+
+
 class JiraIssue(JiraObject):
     """
     Represents a collection of issues
 
     Options:
         - key (Optional) - The key of the issue to load
+        - extract_fields (Optional, Default=False) - If True then the commonly used fields (status, points,
+                    assignee, etc) are copied out of the issue data when it's loaded which makes reading them
+                    through the properties much cheaper.  Useful when the same issues are read many times.
+        - compact (Optional, Default=False) - If True then the issue data is kept as returned from Jira rather than
+                    being munchified.  Only the commonly used fields and the status changes are pulled out (into a
+                    CompactIssueRecord) and the changelog is dropped from the issue data (see COMPACT_ISSUE_KEYS).
+                    The munchified issue is created the first time the issue property is used.  This implies
+                    extract_fields.
     """
 
     def __init__(self, source, **kwargs):
         super(JiraIssue, self).__init__(source, **kwargs)
         self._issue = None
+        self._raw = None
+        self._fields = None
+        self._status_index = None
         self._epic = None
         self._parent = None
         self.default_fields = self.source.default_fields
@@ -34,10 +215,12 @@ class JiraIssue(JiraObject):
         self.log_access('issue',self.option('key'))
         issue = self.source.jira.issue(self.option('key'))
         if issue:
-            self._issue = munchify(issue.raw)
+            self._set_data(issue.raw)
+            if self.identity_map is not None:
+                self.identity_map.add(self, replace=True)
             return True
         else:
-            self._issue = None
+            self._set_data(None)
             self.logger.error("JiraIssue: Unable to load issue from Jira")
             return False
 
@@ -62,50 +245,74 @@ class JiraIssue(JiraObject):
 
     @property
     def is_subtask(self):
+        if self._fields is not None:
+            return self._fields.is_subtask
         return self.get_field('issuetype.subtask') is not None
 
     @property
     def summary(self):
+        if self._fields is not None:
+            return self._fields.summary
         return self.get_field('summary') or ""
 
     @property
     def status(self):
+        if self._fields is not None:
+            return self._fields.status
         return self.get_field('status.name') or ""
 
     @property
     def priority(self):
+        if self._fields is not None:
+            return self._fields.priority
         return self.get_field('priority.name') or ""
 
     @property
     def issuetype(self):
+        if self._fields is not None:
+            return self._fields.issuetype
         return self.get_field('issuetype.name') or ""
 
     @property
     def description(self):
+        if self._fields is not None:
+            return self._fields.description
         return self.get_field('description') or ""
 
     @property
     def reporter(self):
+        if self._fields is not None:
+            return self._fields.reporter
         return self.get_field('reporter.name') or ""
 
     @property
     def assignee(self):
+        if self._fields is not None:
+            return self._fields.assignee
         return self.get_field('assignee.name') or ""
 
     @property
     def points(self):
+        if self._fields is not None:
+            return self._fields.points
         return self.get_field("story points", translate=True) or 0.0
 
     @property
     def resolution(self):
+        if self._fields is not None:
+            return self._fields.resolution
         return self.get_field('resolution.name') or ""
 
     @property
     def key(self):
+        if self._fields is not None:
+            return self._fields.key
         return self.get_field('key') or ""
 
     @property
     def team_name(self):
+        if self._fields is not None:
+            return self._fields.team_name
         return self.get_field('dev team.value', translate=True) or ""
 
     @property
@@ -115,8 +322,38 @@ class JiraIssue(JiraObject):
         notation or dict notation.  This is the raw issue as returned from Jira otherwise.
         :return: The issue object as a Munch instance
         """
+        if self._issue is None and self._raw is not None:
+            self._issue = munchify(self._raw)
         return self._issue
 
+    @property
+    def raw(self):
+        """
+        Returns the issue as a dictionary without munchifying it (if it hasn't been already).
+        :return: The issue dict
+        """
+        return self._raw if self._raw is not None else self._issue
+
+    @property
+    def status_changes(self):
+        """
+        Returns the status changes found in the issue's changelog
+        :return: A tuple of common.StatusHistory objects ordered by history id
+        """
+        if isinstance(self._fields, CompactIssueRecord):
+            return self._fields.changelog
+        return get_status_changes(self.raw) if self.raw else ()
+
+    @property
+    def status_index(self):
+        """
+        Returns the index of the time spent in each status.  It's built the first time it's used.
+        :return: A common.StatusTransitionIndex
+        """
+        if self._status_index is None:
+            self._status_index = StatusTransitionIndex(self.status_changes)
+        return self._status_index
+
     def get_parent(self, only_key=True):
         """
         Gets the parent key or issue object
@@ -124,16 +361,11 @@ class JiraIssue(JiraObject):
                             containing parent information
         :return: Return either a parent issue key, the parent issue JiraIssue object or None if not found.
         """
-        parent_key = self.get_field('parent.key')
+        parent_key = self._fields.parent_key if self._fields is not None else self.get_field('parent.key')
         if not only_key and parent_key:
-            if self._parent:
-                return self._parent
-
-            self._parent = JiraIssue(source=self.source,key=parent_key)
-            if self._parent.load():
-                return self._parent
-            else:
-                return None
+            if not self._parent:
+                self._parent = self._get_related_issue(parent_key, JiraIssue)
+            return self._parent
 
         return parent_key
 
@@ -145,45 +377,100 @@ class JiraIssue(JiraObject):
         :return: Return either an epic issue key, the epic JiraIssue object or None if not found.
         """
 
-        field_name = self.default_fields['epic link']
-        epic_key = self.get_field('fields.%s'%field_name)
+        if self._fields is not None:
+            epic_key = self._fields.epic_key
+        else:
+            field_name = self.default_fields['epic link']
+            epic_key = self.get_field('fields.%s'%field_name)
 
         if epic_key and not only_key:
-            if self._epic:
-                return self._epic
-
-            self._epic = JiraEpic(source=self.source,key=epic_key)
-            if self._epic.load():
-                return self._epic
-            else:
-                return None
+            if not self._epic:
+                self._epic = self._get_related_issue(epic_key, JiraEpic)
+            return self._epic
 
         return epic_key
 
+    def _get_related_issue(self, key, issue_class):
+        """
+        Gets a related issue (like the parent or epic) from the identity map, loading it from Jira only if it's
+        not already there.
+        :param key: The key of the related issue
+        :param issue_class: The class of issue to return (JiraIssue or JiraEpic)
+        :return: Returns the issue_class object or None if it could not be loaded
+        """
+        if self.identity_map is not None:
+            issue = self.identity_map.get(key, issue_class)
+            if issue is not None:
+                return issue
+
+        issue = issue_class(source=self.source, key=key)
+        return issue if issue.load() else None
+
     def get_field(self, field, translate=False):
-        if translate:
+        """
+        Gets the value of a field using a dot separated path (for example, status.name).  The path is looked for
+        first as a top level key of the issue and then within the issue fields.  Paths are compiled the first time
+        they are used and reused after that.
+        :param field: The path to the field
+        :param translate: If True, the first part of the path is a friendly field name (for example, story points)
+                            that is translated into the jira field name.
+        :return: Returns the value or None if not found.
+        """
+        data = self.raw
+        if not data:
+            return None
+
+        return self._get_field_accessor(field, translate).get(data)
+
+    def _get_field_accessor(self, field, translate):
+        if not translate:
+            return get_field_accessor(field)
+
+        try:
+            accessors = _translated_field_accessors.get(self.source)
+            if accessors is None:
+                accessors = _translated_field_accessors[self.source] = {}
+        except TypeError:
+            # sources that can't be weakly referenced just don't get their translations cached
+            accessors = {}
+
+        accessor = accessors.get(field)
+        if accessor is None:
             parts = field.split(".")
             parts[0] = self.default_fields[parts[0].lower()]
-            field = '.'.join(parts)
-
-        if self._issue and self._issue.fields:
-
-            if field not in self._issue:
-                parts = field.split(".")
-                current = self._issue.fields
-                val = None
-                for p in parts:
-                    if p in current and not isinstance(current[p], dict):
-                        val = current[p]
-                        break
-                    elif p in current:
-                        current = current[p]
-
-                return val
-            else:
-                return self._issue[field]
+            accessor = accessors[field] = get_field_accessor('.'.join(parts))
+        return accessor
+
+    def _set_data(self, data):
+        """
+        Sets the issue data (as a dict) and extracts the fields when requested
+        """
+        self._status_index = None
+        self._epic = self._parent = None
+        if data is None:
+            self._issue = self._raw = None
+        elif self.option('compact'):
+            self._issue, self._raw = None, data
         else:
-            return None
+            self._issue, self._raw = munchify(data), None
+
+        if data is not None and self.option('compact'):
+            self._fields = CompactIssueRecord(self)
+            self._raw = {k: data[k] for k in COMPACT_ISSUE_KEYS if k in data}
+        elif data is not None and self.option('extract_fields'):
+            self._fields = ExtractedIssueFields(self)
+        else:
+            self._fields = None
+
+    def _copy_data_from(self, issue):
+        """
+        Replaces this issue's data with the data already loaded into another JiraIssue for the same issue.  Used by
+        the identity map to refresh the issue it holds.
+        :param issue: The JiraIssue to take the data from
+        """
+        self._issue, self._raw, self._fields = issue._issue, issue._raw, issue._fields
+        self._status_index = issue._status_index
+        self._epic = self._parent = None
 
     def prepopulate(self, data):
         """
@@ -193,13 +480,13 @@ class JiraIssue(JiraObject):
         """
 
         if isinstance(data, Issue):
-            self._issue = munchify(data.raw)
+            self._set_data(data.raw)
         elif isinstance(data, dict) and 'fields' in data:
-            self._issue = munchify(data)
+            self._set_data(data)
         else:
-            self._issue = None
+            self._set_data(None)
 
-        return self._issue
+        return self.raw
 
 
 class JiraEpic(JiraIssue):
@@ -237,13 +524,48 @@ class JiraIssueCollection(JiraObject):
         - issue_keys (Optional) - A list or comma separated string of issue keys to load
         - paging_start_at (Optional, Default=0) - The issue index to start with
         - paging_max_results (Optional, Default=500) - The maximum number of issues to return
+        - key_batch_size (Optional, Default=100) - When loading by issue_keys, the keys are split into batches of
+                    this size with each batch requested separately.
+        - max_parallelism (Optional, Default=JIRA_MAX_PARALLELISM) - The maximum number of requests to have in
+                    flight at once when loading by issue_keys or when using parallel paging.
+        - parallel_paging (Optional, Default=False) - If True, large searches are loaded by fetching the first page
+                    to find out how many issues there are then fetching the remaining pages concurrently.
+        - page_size (Optional, Default=100) - The number of issues requested per page when using parallel paging
+                    or streaming.
+        - stream (Optional, Default=False) - If True, loading does not retrieve any issues.  Instead, iterating over
+                    the collection fetches the issues page by page and yields them as they arrive without holding
+                    on to them.  Each iteration runs the search again.  Only applies to input_jql and issue_keys.
+        - issue_class (Optional, Default=JiraIssue) - The JiraIssue class (or subclass) to create for each issue.
+        - extract_fields (Optional, Default=False) - Passed on to each issue.  See JiraIssue.
+        - compact (Optional, Default=False) - Passed on to each issue.  See JiraIssue.
+        - field_profile (Optional, Default="full") - Which fields to request (see FIELD_PROFILES).  "minimal" and
+                    "points" only request the fields needed for status and points and skip the changelog, "timing"
+                    adds the changelog and "full" requests every default field.  Issues loaded with anything but
+                    "full" are not added to the identity map since they're missing data.
+        - incremental (Optional, Default=False) - If True, the issues matching input_jql are kept in the sync cache
+                    (see api.get_sync_cache) and each load only requests the issues updated since the previous load,
+                    merging them in.  Paging options are ignored.  Issues that stop matching the query (or are
+                    deleted) are only dropped when the whole query is run again (see full_sync_interval).
+        - full_sync_interval (Optional, Default=JIRA_FULL_SYNC_INTERVAL) - When loading incrementally, the number of
+                    seconds after which the whole query is run again rather than just the updated issues.
+        - warehouse_query (Optional) - A dict of filters (see IssueWarehouse.query) used to load the issues from the
+                    local warehouse instead of from Jira.  Paging options are applied to the results.  The issues
+                    are not added to the identity map.
+        - warehouse (Optional, Default=the shared warehouse) - The IssueWarehouse to use with warehouse_query.
     """
 
     def __init__(self, source, **kwargs):
         self._issues = None
+        self._streaming = False
+        self._total = None
         super(JiraIssueCollection, self).__init__(source, **kwargs)
 
     def count(self):
+        if self._streaming:
+            if self._total is None:
+                self._total = self._count_matching_issues()
+            return self._total
+
         return len(self._issues)
 
     def merge(self, collection):
@@ -255,7 +577,7 @@ class JiraIssueCollection(JiraObject):
         """
 
         # this will remove duplicates
-        issue_set = set(self._issues + collection._issues)
+        issue_set = set(list(self) + list(collection))
 
         # convert back to a list.
         merged_list = list(issue_set)
@@ -265,28 +587,40 @@ class JiraIssueCollection(JiraObject):
         return jic
 
     def dedupe(self):
-        issue_set = set(self._issues)
+        issue_set = set(self.issues)
         self._issues = issue_set
         return self
 
     def __iter__(self):
+        if self._streaming:
+            return self._stream_issues()
+
         return iter(self._issues)
 
     @property
     def issues(self):
+        """
+        Returns the list of issues in the collection.  If the collection was loaded in streaming mode, this will
+        load all of the issues and the collection will no longer stream.
+        :return: A list of JiraIssue objects
+        """
+        if self._streaming:
+            self._issues = list(self._stream_issues())
+            self._streaming = False
+
         return self._issues
 
     @property
     def total_points(self):
-        return reduce(lambda x,y: x+y.points, self._issues, 0)
+        return reduce(lambda x,y: x+y.points, self, 0)
 
     @property
     def completed_points(self):
         assert(self.option('group_id'))
 
         points = 0
-        context = AugurContext(self.option('group_id'))
-        for i in self._issues:
+        context = get_context(self.option('group_id'))
+        for i in self:
             if context.workflow.is_resolved(status=i.status,resolution=i.resolution):
                 points += i.points
 
@@ -297,8 +631,8 @@ class JiraIssueCollection(JiraObject):
         assert(self.option('group_id'))
 
         points = 0
-        context = AugurContext(self.option('group_id'))
-        for i in self._issues:
+        context = get_context(self.option('group_id'))
+        for i in self:
             if not context.workflow.is_resolved(status=i.status,resolution=i.resolution):
                 points += i.points
 
@@ -322,11 +656,28 @@ class JiraIssueCollection(JiraObject):
 
     def _load(self):
 
-        fields = self.source.default_fields
+        if self.option('stream') and (self.option('input_jql') or self.option('issue_keys') is not None):
+            # nothing is loaded until the collection is iterated over.
+            self._issues = None
+            self._streaming = True
+            self._total = None
+            return True
+
+        if self.option('warehouse_query') is not None:
+            issues = self._query_warehouse(self.option('warehouse_query'))
+
+        elif self.option('input_jql') and self.option('incremental'):
+            issues = self._sync_issues(self.option('input_jql'))
+            if issues is None:
+                return False
+
+        elif self.option('input_jql'):
+            issues = self._search_issues(self.option('input_jql'),
+                                         start_at=self.option('paging_start_at'),
+                                         max_results=self.option('paging_max_results', 0))
+            if issues is None:
+                return False
 
-        jql = None
-        if self.option('input_jql'):
-            jql = self.option('input_jql')
         elif self.option('issue_keys') is not None:
             if isinstance(self.option('issue_keys'), (str, unicode)):
                 keys = self.option('issue_keys').split(',')
@@ -334,29 +685,14 @@ class JiraIssueCollection(JiraObject):
                 keys = self.option('issue_keys')
 
             if len(keys) > 0:
-                jql = "key in (%s)"%",".join(keys)
+                issues = self._load_issues_by_key(keys)
+                if issues is None:
+                    return False
             else:
                 # an empty set of keys was given.  This is valid but we can bypass the remaining logic
                 self._issues = []
                 return True
 
-        if jql:
-            self.log_access('search',jql)
-            search_results = self.source.jira.search_issues(
-                jql,
-                startAt=self.option('paging_start_at'),
-                maxResults=self.option('paging_max_results', 0),
-                validate_query=True,
-                fields=fields.values(),
-                expand="changelog",
-                json_result=False)  ## Must set to False to let PyJira manage paging
-
-            if search_results is not None:
-                issues = search_results
-            else:
-                self.logger.error("Unable to load issues from JQL: %s" % jql)
-                return False
-
         elif self.option('input_jira_issue_list'):
 
             if isinstance(self.option('input_jira_issue_list'), list):
@@ -370,15 +706,325 @@ class JiraIssueCollection(JiraObject):
             return False
 
         assert (isinstance(issues, list))
+
+        # warehouse rows are snapshots that may be older than the issues already loaded from Jira so they're kept out
+        #   of the identity map along with partially loaded issues
+        use_identity_map = (self.identity_map is not None and self.option('field_profile', 'full') == 'full' and
+                            self.option('warehouse_query') is None)
         self._issues = []
         for i in issues:
-            issue_ob = JiraIssue(self.source)
+            if isinstance(i, JiraIssue):
+                # already loaded (from the identity map)
+                self._issues.append(i)
+                continue
+
+            issue_ob = self._create_issue()
             result = issue_ob.prepopulate(i)
             if len(result):
+                if use_identity_map:
+                    issue_ob = self.identity_map.add(issue_ob)
                 self._issues.append(issue_ob)
 
         return True
 
+    def _create_issue(self):
+        return self.option('issue_class', JiraIssue)(self.source,
+                                                     extract_fields=self.option('extract_fields', False),
+                                                     compact=self.option('compact', False))
+
+    def _query_warehouse(self, query):
+        """
+        Loads the issues that match the given filters from the local warehouse
+        :param query: A dict of filters passed on to IssueWarehouse.query
+        :return: Returns a list of raw issue dicts
+        """
+        warehouse = self.option('warehouse')
+        if warehouse is None:
+            from augur import api
+            warehouse = api.get_warehouse()
+
+        self.log_access('warehouse', query)
+        issues = warehouse.query(**query)
+
+        start_at = self.option('paging_start_at') or 0
+        max_results = self.option('paging_max_results')
+        return issues[start_at:start_at + max_results] if max_results else issues[start_at:]
+
+    def _sync_issues(self, jql):
+        """
+        Brings the locally stored issues for the given JQL up to date and returns them.  The issues are stored in
+        the sync cache (see api.get_sync_cache) per query and field profile with an entry for each issue and one
+        that lists the issues along with when they were last synced.  Each sync only requests the issues updated
+        since then (plus a minute of overlap), reads the stored issues in one go and only writes the issues that
+        changed (together with the list, in one transaction).  A full sync doesn't read the stored issues at all and
+        writes every issue.  The window is given to Jira relative to its current time so the clocks don't have to
+        agree.
+        :param jql: The JQL to run
+        :return: Returns a list of raw issue dicts or None if the search failed.
+        """
+        from augur import api
+
+        cache = api.get_sync_cache()
+        profile = self.option('field_profile', 'full')
+        cache_key = "jql_sync_%s" % hashlib.sha1(("%s|%s" % (jql, profile)).encode('utf-8')).hexdigest()
+        issue_prefix = cache_key + ":"
+        full_sync_interval = self.option('full_sync_interval', settings.main.integrations.jira.full_sync_interval)
+
+        now = time.time()
+        synced = cache.get(cache_key)
+        incremental = synced is not None and now - synced['full_sync_at'] < full_sync_interval
+        stored = {}
+        if incremental:
+            # only an incremental sync needs the stored issues (a full sync replaces them all)
+            found = cache.get_many([issue_prefix + k for k in synced['order']])
+            if len(found) == len(synced['order']):
+                stored = {k[len(issue_prefix):]: v for k, v in found.iteritems()}
+            else:
+                # some of the issues were dropped from the cache so start over
+                cache.invalidate_prefix(issue_prefix)
+                synced = None
+                incremental = False
+
+        if incremental:
+            minutes = int(math.ceil((now - synced['synced_at']) / 60.0)) + 1
+            results = self._search_issues(add_jql_clause(jql, 'updated >= "-%dm"' % minutes))
+            full_sync_at = synced['full_sync_at']
+            issues = dict(stored)
+            order = list(synced['order'])
+        else:
+            results = self._search_issues(jql)
+            full_sync_at = now
+            issues = {}
+            order = []
+
+        if results is None:
+            return None
+
+        changed = []
+        for result in results:
+            raw = freeze(result.raw if hasattr(result, 'raw') else result)
+            if raw['key'] not in issues:
+                order.append(raw['key'])
+            issues[raw['key']] = raw
+            if stored.get(raw['key']) != raw:
+                changed.append((issue_prefix + raw['key'], raw))
+
+        for key in set(synced['order'] if synced is not None else ()) - set(issues):
+            cache.delete(issue_prefix + key)
+
+        self.log_access('sync', jql, len(results), len(issues))
+        changed.append((cache_key, FrozenDict(order=tuple(order), synced_at=now, full_sync_at=full_sync_at)))
+        cache.set_many(changed, ttl=0)
+
+        return [issues[k] for k in order]
+
+    def _get_search_fields(self):
+        """
+        Gets the fields to request and what to expand based on the field_profile option
+        :return: Returns a tuple containing the list of jira field names and the expand parameter (or None)
+        """
+        return get_profile_fields(self.source, self.option('field_profile', 'full'))
+
+    def _search_issues(self, jql, start_at=None, max_results=0):
+        """
+        Runs the given JQL and returns the resulting issues
+        :param jql: The JQL to run
+        :param start_at: The index of the first issue to return
+        :param max_results: The maximum number of issues to return (0 returns all of them)
+        :return: Returns a list of jira Issue objects or None if the search failed.
+        """
+        if self.option('parallel_paging') and not max_results:
+            return self._search_issues_in_parallel(jql, start_at=start_at or 0)
+
+        fields, expand = self._get_search_fields()
+        self.log_access('search', jql)
+        self.source.rate_limiter.acquire()
+        search_results = self.source.jira.search_issues(
+            jql,
+            startAt=start_at,
+            maxResults=max_results,
+            validate_query=True,
+            fields=fields,
+            expand=expand,
+            json_result=False)  ## Must set to False to let PyJira manage paging
+
+        if search_results is None:
+            self.logger.error("Unable to load issues from JQL: %s" % jql)
+
+        return search_results
+
+    def _search_issues_in_parallel(self, jql, start_at=0):
+        """
+        Runs the given JQL by loading the first page to find the total number of issues and then loading the
+        remaining pages concurrently.
+        :param jql: The JQL to run
+        :param start_at: The index of the first issue to return
+        :return: Returns a list of jira Issue objects or None if any of the pages failed.
+        """
+        page_size = self.option('page_size', 100)
+        fields, expand = self._get_search_fields()
+
+        def fetch_page(page_start):
+            self.log_access('search-page', jql, page_start)
+            self.source.rate_limiter.acquire()
+            return self.source.jira.search_issues(
+                jql,
+                startAt=page_start,
+                maxResults=page_size,
+                validate_query=True,
+                fields=fields,
+                expand=expand,
+                json_result=False)
+
+        first_page = fetch_page(start_at)
+        if first_page is None:
+            self.logger.error("Unable to load issues from JQL: %s" % jql)
+            return None
+
+        # Jira caps the page size (without saying so in the request) so the pages are as big as the first one was
+        stride = min(page_size, getattr(first_page, 'maxResults', None) or len(first_page))
+        if not stride:
+            return list(first_page)
+
+        remaining_pages = map_concurrently(fetch_page,
+                                           range(start_at + stride, first_page.total, stride),
+                                           max_workers=self.option('max_parallelism',
+                                                                   settings.main.integrations.jira.max_parallelism))
+
+        issues = list(first_page)
+        for page in remaining_pages:
+            if page is None:
+                self.logger.error("Unable to load a page of issues from JQL: %s" % jql)
+                return None
+            issues.extend(page)
+
+        return issues
+
+    def _get_streaming_searches(self):
+        """
+        Gets the searches to run when streaming.  This is the input JQL or one search per batch of issue keys.
+        :return: Returns a list of tuples containing the jql, the index of the first issue and the maximum number of
+                    issues to return (None for all of them)
+        """
+        if self.option('input_jql'):
+            return [(self.option('input_jql'), self.option('paging_start_at') or 0,
+                     self.option('paging_max_results') or None)]
+
+        keys = self.option('issue_keys')
+        if isinstance(keys, (str, unicode)):
+            keys = keys.split(',')
+
+        keys = [k.strip().upper() for k in keys if k.strip()]
+        return [("key in (%s)" % ",".join(batch), 0, None)
+                for batch in chunk_list(keys, self.option('key_batch_size', 100))]
+
+    def _count_matching_issues(self):
+        """
+        Asks Jira for the number of issues that the streaming searches would return without retrieving them.
+        :return: Returns the number of issues
+        """
+        total = 0
+        for jql, start_at, max_results in self._get_streaming_searches():
+            self.log_access('search-count', jql)
+            self.source.rate_limiter.acquire()
+            result = self.source.jira.search_issues(jql, maxResults=1, validate_query=True, fields="key",
+                                                    json_result=True)
+            matching = max(0, result['total'] - start_at)
+            total += min(matching, max_results) if max_results else matching
+
+        return total
+
+    def _stream_issues(self):
+        """
+        A generator that runs the streaming searches one page at a time and yields JiraIssue objects as each page
+        arrives.  Only one page of issues is held in memory at a time.
+        :return: Yields JiraIssue objects
+        """
+        page_size = self.option('page_size', 100)
+        fields, expand = self._get_search_fields()
+        total = 0
+        for jql, start_at, max_results in self._get_streaming_searches():
+            returned = 0
+            while True:
+                requested = min(page_size, max_results - returned) if max_results else page_size
+                self.log_access('search-page', jql, start_at)
+                self.source.rate_limiter.acquire()
+                page = self.source.jira.search_issues(
+                    jql,
+                    startAt=start_at,
+                    maxResults=requested,
+                    validate_query=True,
+                    fields=fields,
+                    expand=expand,
+                    json_result=True)
+
+                if page is None:
+                    self.logger.error("Unable to load a page of issues from JQL: %s" % jql)
+                    return
+
+                raw_issues = page['issues']
+                for raw in raw_issues:
+                    issue_ob = self._create_issue()
+                    if issue_ob.prepopulate(raw):
+                        yield issue_ob
+
+                returned += len(raw_issues)
+                start_at += len(raw_issues)
+                if not raw_issues or start_at >= page['total'] or (max_results and returned >= max_results):
+                    break
+
+            total += returned
+
+        self._total = total
+
+    def _load_issues_by_key(self, keys):
+        """
+        Loads the issues with the given keys.  The keys are split into batches (to stay well within url length
+        limits) that are requested concurrently.  The issues are returned in the same order as the keys given.
+        Issues that are already in the identity map are not requested again.
+        :param keys: A list of issue keys
+        :return: Returns a list of jira Issue objects (and JiraIssue objects for the issues found in the identity
+                    map) or None if any of the batches failed.
+        """
+        ordered_keys = []
+        key_positions = {}
+        for k in keys:
+            k = k.strip().upper()
+            if k and k not in key_positions:
+                key_positions[k] = len(ordered_keys)
+                ordered_keys.append(k)
+
+        issues = []
+        if self.identity_map is not None:
+            issue_class = self.option('issue_class', JiraIssue)
+            missing_keys = []
+            for k in ordered_keys:
+                issue = self.identity_map.get(k, issue_class)
+                if issue is not None:
+                    issues.append(issue)
+                else:
+                    missing_keys.append(k)
+        else:
+            missing_keys = ordered_keys
+
+        batches = chunk_list(missing_keys, self.option('key_batch_size', 100))
+        results = map_concurrently(lambda batch: self._search_issues("key in (%s)" % ",".join(batch)),
+                                   batches,
+                                   max_workers=self.option('max_parallelism',
+                                                           settings.main.integrations.jira.max_parallelism))
+
+        for result in results:
+            if result is None:
+                return None
+            issues.extend(result)
+
+        # issues that were moved come back with a different key so they go to the end.
+        issues.sort(key=lambda i: key_positions.get(i.key.upper(), len(key_positions)))
+
+        start_at = self.option('paging_start_at') or 0
+        max_results = self.option('paging_max_results')
+        return issues[start_at:start_at + max_results] if max_results else issues[start_at:]
+
 
 class JiraReleaseNotes(JiraIssueCollection):
 
@@ -386,11 +1032,27 @@ class JiraReleaseNotes(JiraIssueCollection):
         super(JiraReleaseNotes, self).__init__(source, **kwargs)
         self._issues = None
         self._release_notes = None
+        self._date_range = None
 
     def _load(self):
-        
+        prepared = self._prepare_load()
+        return self._finish_load() if prepared is True else prepared
+
+    def _prepare_load(self):
+        # the query needs the group's workflow from the database
+        return self._set_release_jql()
+
+    def _finish_load(self):
+        return self._load_release_notes()
+
+    def _set_release_jql(self):
+        """
+        Sets the input_jql option to the query for the issues released during the date range and remembers the
+        range for the release notes.
+        :return: Returns False if the date range is invalid
+        """
         try:
-            start, end = self._get_date_range()
+            start, end = self._date_range = self._get_date_range()
 
         except (TypeError,LookupError) as e:
             self.logger.error(e.message)
@@ -399,23 +1061,30 @@ class JiraReleaseNotes(JiraIssueCollection):
         start_str = start.format("YYYY/MM/DD HH:mm")
         end_str = end.format("YYYY/MM/DD HH:mm")
 
-        context = AugurContext(self.option('group_id'))
+        context = get_context(self.option('group_id'))
         input_jql = "%s AND (status in (\"Resolved\") AND status changed to \"Production\" " \
                     "during ('%s','%s')) order by updated asc" % (context.workflow.get_projects_jql(),
                                                                   start_str, end_str)
         self._set_option('input_jql',input_jql)
+        return True
+
+    def _load_release_notes(self):
+        start, end = self._date_range
 
         # load the issues that were released during that time
         if not super(JiraReleaseNotes,self)._load():
             return False
 
+        # load all the parents and epics in a few batched requests instead of one request per issue.
+        self._resolve_parents_and_epics()
+
         # Collect statistics about those issues and get total points based on parent issues if applicable.
         #   Also, find out which epic it was part of and aggregate the total points released.
         released_tickets = []
         bug_count = 0
         task_story_count = 0
         total_points = 0
-        for issue in self._issues:
+        for issue in self.issues:
 
             if issue.issuetype.lower() in ('bug','defect'):
                 bug_count += 1
@@ -456,6 +1125,65 @@ class JiraReleaseNotes(JiraIssueCollection):
 
         return True
 
+    def _resolve_parents_and_epics(self):
+        """
+        Loads the parents of all the subtasks and the epics of all the other issues (or of the subtask's parent)
+        using batched searches and attaches them to the issues so that get_parent and get_epic don't have to
+        load them one at a time.
+        """
+        issues = self.issues
+        loaded = {i.key: i for i in issues}
+
+        parent_keys = [i.get_parent() for i in issues if i.is_subtask and i.get_parent()]
+        parents = self._load_related_issues(parent_keys, JiraIssue, loaded)
+
+        epic_owners = []
+        for i in issues:
+            if i.is_subtask:
+                i._parent = parents.get(i.get_parent())
+                if i._parent:
+                    epic_owners.append(i._parent)
+            else:
+                epic_owners.append(i)
+
+        epic_keys = [i.get_epic() for i in epic_owners if i.get_epic()]
+        epics = self._load_related_issues(epic_keys, JiraEpic, loaded)
+        for i in epic_owners:
+            i._epic = epics.get(i.get_epic())
+
+    def _load_related_issues(self, keys, issue_class, loaded):
+        """
+        Gets the issues with the given keys.  Issues that have already been loaded are reused and the rest are
+        loaded together in a single collection.
+        :param keys: The keys of the issues to get
+        :param issue_class: The class of issue to return (JiraIssue or JiraEpic)
+        :param loaded: A dict of JiraIssue objects already loaded keyed on the issue key.  Newly loaded issues
+                        are added to it.
+        :return: Returns a dict of issue_class objects keyed on the issue key
+        """
+        related = {}
+        missing = []
+        for k in set(keys):
+            existing = loaded.get(k)
+            if existing is None:
+                missing.append(k)
+            elif isinstance(existing, issue_class):
+                related[k] = existing
+            else:
+                related[k] = issue_class(self.source, **existing._options)
+                related[k].prepopulate(existing.raw)
+
+        if missing:
+            collection = JiraIssueCollection(self.source, issue_keys=missing, issue_class=issue_class)
+            if collection.load():
+                for i in collection:
+                    related[i.key] = i
+                    loaded[i.key] = i
+            else:
+                self.logger.error("JiraReleaseNotes: Unable to load related issues %s" % ",".join(missing))
+
+        return related
+
     @property
     def start(self):
         return self._release_notes.start_date
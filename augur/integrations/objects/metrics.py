@@ -29,6 +29,13 @@ def df_get_timing_status_keys(context, status_types):
     return time_in_status_keys
 
 
+def _to_datetime(timestamp):
+    """
+    Converts a UTC pandas timestamp from one of the timing tables into a timezone aware datetime
+    """
+    return None if pandas.isnull(timestamp) else timestamp.tz_localize('UTC').to_pydatetime()
+
+
 class Metrics(object):
     def __init__(self, context):
         self.context = context
@@ -62,7 +69,13 @@ class IssueCollectionMetrics(Metrics):
         For each issue in the collection, this will create an item a dictionary keyed on the issue key
         for each issue with the value being a dictionary containing the start, end and total times for each
         status along with the full in progress time.
-        :param options: ----no options----
+        :param options: A dict containing:
+                - vectorized (Boolean): If True, the timing is calculated from a table of all the status changes
+                        in the collection (see get_time_in_status_table) instead of issue by issue.  This is much
+                        faster for large collections.
+                - as_data_frame (Boolean): If True, returns a pandas DataFrame indexed on the issue key with
+                        a _time_<status> column for each in progress status, a _time_type_<type> column for each
+                        status type and _time_total_time_seconds.  All values are in seconds.  This implies vectorized.
         :return: As follows:
             {
                 'statuses': {
@@ -77,39 +90,184 @@ class IssueCollectionMetrics(Metrics):
                 'total_as_time_delta': <timedelta>
             }
         """
+        options = options or {}
+        if options.get('vectorized') or options.get('as_data_frame'):
+            return self._vectorized_timing_analysis(as_data_frame=options.get('as_data_frame', False))
 
         issues_with_timing = {}
         all_issue_status_timing = {}
+        in_progress_statuses = self.context.workflow.in_progress_statuses()
         for issue in self.collection:
-            # initialize all the keys for stats
+            timing = self._get_issue_timing(issue, in_progress_statuses)
+
+            for s_as_key, t in timing.statuses.iteritems():
+                if s_as_key not in all_issue_status_timing:
+                    all_issue_status_timing[s_as_key] = 0
+
+                all_issue_status_timing[s_as_key] += t.total.total_seconds()
+
+            issues_with_timing[issue.key] = timing
+
+        return munchify({
+            'issues': issues_with_timing,
+            'statuses': all_issue_status_timing
+        })
+
+    def _vectorized_timing_analysis(self, as_data_frame=False):
+        """
+        Does the same work as timing_analysis but using grouped operations over the time in status table.
+        :param as_data_frame: If True, returns a DataFrame instead.  See timing_analysis.
+        :return: See timing_analysis
+        """
+        in_progress_statuses = self.context.workflow.in_progress_statuses()
+        status_keys = {}
+        for s in in_progress_statuses:
+            status_keys.setdefault(s.tool_issue_status_name.lower(), common.status_to_dict_key(s))
+
+        # the keys are gathered while building the transitions so the collection is only iterated once
+        issue_keys, transitions = self._get_transitions()
+        table = self.get_time_in_status_table(transitions)
+
+        if as_data_frame:
+            seconds = table.pivot_table(index='key', columns='status', values='total_seconds', aggfunc='sum')
+            frame = seconds.reindex(index=issue_keys, columns=status_keys.keys()).fillna(0.0)
+            frame.columns = ["_time_%s" % status_keys[c] for c in frame.columns]
+            frame['_time_total_time_seconds'] = frame.sum(axis=1)
+
+            status_types = {s.tool_issue_status_name.lower(): s.tool_issue_status_type
+                            for s in self.context.workflow.statuses}
+            type_seconds = table.groupby([table['key'], table['status'].map(status_types)])['total_seconds'].sum()
+            if len(type_seconds):
+                type_seconds = type_seconds.unstack().reindex(index=issue_keys).fillna(0.0)
+                for status_type in type_seconds.columns:
+                    frame["_time_type_%s" % common.status_to_dict_key(status_type)] = type_seconds[status_type]
+
+            frame.index.name = 'key'
+            return frame
+
+        table = table[table['status'].isin(status_keys.keys())]
+        status_timing = {(row.key, row.status): row for row in table.itertuples(index=False)}
+
+        issues_with_timing = {}
+        all_issue_status_timing = {k: 0 for k in status_keys.values()}
+        for key in issue_keys:
             timing = {
                 'statuses': {},
                 'total_in_seconds': 0.0,
                 'total_as_time_delta': None
             }
-            for s in self.context.workflow.in_progress_statuses():
-                s_as_key = common.status_to_dict_key(s)
-                t = common.get_issue_status_timing_info(issue.issue, s)
+            for status, s_as_key in status_keys.iteritems():
+                row = status_timing.get((key, status))
+                total = row.total_seconds if row else 0.0
                 timing['statuses'][s_as_key] = {
-                    'total': t['total_time'],
-                    'start': t['start_time'],
-                    'end': t['end_time']
+                    'total': datetime.timedelta(seconds=total),
+                    'start': _to_datetime(row.start) if row else None,
+                    'end': _to_datetime(row.end) if row else None
                 }
-                timing['total_in_seconds'] += t['total_time'].total_seconds()
-
-                if s_as_key not in all_issue_status_timing:
-                    all_issue_status_timing[s_as_key] = 0
-
-                all_issue_status_timing[s_as_key] += t['total_time'].total_seconds()
+                timing['total_in_seconds'] += total
+                all_issue_status_timing[s_as_key] += total
 
             timing['total_as_time_delta'] = datetime.timedelta(seconds=timing['total_in_seconds'])
-            issues_with_timing[issue.key] = (munchify(timing))
+            issues_with_timing[key] = timing
 
         return munchify({
             'issues': issues_with_timing,
             'statuses': all_issue_status_timing
         })
 
+    def get_transitions_table(self):
+        """
+        Flattens the status changes of every issue in the collection into a single table with a row per change in
+        the order they were made.
+        :return: Returns a pandas DataFrame with the columns key, from_status, to_status (both in lower case) and
+                    created (as a UTC timestamp).
+        """
+        return self._get_transitions()[1]
+
+    def _get_transitions(self):
+        """
+        Builds the transitions table (see get_transitions_table) in a single pass over the collection
+        :return: Returns a tuple containing the keys of all the issues in the collection (in order) and the table
+        """
+        columns = ['key', 'from_status', 'to_status', 'created']
+        rows = {c: [] for c in columns}
+        issue_keys = []
+        for issue in self.collection:
+            issue_keys.append(issue.key)
+            for history in issue.status_changes:
+                for from_string, to_string in history.changes:
+                    rows['key'].append(issue.key)
+                    rows['from_status'].append((from_string or "").lower())
+                    rows['to_status'].append((to_string or "").lower())
+                    rows['created'].append(history.created)
+
+        transitions = pandas.DataFrame(rows, columns=columns)
+        transitions['created'] = pandas.to_datetime(transitions['created'], utc=True).dt.tz_convert(None)
+        return issue_keys, transitions
+
+    def get_time_in_status_table(self, transitions=None):
+        """
+        Calculates the time each issue spent in each status from the transitions table.  Each status change is
+        taken to end the time spent in the status entered by the change before it.  The time in a status the
+        issue is currently in only counts when the issue hasn't been in that status before (the same as
+        common.StatusTransitionIndex).
+        :param transitions: The table returned by get_transitions_table.  If not given, it's built from the collection.
+        :return: Returns a pandas DataFrame with the columns key, status (lower case), start and end (as UTC
+                    timestamps) and total_seconds.
+        """
+        if transitions is None:
+            transitions = self.get_transitions_table()
+        if not len(transitions):
+            return pandas.DataFrame(columns=['key', 'status', 'start', 'end', 'total_seconds'])
+
+        now = pandas.Timestamp(common.utc_to_local(datetime.datetime.now())).tz_convert(None)
+
+        left = transitions.groupby('key')['created'].shift(-1)
+        # rounded to the microsecond (like timedelta) so the totals match the ones from the changelog exactly
+        seconds = (left - transitions['created']).dt.total_seconds().round(6).fillna(0.0)
+        transitions = transitions.assign(seconds=seconds)
+        current = transitions[left.isnull()]
+
+        grouped = transitions.groupby(['key', 'to_status'])
+        table = pandas.DataFrame({
+            'start': grouped['created'].min(),
+            'total_seconds': grouped['seconds'].sum(),
+        })
+        table['end'] = current.set_index(['key', 'to_status'])['created']
+
+        still_in_status = table['end'].notnull() & (table['total_seconds'] == 0)
+        table.loc[still_in_status, 'total_seconds'] = (now - table.loc[still_in_status, 'end']).dt.total_seconds()
+        table.loc[still_in_status, 'end'] = now
+
+        table.index.names = ['key', 'status']
+        return table.reset_index()[['key', 'status', 'start', 'end', 'total_seconds']]
+
+    def _get_issue_timing(self, issue, statuses):
+        """
+        Gets the start, end and total times for each of the given statuses for a single issue.
+        :param issue: The JiraIssue to analyze
+        :param statuses: The ToolIssueStatus objects to get timing for
+        :return: A munch containing 'statuses', 'total_in_seconds' and 'total_as_time_delta'.  See timing_analysis.
+        """
+        # initialize all the keys for stats
+        timing = {
+            'statuses': {},
+            'total_in_seconds': 0.0,
+            'total_as_time_delta': None
+        }
+        for s in statuses:
+            s_as_key = common.status_to_dict_key(s)
+            t = issue.status_index.get_timing(s.tool_issue_status_name)
+            timing['statuses'][s_as_key] = {
+                'total': t['total_time'],
+                'start': t['start_time'],
+                'end': t['end_time']
+            }
+            timing['total_in_seconds'] += t['total_time'].total_seconds()
+
+        timing['total_as_time_delta'] = datetime.timedelta(seconds=timing['total_in_seconds'])
+        return munchify(timing)
+
     def point_analysis(self, options=None):
         """
         Does a very general analysis of a collection of issues
@@ -146,9 +304,10 @@ class IssueCollectionMetrics(Metrics):
 
         options = munchify(options)
 
-        # Initialize the general analytics
+        # Initialize the general analytics.  The ticket count is calculated as we go so that the collection is
+        #   only iterated over once (which matters for streaming collections).
         result = Munch({
-            "ticket_count": self.collection.count(),
+            "ticket_count": 0,
             "remaining_ticket_count": 0,
             "unpointed": 0.0,
             'developer_stats': {},
@@ -168,6 +327,7 @@ class IssueCollectionMetrics(Metrics):
         })
 
         for issue in self.collection:
+            result['ticket_count'] += 1
             assignee_cleaned = common.clean_username(issue.assignee)
 
             if issue.assignee not in result['developer_stats']:
@@ -230,10 +390,9 @@ class IssueCollectionMetrics(Metrics):
         """
         data = []
 
-        timing_analysis = None
-
+        in_progress_statuses = None
         if 'timing' in data_to_include:
-            timing_analysis = self.timing_analysis()
+            in_progress_statuses = self.context.workflow.in_progress_statuses()
 
         for issue in self.collection:
             row = {
@@ -246,12 +405,11 @@ class IssueCollectionMetrics(Metrics):
                 "reporter": issue.reporter
             }
 
-            if timing_analysis:
-
-                if issue.key in timing_analysis.issues:
-                    timing = {"_time_%s" % k: v['total'].total_seconds() for k, v in timing_analysis.issues[issue.key].statuses.iteritems()}
-                    row.update(timing)
-                    row["_time_total_time_seconds"] = timing_analysis.issues[issue.key].total_in_seconds
+            if in_progress_statuses is not None:
+                issue_timing = self._get_issue_timing(issue, in_progress_statuses)
+                timing = {"_time_%s" % k: v['total'].total_seconds() for k, v in issue_timing.statuses.iteritems()}
+                row.update(timing)
+                row["_time_total_time_seconds"] = issue_timing.total_in_seconds
 
             data.append(row)
 
@@ -283,7 +441,7 @@ class BoardMetrics(Metrics):
         pointed = 0
         unpointed = 0
 
-        for issue in collection.issues:
+        for issue in collection:
 
             if not issue.points:
                 metrics['points']['unpointed'].append(issue.key)
@@ -334,6 +492,10 @@ class BoardMetrics(Metrics):
         sprint_collection = self._board.get_sprints()
         overall_metrics_list = []
         for sprint in sprint_collection:
+            if sprint.option('sprint_id') in sprint_collection.failures:
+                # the sprint's report could not be loaded so there's nothing to analyze
+                continue
+
             tp = (sprint.name, sprint.completed_points, sprint.incomplete_points, sprint.average_point_size)
             overall_metrics_list.append(tp)
 
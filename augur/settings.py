@@ -33,6 +33,15 @@ def load_settings(env=None):
                     "username": env.get("JIRA_USERNAME",""),
                     "password": env.get("JIRA_PASSWORD",""),
                     "api_path": env.get("JIRA_API_PATH", "rest/api/2"),
+                    "max_parallelism": int(env.get("JIRA_MAX_PARALLELISM", 4)),
+                    "max_requests_per_second": float(env.get("JIRA_MAX_REQUESTS_PER_SECOND", 10)),
+                    "identity_map_ttl": int(env.get("JIRA_IDENTITY_MAP_TTL", 300)),
+                    "identity_map_max_entries": int(env.get("JIRA_IDENTITY_MAP_MAX_ENTRIES", 10000)),
+                    "active_sprint_report_ttl": int(env.get("JIRA_ACTIVE_SPRINT_REPORT_TTL", 300)),
+                    "board_index_ttl": int(env.get("JIRA_BOARD_INDEX_TTL", 3600)),
+                    "fields_ttl": int(env.get("JIRA_FIELDS_TTL", 86400)),
+                    "full_sync_interval": int(env.get("JIRA_FULL_SYNC_INTERVAL", 86400)),
+                    "async_workers": int(env.get("JIRA_ASYNC_WORKERS", 16)),
                 },
                 "confluence": {
                     "url": "%s/wiki" % env.get("CONFLUENCE_INSTANCE", env.get("JIRA_INSTANCE","")),
@@ -51,6 +60,17 @@ def load_settings(env=None):
                 }
             },
             "datastores": {
+                "persistent_cache": {
+                    "path": env.get("PERSISTENT_CACHE_SQLITE_PATH",
+                                    os.path.join(os.path.expanduser("~"), ".augur_persist.sqlite")),
+                },
+                "sync": {
+                    "path": env.get("SYNC_SQLITE_PATH", os.path.join(os.path.expanduser("~"), ".augur_sync.sqlite")),
+                },
+                "warehouse": {
+                    "path": env.get("WAREHOUSE_SQLITE_PATH",
+                                    os.path.join(os.path.expanduser("~"), ".augur_warehouse.sqlite")),
+                },
                 "main": {
                     "type": env.get("DB_TYPE"),
                     "postgres": {
@@ -65,9 +85,21 @@ def load_settings(env=None):
                     }
                 },
                 "cache": {
+                    "backend": env.get("CACHE_BACKEND", "memory"),
+                    "memory": {
+                        "max_entries": int(env.get("CACHE_MAX_ENTRIES", 1000)),
+                        "max_bytes": int(env.get("CACHE_MAX_BYTES", 0)),
+                        "default_ttl": int(env.get("CACHE_DEFAULT_TTL", 3600)),
+                    },
+                    "sqlite": {
+                        "path": env.get("CACHE_SQLITE_PATH",
+                                        os.path.join(os.path.expanduser("~"), ".augur_cache.sqlite")),
+                    },
                     "mongo": {
                         "host": env.get("MONGO_HOST","localhost"),
                         "port": int(env.get("MONGO_PORT", 27017)),
+                        "database": env.get("MONGO_CACHE_DATABASE", "augur"),
+                        "collection": env.get("MONGO_CACHE_COLLECTION", "cache"),
                     }
                 }
             }
@@ -0,0 +1,229 @@
+"""
+AUGUR WAREHOUSE
+
+A local store of Jira issues so that reports can be run (and rerun) without going back to Jira.  Issues are stored
+in a sqlite file separate from the main database.  Each issue is kept in full (as json) along with the normalized
+fields that reports filter on, its status transitions and the sprints it was part of.  The normalized fields are
+indexed so that queries on project, status, assignee, sprint and resolution date don't have to scan every issue.
+
+Most callers should get the shared warehouse through augur.api.get_warehouse.  Issues are added to it from Jira
+with augur.api.sync_warehouse (or IssueWarehouse.store_issues for issues that are already loaded) and can be loaded
+from it with JiraIssueCollection (see the warehouse_query option).
+"""
+
+import datetime
+import json
+import sqlite3
+import threading
+
+from augur.common import parse_datetime
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS issues ("
+    "key TEXT PRIMARY KEY, project TEXT, status TEXT, issuetype TEXT, assignee TEXT, resolution TEXT, "
+    "resolution_date TEXT, points REAL, team_name TEXT, updated TEXT, raw TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS issues_project ON issues (project)",
+    "CREATE INDEX IF NOT EXISTS issues_status ON issues (status)",
+    "CREATE INDEX IF NOT EXISTS issues_assignee ON issues (assignee)",
+    "CREATE INDEX IF NOT EXISTS issues_resolution_date ON issues (resolution_date)",
+    "CREATE TABLE IF NOT EXISTS transitions ("
+    "issue_key TEXT NOT NULL, history_id TEXT NOT NULL, created TEXT, from_status TEXT, to_status TEXT)",
+    "CREATE INDEX IF NOT EXISTS transitions_issue_key ON transitions (issue_key)",
+    "CREATE TABLE IF NOT EXISTS sprint_issues ("
+    "sprint_id INTEGER NOT NULL, issue_key TEXT NOT NULL, PRIMARY KEY (sprint_id, issue_key))",
+    "CREATE INDEX IF NOT EXISTS sprint_issues_issue_key ON sprint_issues (issue_key)",
+)
+
+# the filters accepted by IssueWarehouse.query mapped to their column
+FILTER_COLUMNS = {
+    'project': 'project',
+    'status': 'status',
+    'assignee': 'assignee',
+    'issuetype': 'issuetype',
+    'resolution': 'resolution',
+}
+
+
+def to_utc_string(value):
+    """
+    Converts a date (as a string or datetime) to a UTC string that sorts chronologically
+    :param value: A date string, a datetime (naive datetimes are assumed to be UTC) or None
+    :return: Returns a string in the form YYYY-MM-DD HH:MM:SS or None
+    """
+    if not value:
+        return None
+
+    if not isinstance(value, datetime.datetime):
+        value = parse_datetime(value)
+
+    if value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class IssueWarehouse(object):
+    """
+    Stores issues in a local sqlite file.  A single connection is shared by all threads (guarded by a lock) so one
+    warehouse can be used from anywhere in the process.
+
+    Options:
+        - path - The path to the sqlite file.  It is created if it does not exist.  Use ":memory:" for a warehouse
+                    that only lasts as long as the object.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM issues").fetchone()[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM issues WHERE key = ?",
+                                            (key.upper(),)).fetchone() is not None
+
+    def store_issues(self, issues):
+        """
+        Adds issues to the warehouse replacing any that are already there (along with their transitions).
+        :param issues: JiraIssue objects (or a JiraIssueCollection).  They are used to normalize the fields so they
+                    need a source that can translate friendly field names.  Compact issues don't keep their
+                    changelog so it's left out of the stored issue (their transitions are still stored).
+        :return: Returns the number of issues stored
+        """
+        issue_rows = []
+        transition_rows = []
+        for issue in issues:
+            raw = issue.raw
+            if not raw:
+                continue
+
+            key = issue.key.upper()
+            project = issue.get_field('project.key') or key.split("-")[0]
+            issue_rows.append((key, project.lower(), issue.status.lower(), issue.issuetype.lower(),
+                               issue.assignee.lower(), issue.resolution.lower(),
+                               to_utc_string(issue.get_field('resolutiondate')), issue.points, issue.team_name,
+                               to_utc_string(issue.get_field('updated')), json.dumps(raw)))
+
+            for history in issue.status_changes:
+                for from_status, to_status in history.changes:
+                    transition_rows.append((key, history.id, to_utc_string(history.created),
+                                            (from_status or "").lower(), (to_status or "").lower()))
+
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM transitions WHERE issue_key = ?",
+                                         [(row[0],) for row in issue_rows])
+            self._connection.executemany("INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                         issue_rows)
+            self._connection.executemany("INSERT INTO transitions VALUES (?, ?, ?, ?, ?)", transition_rows)
+
+        return len(issue_rows)
+
+    def store_sprint_issues(self, sprint_id, issue_keys):
+        """
+        Sets the issues that were part of a sprint (replacing what was stored for the sprint before)
+        :param sprint_id: The ID of the sprint in Jira
+        :param issue_keys: The keys of the issues in the sprint
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sprint_issues WHERE sprint_id = ?", (int(sprint_id),))
+            self._connection.executemany("INSERT OR IGNORE INTO sprint_issues VALUES (?, ?)",
+                                         [(int(sprint_id), k.upper()) for k in issue_keys])
+
+    def remove_issues(self, issue_keys):
+        """
+        Removes issues (and their transitions and sprint membership) from the warehouse
+        :param issue_keys: The keys of the issues to remove
+        """
+        keys = [(k.upper(),) for k in issue_keys]
+        with self._lock, self._connection:
+            for table, column in (("issues", "key"), ("transitions", "issue_key"), ("sprint_issues", "issue_key")):
+                self._connection.executemany("DELETE FROM %s WHERE %s = ?" % (table, column), keys)
+
+    def query(self, keys=None, sprint_id=None, resolved_after=None, resolved_before=None, **filters):
+        """
+        Gets the issues that match all of the given filters.  Filters on names (project, status, assignee, issuetype
+        and resolution) are case insensitive and can be given a single value or a list of values.
+        :param keys: Only include issues with these keys
+        :param sprint_id: Only include issues that were part of this sprint
+        :param resolved_after: Only include issues resolved at or after this date (string or datetime)
+        :param resolved_before: Only include issues resolved before this date (string or datetime)
+        :param filters: Any of project, status, assignee, issuetype and resolution
+        :return: Returns a list of raw issue dicts ordered by project and then issue number
+        """
+        clauses = []
+        params = []
+
+        def add_in_clause(column, values):
+            if isinstance(values, basestring):
+                values = [values]
+            values = list(values)
+            clauses.append("%s IN (%s)" % (column, ",".join("?" * len(values))) if values else "0")
+            params.extend(values)
+
+        for name, values in filters.iteritems():
+            if name not in FILTER_COLUMNS:
+                raise ValueError("Invalid warehouse filter: %s" % name)
+            add_in_clause("issues.%s" % FILTER_COLUMNS[name],
+                          [values.lower()] if isinstance(values, basestring) else [v.lower() for v in values])
+
+        if keys is not None:
+            if isinstance(keys, basestring):
+                keys = keys.split(",")
+            add_in_clause("issues.key", [k.strip().upper() for k in keys])
+
+        if sprint_id is not None:
+            clauses.append("issues.key IN (SELECT issue_key FROM sprint_issues WHERE sprint_id = ?)")
+            params.append(int(sprint_id))
+
+        if resolved_after is not None:
+            clauses.append("issues.resolution_date >= ?")
+            params.append(to_utc_string(resolved_after))
+
+        if resolved_before is not None:
+            clauses.append("issues.resolution_date < ?")
+            params.append(to_utc_string(resolved_before))
+
+        sql = "SELECT raw FROM issues"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        # ordered like Jira orders keys: ENG-2 comes before ENG-10
+        sql += " ORDER BY project, CAST(substr(key, instr(key, '-') + 1) AS INTEGER)"
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def get_transitions(self, issue_key):
+        """
+        Gets the status transitions of an issue in the order they happened
+        :param issue_key: The key of the issue
+        :return: Returns a list of (created, from status, to status) tuples with created as a UTC string
+        """
+        with self._lock:
+            return self._connection.execute("SELECT created, from_status, to_status FROM transitions "
+                                            "WHERE issue_key = ? ORDER BY CAST(history_id AS INTEGER)",
+                                            (issue_key.upper(),)).fetchall()
+
+    def get_sprint_ids(self, issue_key):
+        """
+        Gets the sprints that an issue was part of
+        :param issue_key: The key of the issue
+        :return: Returns a list of sprint IDs
+        """
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT sprint_id FROM sprint_issues "
+                                                               "WHERE issue_key = ? ORDER BY sprint_id",
+                                                               (issue_key.upper(),))]
+
+    def clear(self):
+        with self._lock, self._connection:
+            for table in ("issues", "transitions", "sprint_issues"):
+                self._connection.execute("DELETE FROM %s" % table)
@@ -0,0 +1,58 @@
+"""
+Compares common.parse_datetime with dateutil's parser on the kinds of timestamps found in Jira changelogs and
+Github pull requests.
+
+Usage: python benchmarks/bench_parse_datetime.py [number of timestamps]
+"""
+import datetime
+import random
+import sys
+import timeit
+
+from dateutil.parser import parse
+
+from augur import common
+
+
+def make_timestamps(count):
+    start = datetime.datetime(2017, 1, 1)
+    timestamps = []
+    for i in range(count):
+        dt = start + datetime.timedelta(minutes=random.randint(0, 60 * 24 * 365))
+        if i % 2:
+            timestamps.append(dt.strftime("%Y-%m-%dT%H:%M:%S.000-0500"))
+        else:
+            timestamps.append(dt.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    return timestamps
+
+
+def main(count):
+    timestamps = make_timestamps(count)
+
+    def parse_all_dateutil():
+        for t in timestamps:
+            parse(t)
+
+    def parse_all_uncached():
+        common._parsed_date_strings.clear()
+        for t in timestamps:
+            common.parse_datetime(t)
+
+    def parse_all_cached():
+        for t in timestamps:
+            common.parse_datetime(t)
+
+    results = [
+        ("dateutil.parser.parse", min(timeit.repeat(parse_all_dateutil, number=1, repeat=3))),
+        ("parse_datetime (first parse)", min(timeit.repeat(parse_all_uncached, number=1, repeat=3))),
+        ("parse_datetime (memoized)", min(timeit.repeat(parse_all_cached, number=1, repeat=3))),
+    ]
+
+    baseline = results[0][1]
+    print("Parsing %d timestamps" % count)
+    for name, seconds in results:
+        print("  %-30s %8.4fs  (%.1fx)" % (name, seconds, baseline / seconds))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
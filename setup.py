@@ -96,7 +96,7 @@ setup(
     # $ pip install -e .[dev,test]
     extras_require={
         'dev': ['check-manifest'],
-        'test': ['coverage'],
+        'test': ['coverage', 'mock'],
     },
 
     # If there are data files included in your packages that need to be
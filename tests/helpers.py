@@ -0,0 +1,188 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from jira.client import ResultList
+from munch import munchify
+
+from augur import db
+from augur import settings
+from augur.concurrency import RateLimiter
+from augur.integrations.augurjira import AugurJira
+from augur.integrations.objects.base import IssueIdentityMap
+from augur.integrations.objects.issue import JiraIssue
+
+# the friendly names of the custom fields used by the fake sources mapped to their jira field names
+FIELDS = {'story points': 'customfield_1', 'dev team': 'customfield_2', 'epic link': 'customfield_3'}
+
+_db_dir = None
+
+
+def init_test_db():
+    """
+    Binds the database to a sqlite file in a temporary directory that's removed when the tests finish.  The database
+    can only be bound once so every test in the run shares it.
+    """
+    global _db_dir
+    if _db_dir is None:
+        _db_dir = tempfile.mkdtemp(prefix="augur-tests-")
+        atexit.register(shutil.rmtree, _db_dir, True)
+
+    os.environ['DB_TYPE'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = os.path.join(_db_dir, "db.sqlite")
+    settings.load_settings()
+
+    db.init_db()
+
+
+class FakeJira(object):
+    """
+    Stands in for the jira client's issue search.  "key in (...)" searches return the matching issues and any other
+    search returns the issues listed in matches (all of them when matches is None).  Like Jira, no more than
+    max_page_size issues are returned at once.  Every search is recorded.
+    :param issues: The raw issues keyed on issue key (a list of raw issues keeps their order)
+    :param matches: The keys of the issues returned by searches that aren't for specific keys
+    :param max_page_size: The largest page of issues returned by a search (None for no limit)
+    """
+    def __init__(self, issues=None, matches=None, max_page_size=None):
+        if isinstance(issues, list):
+            issues = OrderedDict((i['key'], i) for i in issues)
+        self.issues = issues if issues is not None else OrderedDict()
+        self.matches = matches
+        self.max_page_size = max_page_size
+
+        self.searches = []
+        self.search_kwargs = []
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def match(self, jql):
+        """
+        Returns the keys of the issues found by a search that isn't for specific keys
+        """
+        return list(self.issues) if self.matches is None else list(self.matches)
+
+    def search_issues(self, jql, startAt=0, maxResults=50, json_result=None, **kwargs):
+        with self._lock:
+            self.searches.append(jql)
+            self.search_kwargs.append(kwargs)
+            self.requests.append((startAt, maxResults))
+
+        if jql.startswith("key in ("):
+            keys = jql[len("key in ("):-1].split(",")
+        else:
+            keys = self.match(jql)
+        found = [self.issues[k] for k in keys if k in self.issues]
+
+        startAt = startAt or 0
+
+        page_size = min(maxResults or len(found), self.max_page_size or len(found))
+        page = found[startAt:startAt + page_size]
+        if json_result:
+            return {'startAt': startAt, 'maxResults': page_size, 'total': len(found), 'issues': page}
+
+        return ResultList([munchify(i) for i in page], _startAt=startAt, _maxResults=page_size, _total=len(found))
+
+
+class FakeSource(object):
+    """
+    Stands in for AugurJira when loading issues
+    :param jira: The FakeJira to search (an empty one if not given)
+    :param default_fields: The friendly field names mapped to jira field names
+    :param identity_map: The IssueIdentityMap to use or None to not use one
+    """
+    def __init__(self, jira=None, default_fields=None, identity_map=None):
+        self.jira = jira if jira is not None else FakeJira()
+        self.default_fields = munchify(default_fields or {})
+        self.rate_limiter = RateLimiter()
+        self.identity_map = identity_map
+
+
+class FakeAgileJira(AugurJira):
+    """
+    Stands in for AugurJira when loading boards and sprints.  Each board has the closed sprints listed for it (oldest
+    first like the Agile API) and a backlog holding a single issue.  The first sprint page requested and each sprint
+    report requested are recorded.
+    :param sprints: The IDs of each board's sprints keyed on board ID
+    :param failing_reports: The (board ID, sprint ID) tuples of the sprint reports that can't be loaded
+    """
+    def __init__(self, sprints, failing_reports=()):
+        self.sprints = sprints
+        self.failing_reports = set(failing_reports)
+        self.rate_limiter = RateLimiter()
+        self.identity_map = IssueIdentityMap()
+        self._default_fields = munchify(FIELDS)
+
+        self.page_requests = []
+        self.report_requests = []
+
+    def get_boards(self):
+        return [self.get_board(board_id) for board_id in self.sprints]
+
+    def get_board(self, board_id):
+        return {'id': board_id, 'name': "Board %s" % board_id}
+
+    def get_sprints_page(self, board_id, start_at=0, max_results=50, states=None):
+        self.page_requests.append(start_at)
+        sprint_ids = self.sprints[board_id]
+        return {'values': [{'id': i, 'name': "Sprint %d" % i, 'state': 'closed'}
+                           for i in sprint_ids[start_at:start_at + max_results]],
+                'isLast': start_at + max_results >= len(sprint_ids)}
+
+    def get_backlog_issues(self, board_id, fields=None, expand=None, page_size=100):
+        return {'issues': [{'key': 'ENG-%s' % board_id, 'fields': {'customfield_1': 2.0}}]}
+
+    def get_sprint_report(self, board_id, sprint_id):
+        self.report_requests.append((board_id, sprint_id))
+        if (board_id, sprint_id) in self.failing_reports:
+            raise ValueError("No report")
+        return {'sprint': {'id': sprint_id, 'name': "Sprint %d" % sprint_id, 'state': 'closed'},
+                'contents': {'completedIssues': [{'estimateStatistic': {'statFieldValue': {'value': sprint_id}}}],
+                             'completedIssuesEstimateSum': {'value': sprint_id},
+                             'issuesNotCompletedEstimateSum': {}}}
+
+
+def make_source(issues=None, matches=None):
+    """
+    Creates a FakeSource with the usual custom fields and its own identity map
+    :param issues: The raw issues held by its FakeJira (see FakeJira)
+    :param matches: The keys of the issues returned by searches that aren't for specific keys (see FakeJira)
+    """
+    return FakeSource(FakeJira(issues, matches=matches), default_fields=FIELDS, identity_map=IssueIdentityMap())
+
+
+def make_raw_issue(key='ENG-1', status=None, histories=None, **fields):
+    """
+    Creates the json that Jira returns for an issue
+    :param key: The issue key
+    :param status: The name of the issue's status (it has no status field if None)
+    :param histories: The changelog as (id, created, changes) tuples where each change is a (from status, to status)
+                tuple or a (field, from, to) tuple for any other field.  The issue has no changelog if None.
+    :param fields: The issue's other fields keyed on jira field name
+    """
+    if status is not None:
+        fields['status'] = {'name': status}
+
+    raw = {'key': key, 'fields': fields}
+    if histories is not None:
+        raw['changelog'] = {'histories': [
+            {'id': history_id, 'created': created,
+             'items': [{'field': change[0] if len(change) == 3 else 'status', 'fromString': change[-2],
+                        'toString': change[-1]} for change in changes]}
+            for history_id, created, changes in histories
+        ]}
+
+    return raw
+
+
+def make_issue(key='ENG-1', status=None, histories=None, source=None, **fields):
+    """
+    Creates a JiraIssue loaded with the json from make_raw_issue
+    :param source: The source of the issue (a FakeSource with the usual custom fields if not given)
+    """
+    issue = JiraIssue(source or FakeSource(default_fields=FIELDS))
+    issue.prepopulate(make_raw_issue(key, status, histories, **fields))
+    return issue
@@ -1,5 +1,4 @@
 import unittest
-import os
 
 import datetime
 from pony import orm
@@ -9,29 +8,15 @@ from augur import db
 from augur.context import AugurContext
 from augur import api
 
-from augur import settings
 from augur.integrations.augurjira import AugurJira
+from tests.helpers import init_test_db
 
 
 class TestApi(unittest.TestCase):
 
-    def __init__(self, *args, **kwargs):
-        self.sqlite_path = os.path.join(settings.main.project.base_dir, "tests/db.sqlite")
-        try:
-            os.remove(self.sqlite_path)
-        except:
-            print ("No db file found. Creating...")
-
-        super(TestApi, self).__init__(*args, **kwargs)
-
     def setUp(self):
 
-        os.environ['DB_TYPE'] = 'sqlite'
-        os.environ['SQLITE_PATH'] = self.sqlite_path
-
-        settings.load_settings()
-
-        db.init_db()
+        init_test_db()
 
         self.jira_data = {
             "board_id": 3,
@@ -0,0 +1,42 @@
+import unittest
+
+import mock
+
+from augur import api
+from augur.cache import FrozenDict, MemoryCache
+from augur.integrations import augurgithub
+from augur.integrations.augurgithub import AugurGithub
+
+FURTHER_REVIEW = """
+owner: Jane Doe <jane@example.com> (@jdoe)
+reviews:
+  - name: General Maintainers
+    logins:
+      - John Smith <john@example.com> (@jsmith)
+"""
+
+
+class TestFurtherReview(unittest.TestCase):
+
+    def setUp(self):
+        api.set_cache(MemoryCache())
+        with mock.patch.object(augurgithub, 'get_jira'), mock.patch.object(augurgithub, 'Github'):
+            self.github = AugurGithub()
+
+        self.repo = mock.Mock(full_name="org/repo")
+        self.repo.get_file_contents.return_value = mock.Mock(decoded_content=FURTHER_REVIEW)
+
+    def tearDown(self):
+        api.set_cache(None)
+
+    def test_same_type_on_hit_and_miss(self):
+        with mock.patch.object(self.github, 'get_org_and_repo_from_params', return_value=(None, self.repo)):
+            missed = self.github.get_repo_further_review(self.repo)
+            hit = self.github.get_repo_further_review(self.repo)
+
+        self.assertEqual(self.repo.get_file_contents.call_count, 1)
+        self.assertIsInstance(missed, FrozenDict)
+        self.assertIsInstance(hit, FrozenDict)
+        self.assertEqual(missed, hit)
+        self.assertEqual(hit['owner']['username'], "jdoe")
+        self.assertEqual([m['username'] for m in hit['maintainers']], ["jsmith"])
@@ -0,0 +1,179 @@
+import threading
+import unittest
+
+import mock
+from jira import JIRAError
+from munch import munchify
+
+from augur import api
+from augur import settings
+from augur.cache import MemoryCache
+from augur.concurrency import RateLimiter, map_concurrently
+from augur.integrations.augurjira import AugurJira
+
+
+class FakeClient(object):
+    def __init__(self, boards):
+        self._boards = boards
+
+    def boards(self, maxResults=50):
+        return [munchify({'raw': b}) for b in self._boards]
+
+
+class FieldClient(object):
+    """
+    Returns the field metadata.  When started and release events are given, the request waits for release after
+    setting started.
+    """
+    def __init__(self, fields, started=None, release=None):
+        self.field_list = fields
+        self.requests = 0
+        self.started = started
+        self.release = release
+
+    def fields(self):
+        self.requests += 1
+        if self.started:
+            self.started.set()
+            self.release.wait(5)
+        return self.field_list
+
+
+class BoardJira(AugurJira):
+    """
+    Serves boards from a dict (like the Agile API would) and records the boards requested individually
+    """
+    def __init__(self, boards):
+        super(BoardJira, self).__init__(server="http://jira.example.com", username="user", password="password")
+        self.rate_limiter = RateLimiter()
+        self.boards = boards
+        self.jira = FakeClient(boards.values())
+        self.requests = []
+        self._requests_lock = threading.Lock()
+
+    def custom_get_json(self, path, params=None, base=None, replacement_options=None):
+        board_id = int(path.split("/")[-1])
+        with self._requests_lock:
+            self.requests.append(board_id)
+        if board_id not in self.boards:
+            raise JIRAError(status_code=404, text="Board does not exist")
+        return self.boards[board_id]
+
+
+class TestBoardIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.source = BoardJira({1: {'id': 1, 'name': "Board 1"}, 2: {'id': 2, 'name': "Board 2"}})
+
+    def test_index(self):
+        self.assertEqual(self.source.get_board("1")['name'], "Board 1")
+        self.assertEqual(self.source.get_board(1)['name'], "Board 1")
+        self.assertEqual(self.source.requests, [1])
+
+        # listing the boards fills the index
+        self.assertEqual(len(self.source.get_boards()), 2)
+        self.assertEqual(self.source.get_board(2)['name'], "Board 2")
+        self.assertEqual(self.source.requests, [1])
+
+    def test_missing_board(self):
+        self.assertIsNone(self.source.get_board(3))
+        self.assertIsNone(self.source.get_board(3))
+        self.assertEqual(self.source.requests, [3, 3])
+
+        self.source.boards = {}
+        self.source.custom_get_json = mock.Mock(side_effect=JIRAError(status_code=500, text="Server error"))
+        self.assertRaises(JIRAError, self.source.get_board, 4)
+
+    @mock.patch('augur.integrations.augurjira.time')
+    def test_expiry(self, fake_time):
+        fake_time.time.return_value = 1000.0
+        self.source.get_board(1)
+        self.source.get_board(1)
+
+        fake_time.time.return_value = 1000.0 + settings.main.integrations.jira.board_index_ttl
+        self.source.get_board(1)
+        self.assertEqual(self.source.requests, [1, 1])
+
+    def test_threads(self):
+        boards = map_concurrently(self.source.get_board, [1, 2, 1, 2, 3], max_workers=5)
+        self.assertEqual([b['id'] if b else None for b in boards], [1, 2, 1, 2, None])
+        self.assertEqual(self.source.get_board(2)['id'], 2)
+        self.assertEqual(sorted(self.source._board_index.keys()), [1, 2])
+
+
+class TestLoadFields(unittest.TestCase):
+
+    FIELDS = [
+        {'id': 'summary', 'name': 'Summary'},
+        {'id': 'customfield_10002', 'name': 'Story Points'},
+    ]
+
+    def setUp(self):
+        self._persistent_cache = api.PERSISTENT_CACHE
+        api.PERSISTENT_CACHE = MemoryCache()
+
+    def tearDown(self):
+        api.PERSISTENT_CACHE = self._persistent_cache
+
+    def create_source(self, client):
+        source = AugurJira(server="http://jira.example.com", username="user", password="password")
+        source.jira = client
+        return source
+
+    def test_lazy_load(self):
+        client = FieldClient(self.FIELDS)
+        source = self.create_source(client)
+        self.assertEqual(client.requests, 0)
+
+        self.assertEqual(source.default_fields['story points'], 'customfield_10002')
+        self.assertEqual(source.default_fields['dev team'], 'dev team')
+        self.assertEqual(source.fields['summary'].id, 'summary')
+        self.assertEqual(client.requests, 1)
+
+    def test_cache_hit(self):
+        self.create_source(FieldClient(self.FIELDS)).load_fields()
+
+        client = FieldClient([])
+        source = self.create_source(client)
+        self.assertEqual(source.default_fields['story points'], 'customfield_10002')
+        self.assertEqual(client.requests, 0)
+
+    @mock.patch('augur.integrations.augurjira.invalidate_field_accessors')
+    def test_refresh(self, invalidate):
+        client = FieldClient(self.FIELDS)
+        source = self.create_source(client)
+        source.load_fields()
+        self.assertFalse(invalidate.called)
+
+        client.field_list = [{'id': 'customfield_10005', 'name': 'Story Points'}]
+        source.load_fields()
+        self.assertEqual(client.requests, 1)
+
+        source.load_fields(refresh=True)
+        self.assertEqual(client.requests, 2)
+        self.assertEqual(source.default_fields['story points'], 'customfield_10005')
+        invalidate.assert_called_once_with(source)
+
+        # the refreshed fields replace the cached ones
+        self.assertEqual(self.create_source(FieldClient([])).default_fields['story points'], 'customfield_10005')
+
+    def test_threads(self):
+        started = threading.Event()
+        release = threading.Event()
+        client = FieldClient(self.FIELDS, started=started, release=release)
+        source = self.create_source(client)
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(source.default_fields))
+        first.start()
+        started.wait(5)
+
+        # the fields are still being loaded so this waits for them rather than resolving them again
+        second = threading.Thread(target=lambda: results.append(source.default_fields))
+        second.start()
+        release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(client.requests, 1)
+        self.assertIs(results[0], results[1])
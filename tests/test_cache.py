@@ -0,0 +1,214 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from augur import cache
+from augur.cache import MemoryCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self._original_time = cache.time
+        cache.time = self.clock
+
+    def tearDown(self):
+        cache.time = self._original_time
+
+    def test_ttl(self):
+        c = MemoryCache(default_ttl=10)
+        c.set("projects_eng", [1, 2, 3])
+        c.set("boards", [4], ttl=0)
+        self.assertEqual(c.get("projects_eng"), [1, 2, 3])
+
+        self.clock.now += 11
+        self.assertIsNone(c.get("projects_eng"))
+        self.assertEqual(c.get("boards"), [4])
+        self.assertEqual(c.stats['expirations'], 1)
+
+    def test_lru_eviction(self):
+        c = MemoryCache(max_entries=2)
+        c.set("a", 1)
+        c.set("b", 2)
+        c.get("a")
+        c.set("c", 3)
+
+        self.assertIn("a", c)
+        self.assertNotIn("b", c)
+        self.assertIn("c", c)
+        self.assertEqual(c.stats['evictions'], 1)
+
+    def test_byte_budget(self):
+        c = MemoryCache(max_bytes=cache.estimate_size(["x" * 100]) * 2)
+        c.set("a", ["x" * 100])
+        c.set("b", ["y" * 100])
+        c.set("c", ["z" * 100])
+
+        self.assertNotIn("a", c)
+        self.assertLessEqual(c.stats['bytes'], c.max_bytes)
+
+    def test_invalidate_prefix(self):
+        c = MemoryCache()
+        c.set("repos_for_org1", 1)
+        c.set("repos_for_org2", 2)
+        c.set("FR_OPR_org1/repo", 3)
+
+        self.assertEqual(c.invalidate_prefix("repos_for_"), 2)
+        self.assertEqual(len(c), 1)
+        self.assertEqual(c.get("FR_OPR_org1/repo"), 3)
+
+    def test_stats(self):
+        c = MemoryCache()
+        c.set("a", 1)
+        c.get("a")
+        c.get("b")
+        stats = c.stats
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+
+class TestFrozenData(unittest.TestCase):
+
+    def test_freeze(self):
+        frozen = cache.freeze({'boards': [{'id': 1, 'name': 'Board'}]})
+        self.assertIsInstance(frozen['boards'], tuple)
+        self.assertRaises(TypeError, frozen.__setitem__, 'boards', [])
+        self.assertRaises(TypeError, frozen['boards'][0].update, {'id': 2})
+        self.assertIs(cache.freeze(frozen), frozen)
+
+    def test_thaw(self):
+        frozen = cache.freeze({'boards': [{'id': 1}]})
+        thawed = cache.thaw(frozen)
+        thawed['boards'][0]['id'] = 2
+        self.assertEqual(frozen['boards'][0]['id'], 1)
+        self.assertEqual(thawed, {'boards': [{'id': 2}]})
+
+
+class FakeMongoResult(object):
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+class FakeMongoCollection(object):
+    """
+    A local stand-in for a pymongo collection that supports just what MongoCache needs.
+    """
+    def __init__(self):
+        self.documents = {}
+
+    def find_one(self, query):
+        return self.documents.get(query['_id'])
+
+    def replace_one(self, query, document, upsert=False):
+        self.documents[query['_id']] = document
+
+    def delete_one(self, query):
+        return FakeMongoResult(1 if self.documents.pop(query['_id'], None) else 0)
+
+    def delete_many(self, query):
+        if '_id' in query:
+            pattern = re.compile(query['_id']['$regex'])
+            keys = [k for k in self.documents if pattern.match(k)]
+        else:
+            keys = self.documents.keys()
+
+        for k in keys:
+            del self.documents[k]
+        return FakeMongoResult(len(keys))
+
+
+class TestCacheBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sqlite_path = os.path.join(self.directory, "cache.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_backend(self, backend):
+        backend.set("projects_eng", cache.freeze([{'key': 'ENG'}]))
+        backend.set("projects_qa", [{'key': 'QA'}])
+        backend.set("boards", [1], ttl=-1)
+
+        self.assertEqual(backend.get("projects_eng"), ({'key': 'ENG'},))
+        self.assertIsNone(backend.get("boards"))
+        self.assertEqual(backend.invalidate_prefix("projects_"), 2)
+        self.assertIsNone(backend.get("projects_qa"))
+
+    def test_sqlite(self):
+        self.check_backend(cache.SqliteCache(self.sqlite_path))
+
+        cache.SqliteCache(self.sqlite_path).set("custom_fields", [{'id': 'customfield_1'}])
+        self.assertEqual(cache.SqliteCache(self.sqlite_path).get("custom_fields"), [{'id': 'customfield_1'}])
+
+        backend = cache.SqliteCache(self.sqlite_path)
+        backend.set_many([("sync:ENG-1", {'key': 'ENG-1'}), ("sync", ('ENG-1',))], ttl=0)
+        self.assertEqual(backend.get("sync:ENG-1"), {'key': 'ENG-1'})
+        self.assertEqual(backend.get("sync"), ('ENG-1',))
+
+        backend.set("sync:ENG-2", {'key': 'ENG-2'}, ttl=-1)
+        self.assertEqual(backend.get_many(["sync:ENG-1", "sync:ENG-2", "sync:ENG-3"]), {"sync:ENG-1": {'key': 'ENG-1'}})
+        self.assertNotIn("sync:ENG-2", backend)
+
+    def test_mongo(self):
+        self.check_backend(cache.MongoCache(collection=FakeMongoCollection()))
+
+    def test_mongo_json(self):
+        collection = FakeMongoCollection()
+        backend = cache.MongoCache(collection=collection)
+        value = cache.freeze({'sprint': {'id': 1}, 'issues': [{'key': 'ENG-1'}], 'order': ('ENG-1',), 3: None})
+        backend.set("sprint_report", value)
+
+        # values are stored as json and come back frozen
+        self.assertIsInstance(collection.documents["sprint_report"]['value'], basestring)
+        restored = backend.get("sprint_report")
+        self.assertEqual(restored, value)
+        self.assertIsInstance(restored, cache.FrozenDict)
+        self.assertIsInstance(restored['issues'], tuple)
+        self.assertEqual(cache.from_json(cache.to_json({(1, 2): set([3])})), {(1, 2): set([3])})
+        self.assertRaises(TypeError, backend.set, "bad", object())
+
+        # anything else (like a pickle written by someone else) is never loaded
+        collection.documents["pickled"] = {'_id': "pickled", 'value': "cos\nsystem\n(S'echo'\ntR.",
+                                           'expires_at': None}
+        self.assertIsNone(backend.get("pickled"))
+
+    def test_tiered(self):
+        back = cache.SqliteCache(self.sqlite_path)
+        self.check_backend(cache.TieredCache(MemoryCache(), back))
+
+        back.set("custom_fields", [{'id': 'customfield_1'}])
+        tiered = cache.TieredCache(MemoryCache(), back)
+        self.assertEqual(tiered.get("custom_fields"), [{'id': 'customfield_1'}])
+        self.assertIn("custom_fields", tiered.front)
+
+    def test_persistent_cache_with_memory_backend(self):
+        from augur import api, settings
+
+        original = (api.CACHE, api.PERSISTENT_CACHE, settings.main.datastores.persistent_cache.path)
+        settings.main.datastores.persistent_cache.path = self.sqlite_path
+        api.CACHE = api.PERSISTENT_CACHE = None
+        try:
+            # the persistent cache is always stored on disk and is separate from the global cache
+            self.assertEqual(settings.main.datastores.cache.backend, "memory")
+            self.assertIsNot(api.get_persistent_cache(), api.get_cache())
+            api.get_persistent_cache().set("sprint_report_1_1", {'sprint': {'id': 1}}, ttl=0)
+            api.get_cache().clear()
+
+            self.assertEqual(cache.SqliteCache(self.sqlite_path).get("sprint_report_1_1"), {'sprint': {'id': 1}})
+            self.assertIsNone(api.get_cache().get("sprint_report_1_1"))
+        finally:
+            api.CACHE, api.PERSISTENT_CACHE, settings.main.datastores.persistent_cache.path = original
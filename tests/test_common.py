@@ -0,0 +1,75 @@
+import datetime
+import unittest
+
+from dateutil.parser import parse
+
+from augur import common
+from tests.helpers import make_raw_issue
+
+HISTORIES = [
+    ('4', '2017-01-04T10:00:00.000-0500', [('In Progress', 'Done')]),
+    ('1', '2017-01-01T10:00:00.000-0500', [('Open', 'In Progress')]),
+    ('3', '2017-01-03T10:00:00.000-0500', [('Review', 'In Progress')]),
+    ('2', '2017-01-02T10:00:00.000-0500', [('In Progress', 'Review')]),
+    ('5', '2017-01-05T10:00:00.000-0500', []),
+]
+
+# every history also changes the assignee which should be ignored
+ISSUE = make_raw_issue(histories=[(history_id, created, changes + [('assignee', None, 'jdoe')])
+                                  for history_id, created, changes in HISTORIES])
+
+
+class FakeStatus(object):
+    def __init__(self, name):
+        self.tool_issue_status_name = name
+
+
+class TestStatusTiming(unittest.TestCase):
+
+    def test_status_changes(self):
+        changes = common.get_status_changes(ISSUE)
+        self.assertEqual([h.id for h in changes], ['1', '2', '3', '4'])
+        self.assertEqual(changes[0].changes, (('Open', 'In Progress'),))
+
+    def test_transition_index(self):
+        index = common.StatusTransitionIndex.from_issue(ISSUE)
+
+        in_progress = index.get_timing("in progress")
+        self.assertEqual(in_progress.total_time, datetime.timedelta(days=2))
+        self.assertEqual(in_progress.start_time.day, 1)
+        self.assertIsNone(in_progress.end_time)
+
+        self.assertEqual(index.get_timing("Review").total_time, datetime.timedelta(days=1))
+
+        # still in the status so the time is counted up to now
+        done = index.get_timing("Done")
+        self.assertGreater(done.total_time, datetime.timedelta(days=1))
+
+        unknown = index.get_timing("Blocked")
+        self.assertIsNone(unknown.start_time)
+        self.assertEqual(unknown.total_time, datetime.timedelta())
+
+    def test_get_issue_status_timing_info(self):
+        issue = ISSUE
+        timing = common.get_issue_status_timing_info(issue, FakeStatus("In Progress"))
+        self.assertEqual(timing.total_time, datetime.timedelta(days=2))
+
+        timing = common.get_issue_status_timing_info({'fields': {}}, FakeStatus("In Progress"))
+        self.assertEqual(timing['total_time'], datetime.timedelta())
+
+
+class TestParseDatetime(unittest.TestCase):
+
+    def test_matches_dateutil(self):
+        for date_str in ('2017-01-04T10:00:00.000-0500', '2017-01-04T10:00:00.123456+05:30', '2017-01-04T10:00',
+                         '2017-01-04 10:00:59', '2017-01-04', '04/Jan/17 10:00 AM'):
+            self.assertEqual(common.parse_datetime(date_str), parse(date_str), date_str)
+
+        self.assertEqual(common.parse_datetime('2017-01-04T10:00:00Z').utcoffset(), datetime.timedelta(0))
+
+    def test_memoized(self):
+        self.assertIs(common.parse_datetime('2017-01-04T10:00:00Z'), common.parse_datetime('2017-01-04T10:00:00Z'))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, common.parse_datetime, '2017-13-45T10:00:00Z')
+        self.assertRaises(ValueError, common.parse_datetime, 'not a date')
@@ -0,0 +1,112 @@
+import threading
+import unittest
+
+import mock
+
+from augur import settings
+from augur.concurrency import RateLimiter, chunk_list, map_concurrently
+from augur.integrations.objects.issue import JiraIssueCollection
+from tests.helpers import FakeJira, FakeSource
+
+
+class TestMapConcurrently(unittest.TestCase):
+
+    def test_order(self):
+        threads = set()
+        finished = []
+        done = [threading.Event() for _ in range(5)]
+
+        def square(value):
+            threads.add(threading.current_thread().ident)
+            # the first items finish last: each one waits for the item after it
+            if value < 4:
+                done[value + 1].wait(5)
+            finished.append(value)
+            done[value].set()
+            return value * value
+
+        self.assertEqual(map_concurrently(square, range(5), max_workers=5), [0, 1, 4, 9, 16])
+        self.assertEqual(finished, [4, 3, 2, 1, 0])
+        self.assertEqual(len(threads), 5)
+
+        # a single worker runs everything in the calling thread (the events are all set by now so nothing waits)
+        threads.clear()
+        self.assertEqual(map_concurrently(square, [3, 4], max_workers=1), [9, 16])
+        self.assertEqual(threads, {threading.current_thread().ident})
+
+    def test_shared_pool(self):
+        threads = set()
+
+        def record(value):
+            threads.add(threading.current_thread().ident)
+            return value
+
+        for _ in range(20):
+            self.assertEqual(map_concurrently(record, range(8), max_workers=4), range(8))
+
+        # the calls borrow the run_async threads rather than starting their own
+        self.assertLessEqual(len(threads), settings.main.integrations.jira.async_workers + 1)
+
+    def test_nested(self):
+        def inner(value):
+            return sum(map_concurrently(lambda v: v * value, range(4), max_workers=4))
+
+        # more outer calls than there are pool threads: the inner calls run in their callers' threads
+        count = settings.main.integrations.jira.async_workers * 2
+        self.assertEqual(map_concurrently(inner, range(count), max_workers=count), [6 * v for v in range(count)])
+
+    def test_return_exceptions(self):
+        def invert(value):
+            return 1.0 / value
+
+        results = map_concurrently(invert, [1, 0, 2], max_workers=3, return_exceptions=True)
+        self.assertEqual(results[0], 1.0)
+        self.assertIsInstance(results[1], ZeroDivisionError)
+        self.assertEqual(results[2], 0.5)
+
+        self.assertRaises(ZeroDivisionError, map_concurrently, invert, [1, 0, 2], max_workers=3)
+
+    def test_chunk_list(self):
+        self.assertEqual(chunk_list(range(5), 2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(chunk_list([], 2), [])
+
+    def test_key_batches(self):
+        source = FakeSource(FakeJira([{'key': "ENG-%d" % i, 'fields': {'summary': "Issue %d" % i}}
+                                      for i in range(1, 11)]))
+        keys = ["ENG-%d" % i for i in range(10, 0, -1)] + ["eng-3"]
+        collection = JiraIssueCollection(source, issue_keys=keys, key_batch_size=3, max_parallelism=4)
+        self.assertTrue(collection.load())
+
+        # the keys are requested once each in batches but come back in the order they were given
+        self.assertEqual([i.key for i in collection], ["ENG-%d" % i for i in range(10, 0, -1)])
+        self.assertEqual(sorted(len(jql.split(",")) for jql in source.jira.searches), [1, 3, 3, 3])
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    @mock.patch('augur.concurrency.time')
+    def test_spacing(self, fake_time):
+        fake_time.time.return_value = 100.0
+        limiter = RateLimiter(max_per_second=10)
+
+        # calls made at the same moment are spaced a tenth of a second apart
+        waits = [limiter.acquire() for _ in range(3)]
+        self.assertEqual([round(w, 6) for w in waits], [0.0, 0.1, 0.2])
+        self.assertEqual([round(c[0][0], 6) for c in fake_time.sleep.call_args_list], [0.1, 0.2])
+
+        # once the calls have caught up there's no wait
+        fake_time.time.return_value = 101.0
+        self.assertEqual(limiter.acquire(), 0.0)
+
+    @mock.patch('augur.concurrency.time')
+    def test_threads(self, fake_time):
+        fake_time.time.return_value = 100.0
+        limiter = RateLimiter(max_per_second=50)
+        waits = map_concurrently(lambda _: limiter.acquire(), range(6), max_workers=6)
+
+        # every call gets its own slot no matter which thread gets there first
+        self.assertEqual(sorted(round(w, 6) for w in waits), [0.0, 0.02, 0.04, 0.06, 0.08, 0.1])
+
+    def test_no_limit(self):
+        limiter = RateLimiter()
+        self.assertEqual([limiter.acquire() for _ in range(100)], [0.0] * 100)
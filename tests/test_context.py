@@ -0,0 +1,189 @@
+import datetime
+import threading
+import unittest
+
+import mock
+from pony import orm
+
+from augur import api
+from augur import db
+from augur.context import get_context, invalidate_context
+from tests.helpers import init_test_db
+
+
+def make_staff(first_name, last_name):
+    return db.Staff(first_name=first_name, last_name=last_name, role="Developer", email=u"%s@example.com" % first_name,
+                    rate=0.0, start_date=datetime.date(2017, 1, 1), jira_username=first_name.lower(),
+                    status="Active")
+
+
+def old_get_all_staff(context):
+    """
+    The way api.get_all_staff used to find the staff in a context's group
+    """
+    context_staff = []
+    valid_team_ids = [t.id for t in context.group.teams]
+    staff = orm.select(s for s in db.Staff if s.teams)[:]
+    for s in staff:
+        for t in s.teams:
+            if t.id in valid_team_ids:
+                context_staff.append(s)
+    return context_staff
+
+
+class TestContext(unittest.TestCase):
+
+    def setUp(self):
+        init_test_db()
+        invalidate_context()
+
+    def create_group(self, name):
+        self.alice = make_staff(u"Alice", u"Zimmer")
+        self.bob = make_staff(u"Bob", u"Young")
+        self.carol = make_staff(u"Carol", u"Adams")
+        self.outsider = make_staff(u"Dave", u"Brown")
+
+        self.team_a = db.Team(name=u"%s A" % name, members=[self.alice, self.bob])
+        self.team_b = db.Team(name=u"%s B" % name, members=[self.bob, self.carol])
+        other_team = db.Team(name=u"%s Other" % name, members=[self.outsider])
+        self.group = db.Group(name=name, teams=[self.team_a, self.team_b])
+        db.Group(name=u"%s Other" % name, teams=[other_team])
+        orm.commit()
+        return self.group
+
+    @orm.db_session
+    def test_shared(self):
+        group = self.create_group(u"Shared")
+
+        context = get_context(group.id)
+        self.assertIs(get_context(group.id), context)
+        self.assertEqual(context.team_ids, frozenset([self.team_a.id, self.team_b.id]))
+        self.assertEqual(context.staff_ids, frozenset([self.alice.id, self.bob.id, self.carol.id]))
+
+        invalidate_context(group.id + 1)
+        self.assertIs(get_context(group.id), context)
+
+        invalidate_context(group.id)
+        self.assertIsNot(get_context(group.id), context)
+
+    def test_built_once(self):
+        created = []
+        started = threading.Event()
+        release = threading.Event()
+
+        class SlowContext(object):
+            def __init__(self, group_id):
+                created.append(group_id)
+
+            def warm(self):
+                started.set()
+                release.wait(5)
+                return self
+
+        contexts = []
+        with mock.patch('augur.context.AugurContext', SlowContext):
+            first = threading.Thread(target=lambda: contexts.append(get_context(1)))
+            first.start()
+            started.wait(5)
+
+            # the first context is still being built so this has to wait for it rather than build another one
+            second = threading.Thread(target=lambda: contexts.append(get_context(1)))
+            second.start()
+            release.set()
+            first.join()
+            second.join()
+
+        self.assertEqual(created, [1])
+        self.assertEqual(len(contexts), 2)
+        self.assertIs(contexts[0], contexts[1])
+
+    def test_other_groups_not_blocked(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        class SlowContext(object):
+            def __init__(self, group_id):
+                self.group_id = group_id
+
+            def warm(self):
+                if self.group_id == 1:
+                    started.set()
+                    release.wait(5)
+                return self
+
+        contexts = {}
+        with mock.patch('augur.context.AugurContext', SlowContext):
+            cached = get_context(2)
+            first = threading.Thread(target=lambda: contexts.setdefault(1, get_context(1)))
+            first.start()
+            started.wait(5)
+
+            # group 1 is still loading but the other groups can be read, built and invalidated
+            self.assertIs(get_context(2), cached)
+            self.assertEqual(get_context(3).group_id, 3)
+            invalidate_context(1)
+
+            release.set()
+            first.join()
+
+            # the invalidation happened while group 1 was loading so its context wasn't kept
+            self.assertEqual(contexts[1].group_id, 1)
+            self.assertIsNot(get_context(1), contexts[1])
+            self.assertIs(get_context(1), get_context(1))
+
+    @orm.db_session
+    def test_staff_editors(self):
+        group = self.create_group(u"Staff Editors")
+
+        context = get_context(group.id)
+        api.update_staff(self.alice.id, {'email': u"alice@example.org"})
+        self.assertIsNot(get_context(group.id), context)
+
+        context = get_context(group.id)
+        staff = api.add_staff({'first_name': u"Erin", 'last_name': u"Clark", 'role': u"Developer",
+                               'email': u"erin@example.com", 'rate': 0.0, 'start_date': datetime.date(2017, 1, 1),
+                               'jira_username': u"erin", 'status': u"Active"})
+        self.assertIsNot(get_context(group.id), context)
+
+        context = get_context(group.id)
+        api.delete_staff(staff.id)
+        self.assertIsNot(get_context(group.id), context)
+
+    @orm.db_session
+    def test_team_editors(self):
+        group = self.create_group(u"Team Editors")
+
+        context = get_context(group.id)
+        api.add_staff_to_team(self.team_a, self.outsider)
+        context = get_context(group.id)
+        self.assertIn(self.outsider.id, context.staff_ids)
+
+        api.update_team(self.team_b.id, {'name': u"Renamed"})
+        self.assertIsNot(get_context(group.id), context)
+
+        context = get_context(group.id)
+        api.delete_team(self.team_b.id)
+        context = get_context(group.id)
+        self.assertEqual(context.team_ids, frozenset([self.team_a.id]))
+        self.assertNotIn(self.carol.id, context.staff_ids)
+
+        context = get_context(group.id)
+        api.update_group(group.id, {'name': u"Renamed"})
+        self.assertIsNot(get_context(group.id), context)
+
+    @orm.db_session
+    def test_get_all_staff(self):
+        group = self.create_group(u"All Staff")
+        context = get_context(group.id)
+
+        staff = api.get_all_staff(context)
+        self.assertEqual([s.last_name for s in staff], [u"Adams", u"Young", u"Zimmer"])
+
+        # the same people as before but bob is no longer listed twice
+        old_staff = old_get_all_staff(context)
+        self.assertEqual(len(old_staff), 4)
+        self.assertEqual(set(s.id for s in staff), set(s.id for s in old_staff))
+
+        empty_group = db.Group(name=u"Empty")
+        orm.commit()
+        self.assertEqual(api.get_all_staff(get_context(empty_group.id)), [])
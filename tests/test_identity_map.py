@@ -0,0 +1,138 @@
+import unittest
+
+from munch import munchify
+
+from augur.integrations.objects.base import IssueIdentityMap
+from augur.integrations.objects.issue import JiraIssue, JiraEpic, JiraIssueCollection
+from tests.helpers import FakeJira, FakeSource
+
+ISSUES = {
+    'ENG-1': {'key': 'ENG-1', 'fields': {'issuetype': {'name': 'Story'}, 'cf_epic': 'ENG-100'}},
+    'ENG-2': {'key': 'ENG-2', 'fields': {'issuetype': {'name': 'Sub-task', 'subtask': True},
+                                         'parent': {'key': 'ENG-1'}}},
+    'ENG-100': {'key': 'ENG-100', 'fields': {'issuetype': {'name': 'Epic'}}},
+}
+
+
+class TestIssueIdentityMap(unittest.TestCase):
+
+    def setUp(self):
+        self.source = FakeSource(FakeJira(ISSUES), default_fields={'epic link': 'cf_epic', 'story points': 'cf_points',
+                                                                  'summary': 'summary', 'changelog': 'changelog'},
+                                 identity_map=IssueIdentityMap())
+
+    def test_keyed_collections_share_issues(self):
+        first = JiraIssueCollection(self.source, issue_keys="ENG-1,ENG-2")
+        self.assertTrue(first.load())
+
+        second = JiraIssueCollection(self.source, issue_keys=["eng-2", "ENG-100"])
+        self.assertTrue(second.load())
+
+        self.assertIs(second.issues[0], first.issues[1])
+        self.assertEqual(self.source.jira.searches, ["key in (ENG-1,ENG-2)", "key in (ENG-100)"])
+
+    def test_related_issues(self):
+        collection = JiraIssueCollection(self.source, issue_keys="ENG-1,ENG-2,ENG-100")
+        self.assertTrue(collection.load())
+        story, subtask, epic = collection.issues
+
+        self.assertIs(subtask.get_parent(only_key=False), story)
+
+        # the epic was loaded as a plain issue so it's converted once and then shared
+        self.assertIsInstance(story.get_epic(only_key=False), JiraEpic)
+        self.assertIs(self.source.identity_map.get("ENG-100"), story.get_epic(only_key=False))
+        self.assertEqual(len(self.source.jira.searches), 1)
+
+    def test_stats(self):
+        identity_map = self.source.identity_map
+        issue = JiraIssue(self.source)
+        issue.prepopulate(munchify(ISSUES['ENG-1']))
+
+        self.assertIs(identity_map.add(issue), issue)
+        self.assertIs(identity_map.get("ENG-1"), issue)
+        self.assertIsNone(identity_map.get("ENG-2"))
+
+        stats = identity_map.stats
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+        identity_map.clear()
+        self.assertNotIn("ENG-1", identity_map)
+
+    def test_field_profile(self):
+        collection = JiraIssueCollection(self.source, issue_keys="ENG-1", field_profile='points')
+        self.assertTrue(collection.load())
+
+        kwargs = self.source.jira.search_kwargs[0]
+        self.assertIsNone(kwargs['expand'])
+        self.assertIn('cf_points', kwargs['fields'])
+        self.assertNotIn('changelog', kwargs['fields'])
+
+        # partially loaded issues are kept out of the identity map
+        self.assertNotIn("ENG-1", self.source.identity_map)
+
+        collection = JiraIssueCollection(self.source, issue_keys="ENG-1", field_profile='timing')
+        self.assertTrue(collection.load())
+        self.assertEqual(self.source.jira.search_kwargs[1]['expand'], "changelog")
+
+        self.assertRaises(ValueError, JiraIssueCollection(self.source, issue_keys="ENG-2", field_profile='bad').load)
+
+    def test_load_async(self):
+        results = [JiraIssueCollection(self.source, issue_keys=key).load_async() for key in ("ENG-1", "ENG-2")]
+        self.assertEqual([r.get(timeout=5) for r in results], [True, True])
+        self.assertIn("ENG-1", self.source.identity_map)
+        self.assertIn("ENG-2", self.source.identity_map)
+
+    def test_search_refreshes_mapped_issue(self):
+        collection = JiraIssueCollection(self.source, issue_keys="ENG-1")
+        self.assertTrue(collection.load())
+        story = collection.issues[0]
+        self.assertEqual(story.get_field('summary'), None)
+
+        fresh = JiraIssue(self.source)
+        fresh.prepopulate(munchify({'key': 'ENG-1', 'fields': {'issuetype': {'name': 'Story'},
+                                                              'summary': 'Updated'}}))
+
+        # the object that callers already hold is kept but it now has the new data
+        self.assertIs(self.source.identity_map.add(fresh), story)
+        self.assertEqual(story.get_field('summary'), 'Updated')
+
+    def test_older_data_is_ignored(self):
+        def make_story(summary, updated):
+            issue = JiraIssue(self.source)
+            issue.prepopulate(munchify({'key': 'ENG-1', 'fields': {'issuetype': {'name': 'Story'},
+                                                                  'summary': summary, 'updated': updated}}))
+            return issue
+
+        identity_map = self.source.identity_map
+        story = identity_map.add(make_story('Live', '2017-01-02T10:00:00.000-0800'))
+
+        # a snapshot from before the issue in the map was updated doesn't roll it back
+        self.assertIs(identity_map.add(make_story('Snapshot', '2017-01-02T09:00:00.000-0800')), story)
+        self.assertEqual(story.get_field('summary'), 'Live')
+
+        self.assertIs(identity_map.add(make_story('Newer', '2017-01-02T11:00:00.000-0800'), refresh=False), story)
+        self.assertEqual(story.get_field('summary'), 'Live')
+
+        self.assertIs(identity_map.add(make_story('Newer', '2017-01-02T20:00:00.000+0000')), story)
+        self.assertEqual(story.get_field('summary'), 'Newer')
+
+    def test_max_entries(self):
+        identity_map = IssueIdentityMap(max_entries=2)
+        issues = {}
+        for key in ("ENG-1", "ENG-2", "ENG-100"):
+            issues[key] = JiraIssue(self.source)
+            issues[key].prepopulate(munchify(ISSUES[key]))
+
+        identity_map.add(issues['ENG-1'])
+        identity_map.add(issues['ENG-2'])
+
+        # using ENG-1 makes ENG-2 the least recently used issue
+        self.assertIs(identity_map.get("ENG-1"), issues['ENG-1'])
+        identity_map.add(issues['ENG-100'])
+
+        self.assertEqual(len(identity_map), 2)
+        self.assertIn("ENG-1", identity_map)
+        self.assertNotIn("ENG-2", identity_map)
+        self.assertEqual(identity_map.stats['evictions'], 1)
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from augur import api
+from augur import settings
+from augur.cache import MemoryCache, SqliteCache
+from augur.integrations.objects.base import IssueIdentityMap
+from augur.integrations.objects.issue import JiraIssueCollection, add_jql_clause
+from tests.helpers import FakeJira, FakeSource, make_raw_issue
+
+JQL = "project = ENG ORDER BY key ASC"
+
+
+class SyncJira(FakeJira):
+    """
+    Returns every issue for the plain query and only the changed issues when the query asks for recent updates.
+    """
+    def __init__(self):
+        super(SyncJira, self).__init__()
+        self.changed = []
+
+    def match(self, jql):
+        return self.changed if "updated >=" in jql else sorted(self.issues)
+
+
+class RecordingCache(MemoryCache):
+    """
+    Records the keys that are written and the keys that are read
+    """
+    def __init__(self):
+        super(RecordingCache, self).__init__()
+        self.written = []
+        self.read = []
+
+    def get_entry(self, key):
+        self.read.append(key)
+        return super(RecordingCache, self).get_entry(key)
+
+    def set_entry(self, key, entry):
+        self.written.append(key)
+        super(RecordingCache, self).set_entry(key, entry)
+
+
+class TestIncrementalSync(unittest.TestCase):
+
+    def setUp(self):
+        self._sync_cache = api.SYNC_CACHE
+        api.SYNC_CACHE = RecordingCache()
+        self.source = FakeSource(SyncJira(), identity_map=IssueIdentityMap())
+
+    def tearDown(self):
+        api.SYNC_CACHE = self._sync_cache
+
+    def load(self, **kwargs):
+        collection = JiraIssueCollection(self.source, input_jql=JQL, incremental=True, **kwargs)
+        self.assertTrue(collection.load())
+        return [(i.key, i.status) for i in collection]
+
+    def test_sync(self):
+        jira = self.source.jira
+        jira.issues = {'ENG-1': make_raw_issue('ENG-1', 'Open'), 'ENG-2': make_raw_issue('ENG-2', 'Open')}
+        self.assertEqual(self.load(), [('ENG-1', 'Open'), ('ENG-2', 'Open')])
+        eng_2 = self.source.identity_map.get('ENG-2')
+
+        jira.issues['ENG-2'] = make_raw_issue('ENG-2', 'Done')
+        jira.issues['ENG-3'] = make_raw_issue('ENG-3', 'Open')
+        jira.changed = ['ENG-1', 'ENG-2', 'ENG-3']
+        written = api.SYNC_CACHE.written
+        del written[:]
+        self.assertEqual(self.load(), [('ENG-1', 'Open'), ('ENG-2', 'Done'), ('ENG-3', 'Open')])
+        self.assertEqual(jira.searches[1], '(project = ENG) AND updated >= "-2m" ORDER BY key ASC')
+
+        # the issue that was already loaded is updated rather than replaced
+        self.assertEqual(eng_2.status, 'Done')
+
+        # only the issues that changed are written (along with the list of issues)
+        self.assertEqual([k.split(":")[-1] for k in written[:-1]], ['ENG-2', 'ENG-3'])
+        self.assertNotIn(":", written[-1])
+
+        # a full sync drops the issues that no longer match without reading the stored issues
+        del jira.issues['ENG-1']
+        read = api.SYNC_CACHE.read
+        del read[:]
+        self.assertEqual(self.load(full_sync_interval=0), [('ENG-2', 'Done'), ('ENG-3', 'Open')])
+        self.assertEqual(jira.searches[2], JQL)
+        self.assertEqual([k for k in read if ":" in k], [])
+
+    def test_more_issues_than_the_memory_cache_holds(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        api.SYNC_CACHE = SqliteCache(os.path.join(directory, "sync.sqlite"))
+
+        jira = self.source.jira
+        count = settings.main.datastores.cache.memory.max_entries + 10
+        jira.issues = dict(("ENG-%d" % i, make_raw_issue("ENG-%d" % i, 'Open')) for i in range(1, count + 1))
+        self.assertEqual(len(self.load()), count)
+
+        # every issue is still stored so the next loads only ask for the updated issues
+        jira.issues['ENG-1'] = make_raw_issue('ENG-1', 'Done')
+        jira.changed = ['ENG-1']
+        self.assertIn(('ENG-1', 'Done'), self.load())
+        self.assertEqual(len(self.load()), count)
+        self.assertEqual(len(jira.searches), 3)
+        self.assertTrue(all("updated >=" in jql for jql in jira.searches[1:]))
+
+    def test_add_jql_clause(self):
+        self.assertEqual(add_jql_clause("project = ENG", "x = 1"), "(project = ENG) AND x = 1")
+        self.assertEqual(add_jql_clause("order by key", "x = 1"), "x = 1 order by key")
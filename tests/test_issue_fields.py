@@ -0,0 +1,77 @@
+import unittest
+
+from munch import munchify
+
+from augur.integrations.objects.issue import JiraIssue, CompactIssueRecord, get_field_accessor
+from tests.helpers import FIELDS, FakeSource
+
+ISSUE = {
+    'key': 'ENG-1',
+    'fields': {
+        'summary': 'Add a thing',
+        'status': {'name': 'In Progress'},
+        'issuetype': {'name': 'Story', 'subtask': False},
+        'assignee': {'name': 'jdoe'},
+        'resolution': None,
+        'parent': {'key': 'ENG-10'},
+        'customfield_1': 5.0,
+        'customfield_2': {'value': 'Team A'},
+        'customfield_3': 'ENG-100',
+    },
+    'changelog': {
+        'histories': [
+            {'id': '2', 'created': '2017-01-02T10:00:00.000-0800',
+             'items': [{'field': 'status', 'fromString': 'Open', 'toString': 'In Progress'}]},
+            {'id': '1', 'created': '2017-01-01T10:00:00.000-0800',
+             'items': [{'field': 'assignee', 'fromString': None, 'toString': 'jdoe'}]},
+        ]
+    }
+}
+
+
+class TestIssueFields(unittest.TestCase):
+
+    def test_get_field(self):
+        issue = JiraIssue(FakeSource(default_fields=FIELDS))
+        issue.prepopulate(munchify(ISSUE))
+
+        self.assertEqual(issue.get_field('key'), 'ENG-1')
+        self.assertEqual(issue.get_field('status.name'), 'In Progress')
+        self.assertEqual(issue.get_field('story points', translate=True), 5.0)
+        self.assertEqual(issue.get_field('fields.customfield_3'), 'ENG-100')
+        self.assertIsNone(issue.get_field('status'))
+        self.assertIsNone(issue.get_field('labels.name'))
+        self.assertIs(get_field_accessor('status.name'), get_field_accessor('status.name'))
+
+    def test_extracted_fields_match(self):
+        source = FakeSource(default_fields=FIELDS)
+        issue = JiraIssue(source)
+        issue.prepopulate(munchify(ISSUE))
+        extracted = JiraIssue(source, extract_fields=True)
+        extracted.prepopulate(munchify(ISSUE))
+
+        self.assertIsNotNone(extracted._fields)
+        for name in ('key', 'summary', 'status', 'priority', 'issuetype', 'description', 'reporter', 'assignee',
+                     'points', 'resolution', 'team_name', 'is_subtask'):
+            self.assertEqual(getattr(extracted, name), getattr(issue, name), name)
+
+        self.assertEqual(extracted.get_parent(), 'ENG-10')
+        self.assertEqual(extracted.get_epic(), 'ENG-100')
+
+    def test_compact(self):
+        issue = JiraIssue(FakeSource(default_fields=FIELDS), compact=True)
+        self.assertTrue(issue.prepopulate(ISSUE))
+
+        self.assertIsInstance(issue._fields, CompactIssueRecord)
+        self.assertIsNone(issue._issue)
+        self.assertNotIn('changelog', issue.raw)
+        self.assertEqual(issue.status, 'In Progress')
+        self.assertEqual(issue.points, 5.0)
+        self.assertEqual(issue.get_field('customfield_2.value'), 'Team A')
+
+        changes = issue.status_changes
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0].changes, (('Open', 'In Progress'),))
+
+        # the munchified issue is only created when asked for
+        self.assertEqual(issue.issue.fields.summary, 'Add a thing')
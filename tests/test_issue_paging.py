@@ -0,0 +1,100 @@
+import unittest
+
+import mock
+from munch import munchify
+
+from augur.integrations.objects.issue import JiraIssueCollection
+from augur.integrations.objects.metrics import IssueCollectionMetrics
+from tests.helpers import FakeJira, FakeSource
+
+
+def make_jira(count, max_page_size):
+    """
+    Searches return issues ENG-1 to ENG-<count> but never more than max_page_size of them at once (like Jira does)
+    """
+    return FakeJira([{'key': 'ENG-%d' % i, 'fields': {'summary': 'Issue %d' % i, 'status': {'name': 'Open'}}}
+                     for i in range(1, count + 1)], max_page_size=max_page_size)
+
+
+class TestParallelPaging(unittest.TestCase):
+
+    def load(self, jira, **kwargs):
+        collection = JiraIssueCollection(FakeSource(jira), input_jql="project = ENG", parallel_paging=True,
+                                         **kwargs)
+        self.assertTrue(collection.load())
+        return [i.key for i in collection]
+
+    def test_pages(self):
+        jira = make_jira(count=25, max_page_size=100)
+        self.assertEqual(self.load(jira, page_size=10), ['ENG-%d' % i for i in range(1, 26)])
+        self.assertEqual(sorted(jira.requests), [(0, 10), (10, 10), (20, 10)])
+
+    def test_capped_page_size(self):
+        jira = make_jira(count=25, max_page_size=10)
+        self.assertEqual(self.load(jira, page_size=100), ['ENG-%d' % i for i in range(1, 26)])
+        self.assertEqual(sorted(s for s, _ in jira.requests), [0, 10, 20])
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        # the streaming path must never build the full list of issues
+        patcher = mock.patch.object(JiraIssueCollection, 'issues', new_callable=mock.PropertyMock,
+                                    side_effect=AssertionError("the issues list was built"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stream(self, jira, **kwargs):
+        collection = JiraIssueCollection(FakeSource(jira), input_jql="project = ENG", stream=True,
+                                         **kwargs)
+        self.assertTrue(collection.load())
+        return collection
+
+    def test_load_fetches_nothing(self):
+        jira = make_jira(count=25, max_page_size=100)
+        self.stream(jira)
+        self.assertEqual(jira.requests, [])
+
+    def test_pages(self):
+        jira = make_jira(count=25, max_page_size=100)
+        collection = self.stream(jira, page_size=10)
+
+        issues = iter(collection)
+        self.assertEqual(next(issues).key, 'ENG-1')
+        self.assertEqual(jira.requests, [(0, 10)])
+
+        for _ in range(10):
+            next(issues)
+        self.assertEqual(jira.requests, [(0, 10), (10, 10)])
+
+        self.assertEqual(len(list(issues)), 14)
+        self.assertEqual(jira.requests, [(0, 10), (10, 10), (20, 10)])
+
+    def test_paging_options(self):
+        jira = make_jira(count=25, max_page_size=100)
+        collection = self.stream(jira, page_size=10, paging_start_at=5, paging_max_results=12)
+        self.assertEqual([i.key for i in collection], ['ENG-%d' % i for i in range(6, 18)])
+        self.assertEqual(jira.requests, [(5, 10), (15, 2)])
+        self.assertEqual(collection.count(), 12)
+
+    def test_count(self):
+        jira = make_jira(count=25, max_page_size=100)
+        collection = self.stream(jira, paging_start_at=5)
+
+        self.assertEqual(collection.count(), 20)
+        self.assertEqual(jira.requests, [(0, 1)])
+        self.assertEqual(jira.search_kwargs[0]['fields'], "key")
+
+        # the total is remembered
+        self.assertEqual(collection.count(), 20)
+        self.assertEqual(len(jira.requests), 1)
+
+    def test_single_pass_metric(self):
+        jira = make_jira(count=25, max_page_size=100)
+        collection = self.stream(jira, page_size=10)
+        context = munchify({'workflow': {'is_resolved': lambda status, resolution: False}})
+
+        result = IssueCollectionMetrics(context, collection).status_analysis()
+        self.assertEqual(result.open, 25)
+        self.assertEqual(result.remaining_ticket_count, 25)
+        self.assertEqual(jira.requests, [(0, 10), (10, 10), (20, 10)])
@@ -0,0 +1,76 @@
+import unittest
+
+import mock
+from pony import orm
+
+from augur import api
+from augur import db
+from augur.concurrency import CompletedResult
+from augur.integrations.objects.board import JiraBoard, load_boards
+from tests.helpers import FakeAgileJira, init_test_db
+
+SPRINTS = {10: [4, 5], 20: [5, 6]}
+
+
+class TestLoadBoards(unittest.TestCase):
+
+    def setUp(self):
+        init_test_db()
+        api.get_cache().clear()
+        self._persistent_cache = api.PERSISTENT_CACHE
+        api.PERSISTENT_CACHE = api.MemoryCache()
+
+        # the boards share sprint 5 whose report can't be loaded on board 20
+        self.source = FakeAgileJira(SPRINTS, failing_reports=[(20, 5)])
+
+    def tearDown(self):
+        api.PERSISTENT_CACHE = self._persistent_cache
+
+    def add_boards(self):
+        for jira_id in SPRINTS:
+            db.Team(name=u"Team %s" % jira_id, agile_board=db.AgileBoard(jira_id=jira_id))
+        orm.flush()
+
+    @orm.db_session
+    def test_load_boards(self):
+        self.add_boards()
+        boards = load_boards(self.source, [10, 20, 10, 30], max_parallelism=4)
+        orm.rollback()
+
+        self.assertEqual(boards.keys(), [10, 20, 30])
+        self.assertIsNone(boards[30])
+        self.assertEqual(sorted(self.source.report_requests), [(10, 4), (10, 5), (20, 5), (20, 6)])
+
+        # the shared sprint only failed on one of the boards
+        self.assertEqual(boards[10].get_sprints().failures, {})
+        self.assertEqual(boards[20].get_sprints().failures, {5: "No report"})
+        self.assertEqual([s.completed_points for s in boards[10].get_sprints()], [5, 4])
+        self.assertEqual(boards[20].get_backlog().issues[0].key, 'ENG-20')
+
+    @orm.db_session
+    def test_get_boards_metrics(self):
+        self.add_boards()
+        with mock.patch.object(api, 'get_jira', return_value=self.source):
+            metrics = api.get_boards_metrics(None, board_ids=[10, 20])
+        orm.rollback()
+
+        self.assertEqual(metrics[10].sprints.avg_velocity, 4.5)
+        self.assertEqual(metrics[10].failures, {})
+        self.assertEqual(metrics[10].backlog.total_pointed_tickets, 1)
+
+        # the sprint without a report is left out of the analysis
+        self.assertEqual(metrics[20].sprints.avg_velocity, 6.0)
+        self.assertEqual(metrics[20].failures, {5: "No report"})
+
+    @orm.db_session
+    def test_load_async(self):
+        self.add_boards()
+        board = JiraBoard(self.source, board_id=10)
+        self.assertTrue(board.load_async().get(timeout=5))
+        self.assertEqual(board.id, 10)
+
+        # a board that can't be loaded from the database is done before anything is requested from Jira
+        result = JiraBoard(self.source).load_async()
+        self.assertIsInstance(result, CompletedResult)
+        self.assertIsNone(result.get())
+        orm.rollback()
@@ -0,0 +1,55 @@
+import unittest
+
+from munch import munchify
+from pony import orm
+
+from augur import db
+from augur.integrations.objects.metrics import IssueCollectionMetrics
+from tests.helpers import init_test_db, make_issue
+
+
+class TestTimingAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        init_test_db()
+
+        self.issues = [
+            # back to in progress after a review
+            make_issue('ENG-1', 'Done', [('1', '2017-01-01T10:00:00.000-0800', [('Open', 'In Progress')]),
+                                         ('2', '2017-01-02T10:00:00.000-0800', [('In Progress', 'Review')]),
+                                         ('3', '2017-01-03T10:00:00.000-0800', [('Review', 'In Progress')]),
+                                         ('4', '2017-01-05T10:00:00.000-0800', [('In Progress', 'Done')])]),
+            make_issue('ENG-2', 'Done', [('1', '2017-01-02T12:00:00.000+0000', [('Open', 'In Progress')]),
+                                         ('2', '2017-01-04T00:00:00.000+0000', [('In Progress', 'Done')])]),
+            make_issue('ENG-3', 'Open', []),
+        ]
+
+    def create_workflow(self):
+        statuses = [db.ToolIssueStatus(tool_issue_status_name=name, tool_issue_status_type=status_type)
+                    for name, status_type in (("Open", "open"), ("In Progress", "in progress"),
+                                              ("Review", "in progress"), ("Done", "done"))]
+        return db.Workflow(name="Timing Test", statuses=statuses)
+
+    @orm.db_session
+    def test_vectorized_matches_loop(self):
+        metrics = IssueCollectionMetrics(munchify({'workflow': self.create_workflow()}), self.issues)
+
+        expected = metrics.timing_analysis()
+        self.assertEqual(expected.issues['ENG-1'].statuses.in_progress.total.days, 3)
+        self.assertEqual(metrics.timing_analysis({'vectorized': True}), expected)
+
+        orm.rollback()
+
+    @orm.db_session
+    def test_data_frame(self):
+        metrics = IssueCollectionMetrics(munchify({'workflow': self.create_workflow()}), self.issues)
+
+        frame = metrics.timing_analysis({'as_data_frame': True})
+        self.assertEqual(list(frame.index), ['ENG-1', 'ENG-2', 'ENG-3'])
+        self.assertEqual(frame.loc['ENG-1', '_time_in_progress'], 3 * 86400.0)
+        self.assertEqual(frame.loc['ENG-1', '_time_review'], 86400.0)
+        self.assertEqual(frame.loc['ENG-2', '_time_total_time_seconds'], 36 * 3600.0)
+        self.assertEqual(frame.loc['ENG-3', '_time_total_time_seconds'], 0.0)
+        self.assertEqual(frame.loc['ENG-1', '_time_type_in_progress'], 4 * 86400.0)
+
+        orm.rollback()
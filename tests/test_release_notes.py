@@ -0,0 +1,45 @@
+import unittest
+
+import mock
+
+from augur.integrations.objects.issue import JiraReleaseNotes, JiraEpic
+from tests.helpers import make_source
+
+ISSUES = {
+    'ENG-1': {'key': 'ENG-1', 'fields': {'issuetype': {'name': 'Story'}, 'customfield_1': 3.0,
+                                         'customfield_3': 'ENG-100'}},
+    'ENG-2': {'key': 'ENG-2', 'fields': {'issuetype': {'name': 'Bug'}, 'customfield_1': 1.0}},
+    'ENG-100': {'key': 'ENG-100', 'fields': {'issuetype': {'name': 'Epic'}}},
+}
+
+
+class TestReleaseNotes(unittest.TestCase):
+
+    def setUp(self):
+        context = mock.Mock()
+        context.workflow.get_projects_jql.return_value = "project in (ENG)"
+        patcher = mock.patch('augur.integrations.objects.issue.get_context', return_value=context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # the released issues are ENG-1 and ENG-2
+        self.source = make_source(ISSUES, matches=['ENG-1', 'ENG-2'])
+
+    def check_release_notes(self, notes):
+        self.assertEqual(notes.start.format("YYYY-MM-DD"), "2017-01-01")
+        self.assertEqual(notes.end.format("YYYY-MM-DD"), "2017-01-31")
+        self.assertEqual(notes.total_points, 4.0)
+        self.assertEqual(notes.bug_count, 1)
+        self.assertEqual(notes.feature_count, 1)
+        self.assertIsInstance(notes.released_issues[0].epic, JiraEpic)
+
+    def test_load(self):
+        notes = JiraReleaseNotes(self.source, group_id=1, start="2017-01-01 00:00", end="2017-01-31 00:00")
+        self.assertTrue(notes.load())
+        self.check_release_notes(notes)
+        self.assertTrue(self.source.jira.searches[0].startswith("project in (ENG) AND"))
+
+    def test_load_async(self):
+        notes = JiraReleaseNotes(self.source, group_id=1, start="2017-01-01 00:00", end="2017-01-31 00:00")
+        self.assertTrue(notes.load_async().get(timeout=5))
+        self.check_release_notes(notes)
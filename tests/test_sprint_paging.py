@@ -0,0 +1,125 @@
+import threading
+import unittest
+
+from augur import api
+from augur.cache import FrozenDict, MemoryCache
+from augur.integrations.augurjira import AugurJira
+from augur.integrations.objects.board import JiraSprint, JiraSprintCollection, load_sprint_reports
+from tests.helpers import FakeAgileJira
+
+
+class OverlappingReportJira(FakeAgileJira):
+    """
+    Holds on to each sprint report request until another one is in flight and records how many were in flight at once
+    """
+    def __init__(self, sprint_count):
+        super(OverlappingReportJira, self).__init__({1: range(sprint_count)}, failing_reports=[(1, 3)])
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._condition = threading.Condition()
+
+    def get_sprint_report(self, board_id, sprint_id):
+        with self._condition:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self._condition.notify_all()
+            if self.max_in_flight < 2:
+                self._condition.wait(5)
+        try:
+            return super(OverlappingReportJira, self).get_sprint_report(board_id, sprint_id)
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+
+
+class ReportJira(AugurJira):
+    """
+    Answers sprint report requests and counts them
+    """
+    def __init__(self):
+        self.requests = 0
+
+    def custom_get_json(self, path, params=None, base=None, replacement_options=None):
+        self.requests += 1
+        return {'sprint': {'id': 1, 'state': 'closed'}, 'contents': {'completedIssues': [{'key': 'ENG-1'}]}}
+
+
+class TestSprintPaging(unittest.TestCase):
+
+    def setUp(self):
+        api.get_cache().clear()
+
+    def test_newest_first(self):
+        for count in (0, 1, 50, 51, 173, 1000):
+            source = FakeAgileJira({1: range(count)})
+            self.assertEqual([s['id'] for s in source.iter_sprints(1, states=['closed'])],
+                             list(reversed(range(count))))
+
+    def test_max_sprints(self):
+        source = FakeAgileJira({1: range(1000)})
+        collection = JiraSprintCollection(source, board=1, max_sprints=5)
+        self.assertTrue(collection.load())
+        self.assertEqual([s.option('sprint_id') for s in collection], [999, 998, 997, 996, 995])
+
+        # the last page is remembered so the next load goes straight to it
+        source.page_requests = []
+        collection = JiraSprintCollection(source, board=1, max_sprints=60)
+        self.assertTrue(collection.load())
+        self.assertEqual(len(collection._sprints), 60)
+        self.assertEqual(source.page_requests, [950, 900])
+
+    def test_max_sprints_on_page_boundary(self):
+        source = FakeAgileJira({1: range(1000)})
+        self.assertTrue(JiraSprintCollection(source, board=1, max_sprints=1).load())
+
+        # the last page (950) is remembered so 50 sprints only need that one page
+        source.page_requests = []
+        collection = JiraSprintCollection(source, board=1, max_sprints=50)
+        self.assertTrue(collection.load())
+        self.assertEqual(len(collection._sprints), 50)
+        self.assertEqual(source.page_requests, [950])
+
+    def test_load_sprint_reports(self):
+        source = FakeAgileJira({1: [], 2: []}, failing_reports=[(1, 3)])
+        sprints = [JiraSprint(source, sprint_id=sprint_id, board_id=board_id)
+                   for board_id, sprint_id in ((1, 1), (1, 1), (2, 1), (1, 3))]
+
+        failures = load_sprint_reports(sprints, max_parallelism=2)
+
+        self.assertEqual(sorted(source.report_requests), [(1, 1), (1, 3), (2, 1)])
+        self.assertEqual(failures.keys(), [(1, 3)])
+        self.assertEqual(sprints[1].report.completedIssuesEstimateSum.value, 1)
+        self.assertEqual(sprints[2].details.id, 1)
+
+    def test_concurrent_reports(self):
+        source = OverlappingReportJira(8)
+        collection = JiraSprintCollection(source, board=1, include_reports=True, max_parallelism=3)
+        self.assertTrue(collection.load())
+
+        self.assertEqual(sorted(source.report_requests), [(1, i) for i in range(8)])
+        self.assertGreater(source.max_in_flight, 1)
+        self.assertLessEqual(source.max_in_flight, 3)
+
+        # the sprint whose report failed is kept without it
+        self.assertEqual(collection.failures, {3: "No report"})
+        self.assertEqual([s.option('sprint_id') for s in collection], range(7, -1, -1))
+        self.assertEqual(collection._sprints[0].report.completedIssuesEstimateSum.value, 7)
+
+    def test_cached_sprint_report(self):
+        persistent_cache = api.PERSISTENT_CACHE
+        api.PERSISTENT_CACHE = MemoryCache()
+        try:
+            source = ReportJira()
+            report = source.get_sprint_report(1, 1)
+
+            # cache hits share the read-only report rather than copying it
+            self.assertIsInstance(report, FrozenDict)
+            self.assertIs(source.get_sprint_report(1, 1), report)
+            self.assertIs(source.get_sprint_report_async(1, 1).get(timeout=5), report)
+            self.assertEqual(source.requests, 1)
+
+            sprint = JiraSprint(source, sprint_id=1, board_id=1)
+            self.assertTrue(sprint._set_sprint_report(report))
+            self.assertEqual(sprint.report.completedIssues[0].key, 'ENG-1')
+        finally:
+            api.PERSISTENT_CACHE = persistent_cache
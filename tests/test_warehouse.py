@@ -0,0 +1,96 @@
+import datetime
+import unittest
+
+import mock
+
+from augur import api
+from augur.integrations.objects.issue import JiraIssueCollection
+from augur.warehouse import IssueWarehouse, to_utc_string
+from tests.helpers import FIELDS, FakeSource, make_issue, make_source
+
+
+def make_stored_issue(key, status, assignee, resolved=None, points=None, source=None):
+    """
+    Creates an issue with the fields that the warehouse normalizes
+    """
+    return make_issue(key, status, [('10', '2017-01-02T10:00:00.000-0800', [('Open', status)])], source=source,
+                      project={'key': key.split("-")[0]}, issuetype={'name': 'Story'}, assignee={'name': assignee},
+                      resolution={'name': 'Done'} if resolved else None, resolutiondate=resolved,
+                      customfield_1=points)
+
+
+class TestIssueWarehouse(unittest.TestCase):
+
+    def setUp(self):
+        self.warehouse = IssueWarehouse(":memory:")
+        self.warehouse.store_issues([
+            make_stored_issue('ENG-1', 'Done', 'jdoe', resolved='2017-01-03T23:00:00.000-0800', points=3.0),
+            make_stored_issue('ENG-2', 'In Progress', 'asmith'),
+            make_stored_issue('OPS-1', 'Done', 'jdoe', resolved='2017-01-05T10:00:00.000+0000'),
+        ])
+
+    def keys(self, **query):
+        return [i['key'] for i in self.warehouse.query(**query)]
+
+    def test_query(self):
+        self.assertEqual(len(self.warehouse), 3)
+        self.assertEqual(self.keys(project='eng'), ['ENG-1', 'ENG-2'])
+        self.assertEqual(self.keys(status=['Done', 'Closed'], assignee='JDOE'), ['ENG-1', 'OPS-1'])
+        self.assertEqual(self.keys(resolved_after=datetime.datetime(2017, 1, 4, 8)), ['OPS-1'])
+        self.assertEqual(self.keys(resolved_before='2017-01-04T08:00:00Z'), ['ENG-1'])
+        self.assertRaises(ValueError, self.warehouse.query, color='red')
+
+        # keys are ordered by number within each project
+        self.warehouse.store_issues([make_stored_issue('ENG-10', 'Open', 'jdoe')])
+        self.assertEqual(self.keys(), ['ENG-1', 'ENG-2', 'ENG-10', 'OPS-1'])
+
+    def test_sprints_and_transitions(self):
+        self.warehouse.store_sprint_issues(7, ['eng-1', 'OPS-1'])
+        self.assertEqual(self.keys(sprint_id=7, project='ops'), ['OPS-1'])
+        self.assertEqual(self.warehouse.get_sprint_ids('ENG-1'), [7])
+        self.assertEqual(self.warehouse.get_transitions('ENG-2'),
+                         [('2017-01-02 18:00:00', 'open', 'in progress')])
+
+        # storing an issue again replaces it along with its transitions
+        self.warehouse.store_issues([make_stored_issue('ENG-2', 'Done', 'asmith')])
+        self.assertEqual(len(self.warehouse.get_transitions('ENG-2')), 1)
+        self.assertEqual(self.keys(status='done'), ['ENG-1', 'ENG-2', 'OPS-1'])
+
+        self.warehouse.remove_issues(['ENG-1'])
+        self.assertNotIn('ENG-1', self.warehouse)
+        self.assertEqual(self.warehouse.get_sprint_ids('ENG-1'), [])
+
+    def test_collection(self):
+        collection = JiraIssueCollection(FakeSource(default_fields=FIELDS), warehouse=self.warehouse,
+                                         warehouse_query={'project': 'ENG'})
+        self.assertTrue(collection.load())
+        self.assertEqual([(i.key, i.points) for i in collection], [('ENG-1', 3.0), ('ENG-2', 0.0)])
+
+    def test_sync_warehouse(self):
+        issues = [make_stored_issue('ENG-2', 'Done', 'asmith', resolved='2017-01-06T10:00:00.000+0000'),
+                  make_stored_issue('ENG-3', 'Open', 'jdoe')]
+        source = make_source([i.raw for i in issues])
+
+        with mock.patch.object(api, 'WAREHOUSE', self.warehouse), mock.patch.object(api, 'get_jira',
+                                                                                    return_value=source):
+            self.assertEqual(api.sync_warehouse("sprint = 8", sprint_id=8), 2)
+
+        self.assertEqual(source.jira.searches, ["sprint = 8"])
+        self.assertEqual(self.keys(sprint_id=8), ['ENG-2', 'ENG-3'])
+        self.assertEqual(self.keys(status='done'), ['ENG-1', 'ENG-2', 'OPS-1'])
+
+    def test_collection_leaves_mapped_issues(self):
+        source = make_source()
+        live = source.identity_map.add(make_stored_issue('ENG-2', 'Done', 'asmith', source=source))
+
+        # the warehouse still has ENG-2 in progress but that doesn't change the issue loaded from Jira
+        collection = JiraIssueCollection(source, warehouse=self.warehouse, warehouse_query={'keys': 'ENG-2'})
+        self.assertTrue(collection.load())
+        self.assertEqual(collection.issues[0].status, 'In Progress')
+        self.assertIsNot(collection.issues[0], live)
+        self.assertEqual(live.status, 'Done')
+        self.assertIs(source.identity_map.get('ENG-2'), live)
+
+    def test_to_utc_string(self):
+        self.assertEqual(to_utc_string('2017-01-03T23:00:00.000-0800'), '2017-01-04 07:00:00')
+        self.assertIsNone(to_utc_string(None))
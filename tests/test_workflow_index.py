@@ -0,0 +1,83 @@
+import unittest
+
+import mock
+from pony import orm
+
+from augur import api
+from augur import db
+from augur.cache import MemoryCache
+from tests.helpers import init_test_db
+
+
+class TestWorkflowIndex(unittest.TestCase):
+
+    def setUp(self):
+        init_test_db()
+
+    @orm.db_session
+    def test_membership_changes(self):
+        in_progress = db.ToolIssueStatus(tool_issue_status_name="In Progress", tool_issue_status_type="in progress")
+        done = db.ToolIssueStatus(tool_issue_status_name="Done", tool_issue_status_type="done")
+        wont_do = db.ToolIssueResolution(tool_issue_resolution_name="Won't Do", tool_issue_resolution_type="negative")
+        workflow = db.Workflow(name="Index Test", statuses=[in_progress])
+        orm.flush()
+
+        index = workflow.index
+        self.assertIs(workflow.index, index)
+        self.assertFalse(index.is_resolved("Done", None))
+
+        commit = orm.commit
+
+        def check_commit():
+            # the index is only dropped after the change is committed
+            self.assertIn(workflow.id, db._workflow_indexes)
+            commit()
+
+        # pony doesn't call any hooks for these so the api functions drop the index
+        with mock.patch.object(orm, 'commit', side_effect=check_commit):
+            api.add_statuses_to_workflow(workflow, done)
+        self.assertNotIn(workflow.id, db._workflow_indexes)
+        self.assertTrue(workflow.index.is_resolved("Done", None))
+        self.assertIs(workflow.status_ob_from_string("done"), done)
+
+        api.add_resolutions_to_workflow(workflow.id, [wont_do])
+        self.assertTrue(workflow.index.is_abandoned("Done", "Won't Do"))
+        self.assertIs(workflow.resolution_ob_from_string("won't do"), wont_do)
+
+        api.remove_statuses_from_workflow(workflow, [in_progress])
+        self.assertFalse(workflow.index.is_in_progress("In Progress"))
+        self.assertIsNone(workflow.status_ob_from_string("In Progress"))
+
+        # the index is shared until something changes
+        self.assertIs(workflow.index, workflow.index)
+        api.remove_resolutions_from_workflow(workflow, wont_do)
+        self.assertIsNone(workflow.resolution_ob_from_string("Won't Do"))
+
+        # the api functions commit so the test data has to be removed
+        for entity in (workflow, in_progress, done, wont_do):
+            entity.delete()
+        orm.commit()
+
+    @orm.db_session
+    def test_projects_by_category_type(self):
+        projects = [{'key': 'ENG', 'projectCategory': {'name': 'Engineering'}},
+                    {'key': 'OPS', 'projectCategory': {'name': 'Operations'}}]
+        jira = mock.Mock()
+        jira.get_projects.return_value = projects
+        workflow = db.Workflow(name="Category Test")
+        orm.flush()
+
+        api.set_cache(MemoryCache())
+        with mock.patch.object(api, 'get_jira', return_value=jira):
+            missed = workflow.get_projects_by_category("Engineering")
+            hit = workflow.get_projects_by_category("Engineering")
+
+        # the cached snapshot is returned either way
+        self.assertEqual(jira.get_projects.call_count, 1)
+        self.assertIsInstance(missed, tuple)
+        self.assertIsInstance(hit, tuple)
+        self.assertEqual([p['key'] for p in missed], ['ENG'])
+        self.assertEqual(missed, hit)
+        api.set_cache(None)
+
+        orm.rollback()